@@ -13,14 +13,42 @@ do projeto (`core_engine`), que integra:
 Útil para desenvolvimento, debug e validação antes de integrar com API, Chatbot
 ou WhatsApp.
 
+Profiling do AG com o mesmo perfil de teste:
+
+    python app.py --profile                       # top-N hotspots (cProfile)
+    python app.py --profile --tracemalloc         # + alocações
+    python app.py --profile --flamegraph ag.folded --pstats ag.pstats
+
+Lote (JSONL/CSV de perfis → JSONL de planos; o perfil abaixo dá os campos
+que faltarem em cada linha — ver `assets/lote.py`):
+
+    python app.py --lote perfis.jsonl --saida planos.jsonl --workers 4
+
 Comentários revisados e organizados com auxílio do ChatGPT (GPT-5.1 Thinking)
 Data: 2025-11-19
 """
 
+import argparse
+import sys
+
 # ---------------------------------------------------------------------------
 # Import do módulo principal (core_engine)
 # ---------------------------------------------------------------------------
 from assets.core_engine import gerar_plano_para_usuario
+from assets.lote import adicionar_argumentos, rodar_args
+
+# ---------------------------------------------------------------------------
+# Flags de linha de comando (profiling)
+# ---------------------------------------------------------------------------
+parser = argparse.ArgumentParser(description="Sandbox do core_engine (Fuzzy + AG)")
+parser.add_argument("--profile", action="store_true", help="captura cProfile da execução do AG")
+parser.add_argument("--top", type=int, default=15, help="quantidade de hotspots exibidos")
+parser.add_argument("--tracemalloc", action="store_true", help="amostra alocações com tracemalloc")
+parser.add_argument("--flamegraph", metavar="ARQ", help="salva pilhas amostradas (collapsed stacks)")
+parser.add_argument("--pstats", metavar="ARQ", help="salva o dump do cProfile (pstats)")
+parser.add_argument("--lote", metavar="PERFIS", help="roda em lote os perfis de um arquivo .jsonl/.csv")
+adicionar_argumentos(parser)
+args = parser.parse_args()
 
 # ---------------------------------------------------------------------------
 # Dados de teste (simulam o fluxo completo do chatbot)
@@ -73,6 +101,24 @@ dados = {
     },
 }
 
+# ---------------------------------------------------------------------------
+# Modo lote: o perfil acima vira a base de cada linha do arquivo
+# ---------------------------------------------------------------------------
+if args.lote:
+    base = {k: v for k, v in dados.items() if k not in ("objetivo", "atividade", "colesterol", "peso")}
+    sys.exit(rodar_args(args.lote, args, base))
+
+if args.profile:
+    dados["ag"].update(
+        {
+            "profile": True,
+            "profile_top": args.top,
+            "profile_tracemalloc": args.tracemalloc,
+            "profile_flamegraph": args.flamegraph,
+            "profile_pstats": args.pstats,
+        }
+    )
+
 # ---------------------------------------------------------------------------
 # Execução do core_engine → gera o plano completo
 # ---------------------------------------------------------------------------
@@ -94,4 +140,15 @@ for i, refeicao in enumerate(resultado["cardapio"], 1):
     for item in refeicao:
         print(f" - {item['nome']} — {item['porcao_g']} g")
 
+if "perfil" in resultado:
+    perfil = resultado["perfil"]
+    print(f"\n===== PERFIL DO AG ({perfil['tempo_total_s']:.2f} s, {perfil['chamadas_total']} chamadas) =====")
+    for h in perfil["hotspots"]:
+        print(f" {h['tottime_s']:8.3f} s  {h['cumtime_s']:8.3f} s  {h['chamadas']:>9}  {h['funcao']}")
+    for a in perfil.get("alocacoes", []):
+        print(f" {a['kib']:10.1f} KiB  {a['blocos']:>7} blocos  {a['local']}")
+    for chave in ("arquivo_pstats", "arquivo_flamegraph"):
+        if chave in perfil:
+            print(f" {chave}: {perfil[chave]}")
+
 print("\n===== FIM DO TESTE =====\n")
@@ -0,0 +1,148 @@
+# agendador.py
+"""
+Módulo: agendador
+-----------------
+
+Faixas de execução da API (`api_chat`), para que as respostas de diálogo
+nunca fiquem presas atrás da geração de planos.
+
+Antes, uma resposta barata ("peso", "atividade") dividia os mesmos
+workers com a etapa `orcamento`, que roda Fuzzy + AG; uma rajada de
+pedidos de plano travava todas as conversas. Agora cada tarefa entra em
+uma `Faixa`:
+
+  - "dialogo": pool reservado para as etapas rápidas;
+  - "plano"  : poucos workers (limita quantos AGs rodam ao mesmo tempo e
+               a disputa pelo GIL) e fila LIMITADA. Se a fila estiver
+               cheia, ou o usuário já tiver `limite_por_usuario` planos
+               na faixa, a tarefa é recusada na entrada (`FilaCheia`) e a
+               API responde "estamos com alta demanda" sem gastar CPU.
+
+Como a fila é limitada, o número de requisições HTTP esperando por um
+plano também é (workers + capacidade): dimensione abaixo do nº de threads
+do servidor WSGI.
+
+Métricas por faixa (em `telemetria.REGISTRO`):
+  - nutribot_fila_tarefas_total{faixa, resultado="aceita"|"recusada"}
+  - nutribot_fila_espera_segundos_total{faixa}  (tempo na fila, somado)
+  - nutribot_fila_execucao_segundos_total{faixa}
+  - nutribot_fila_ocupacao{faixa}  (gauge: na fila + executando)
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from .telemetria import REGISTRO
+except ImportError:
+    from telemetria import REGISTRO
+
+
+class FilaCheia(RuntimeError):
+    """A faixa recusou a tarefa (fila cheia ou limite do usuário)."""
+
+    def __init__(self, faixa: str, motivo: str) -> None:
+        super().__init__(f"Faixa {faixa!r} recusou a tarefa: {motivo}")
+        self.faixa = faixa
+        self.motivo = motivo
+
+
+class Faixa:
+    """
+    Pool de threads com controle de admissão.
+
+    capacidade        : máximo de tarefas esperando na fila (além das que
+                        estão executando); None = sem limite
+    limite_por_usuario: máximo de tarefas do mesmo usuário na faixa
+                        (fila + execução); None = sem limite
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        workers: int,
+        capacidade: Optional[int] = None,
+        limite_por_usuario: Optional[int] = None,
+    ) -> None:
+        self.nome = nome
+        self.workers = workers
+        self.capacidade = capacidade
+        self.limite_por_usuario = limite_por_usuario
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"faixa-{nome}")
+        self._lock = threading.Lock()
+        self._ocupacao = 0
+        self._por_usuario: Dict[str, int] = {}
+
+    def submeter(self, user_id: str, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Enfileira `fn(*args)` e devolve o Future. Levanta `FilaCheia` se a
+        tarefa não for admitida.
+        """
+        with self._lock:
+            motivo = None
+            if self.capacidade is not None and self._ocupacao >= self.workers + self.capacidade:
+                motivo = "fila cheia"
+            elif (
+                self.limite_por_usuario is not None
+                and self._por_usuario.get(user_id, 0) >= self.limite_por_usuario
+            ):
+                motivo = "limite por usuário"
+            if motivo is None:
+                self._ocupacao += 1
+                self._por_usuario[user_id] = self._por_usuario.get(user_id, 0) + 1
+                ocupacao = self._ocupacao
+
+        if motivo is not None:
+            REGISTRO.incrementar("nutribot_fila_tarefas_total", faixa=self.nome, resultado="recusada")
+            raise FilaCheia(self.nome, motivo)
+
+        REGISTRO.incrementar("nutribot_fila_tarefas_total", faixa=self.nome, resultado="aceita")
+        REGISTRO.definir("nutribot_fila_ocupacao", ocupacao, faixa=self.nome)
+        enfileirada = time.perf_counter()
+
+        def executar():
+            inicio = time.perf_counter()
+            REGISTRO.incrementar("nutribot_fila_espera_segundos_total", inicio - enfileirada, faixa=self.nome)
+            try:
+                return fn(*args)
+            finally:
+                REGISTRO.incrementar(
+                    "nutribot_fila_execucao_segundos_total", time.perf_counter() - inicio, faixa=self.nome
+                )
+                self._liberar(user_id)
+
+        try:
+            return self._pool.submit(executar)
+        except RuntimeError:
+            # pool encerrado: devolve a vaga antes de propagar
+            self._liberar(user_id)
+            raise
+
+    def _liberar(self, user_id: str) -> None:
+        with self._lock:
+            self._ocupacao -= 1
+            n = self._por_usuario.get(user_id, 0) - 1
+            if n > 0:
+                self._por_usuario[user_id] = n
+            else:
+                self._por_usuario.pop(user_id, None)
+            ocupacao = self._ocupacao
+        REGISTRO.definir("nutribot_fila_ocupacao", ocupacao, faixa=self.nome)
+
+    def executar(self, user_id: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """`submeter` + espera o resultado (para uso dentro de uma requisição)."""
+        return self.submeter(user_id, fn, *args).result()
+
+    def ocupacao(self) -> int:
+        with self._lock:
+            return self._ocupacao
+
+
+REGISTRO.declarar("nutribot_fila_tarefas_total", "counter", "Tarefas por faixa de execução, aceitas ou recusadas.")
+REGISTRO.declarar(
+    "nutribot_fila_espera_segundos_total", "counter", "Tempo acumulado na fila antes de executar, por faixa."
+)
+REGISTRO.declarar("nutribot_fila_execucao_segundos_total", "counter", "Tempo acumulado de execução, por faixa.")
+REGISTRO.declarar("nutribot_fila_ocupacao", "gauge", "Tarefas na faixa (na fila + executando).")
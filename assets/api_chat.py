@@ -9,11 +9,42 @@ respostas processadas pelo ChatState e pelo motor de diálogo.
 
 Fluxo:
 1. Cliente envia JSON contendo "user_id" e "texto" para /mensagem
+   (ou um lote de mensagens para /mensagens)
 2. O estado de conversa desse usuário é recuperado (ou criado se for novo)
 3. A mensagem é processada pelo chatbot_engine
 4. O estado atualizado é salvo em memória
 5. A resposta é devolvida como JSON
 
+Rotas auxiliares:
+- POST /mensagens → lote de mensagens (ponte do WhatsApp), ver `mensagens`
+- POST /cancelar  → interrompe o plano em geração de um usuário (a ponte
+  desistiu da requisição), ver `cancelar`
+- GET /metrics → métricas agregadas do processo (formato texto do Prometheus)
+
+Concorrência:
+- Seguro para servidores WSGI com threads: mensagens do MESMO usuário são
+  serializadas por um lock por usuário (a ordem de chegada define o
+  estado), e usuários diferentes são atendidos em paralelo.
+- Duas faixas de execução (módulo `agendador`): as etapas de diálogo
+  rodam num pool reservado; a mensagem que gera o plano (orçamento) vai
+  para uma fila limitada, com no máximo um plano por usuário. Fila cheia
+  → resposta "estamos com alta demanda" e o estado fica na etapa do
+  orçamento (basta reenviar). Tamanhos via variáveis de ambiente
+  NUTRIBOT_WORKERS_DIALOGO, NUTRIBOT_WORKERS_PLANO e NUTRIBOT_FILA_PLANO.
+- Idempotência por "message_id": o WhatsApp e a ponte reenviam mensagens
+  em timeout. Uma mensagem repetida (mesmo user_id + message_id) não
+  passa de novo por `processar_mensagem`: recebe a resposta guardada
+  (cache LRU limitado, NUTRIBOT_DEDUP_MAX) ou espera a execução que
+  ainda está em andamento. Respostas "alta demanda" não são guardadas.
+- Recarga a quente das tabelas de alimentos (`recarga_tabelas`): um
+  vigia em segundo plano troca a tabela quando o CSV muda, sem reiniciar
+  o processo (e sem perder `estados`). NUTRIBOT_TABELAS (caminhos
+  separados por os.pathsep) e NUTRIBOT_VIGIA_INTERVALO (segundos; 0
+  desliga). O vigia é ligado por `iniciar_vigia()`, não na importação.
+- Cancelamento cooperativo (`cancelamento`): "novo"/"sair" de um usuário
+  com plano em geração cancelam o AG ANTES de esperar o lock do usuário
+  (que o plano segura até terminar); o AG para na geração seguinte.
+
 Observação:
 - O armazenamento de estado é feito em memória e não é persistente.
 - Em produção, recomenda-se substituir por Redis, banco ou session store.
@@ -24,11 +55,61 @@ Observação:
 # Data: 2025-11-19
 # ---------------------------------------------------------------------------
 
-from flask import Flask, request, jsonify
-from chatbot.chatbot_engine import ChatState, processar_mensagem
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, Response, request, jsonify
+from agendador import Faixa, FilaCheia
+from coalescencia import Coalescedor
+from recarga_tabelas import VigiaTabelas
+from chatbot.chatbot_engine import ChatState, gera_plano, interromper_plano, processar_mensagem
+from telemetria import REGISTRO
 
 app = Flask(__name__)
 
+# ---------------------------------------------------------------------------
+# FAIXAS DE EXECUÇÃO
+# ---------------------------------------------------------------------------
+# Diálogo: pool reservado, nunca disputa workers com o AG.
+# Plano: poucos AGs simultâneos, fila limitada e um plano por usuário.
+FAIXA_DIALOGO = Faixa("dialogo", workers=int(os.environ.get("NUTRIBOT_WORKERS_DIALOGO", 16)))
+FAIXA_PLANO = Faixa(
+    "plano",
+    workers=int(os.environ.get("NUTRIBOT_WORKERS_PLANO", 2)),
+    capacidade=int(os.environ.get("NUTRIBOT_FILA_PLANO", 16)),
+    limite_por_usuario=1,
+)
+
+# ---------------------------------------------------------------------------
+# RECARGA DAS TABELAS DE ALIMENTOS
+# ---------------------------------------------------------------------------
+_TABELAS_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "taco_min.csv")
+VIGIA_TABELAS = VigiaTabelas(
+    [c for c in os.environ.get("NUTRIBOT_TABELAS", _TABELAS_PADRAO).split(os.pathsep) if c],
+    intervalo=float(os.environ.get("NUTRIBOT_VIGIA_INTERVALO", 2.0)),
+)
+
+
+def iniciar_vigia() -> None:
+    """
+    Liga o vigia das tabelas (se NUTRIBOT_VIGIA_INTERVALO > 0).
+
+    Não é chamado na importação: benchmarks, workers do `lote` e o
+    processo observador do reloader do Flask importam este módulo e não
+    devem ganhar uma thread de recarga. Chamado pelo `__main__` abaixo;
+    servidores WSGI devem chamá-lo uma vez por processo que atende.
+    """
+    if VIGIA_TABELAS.intervalo > 0:
+        VIGIA_TABELAS.iniciar()
+
+
+MSG_ALTA_DEMANDA = (
+    "Estamos com alta demanda no momento 😥 Não consegui começar o seu plano agora.\n"
+    "Envie o orçamento de novo em alguns instantes que eu tento outra vez."
+)
+
 # ---------------------------------------------------------------------------
 # ARMAZENAMENTO DOS ESTADOS
 # ---------------------------------------------------------------------------
@@ -37,6 +118,100 @@ app = Flask(__name__)
 # Isso funciona bem para testes locais, mas não escala em produção.
 estados = {}
 
+# Um lock por usuário: duas mensagens simultâneas do mesmo usuário leriam
+# o mesmo estado e uma das respostas se perderia. `_estados_lock` protege
+# só a criação dos locks (e o próprio dicionário `estados`).
+_estados_lock = threading.Lock()
+_locks_usuario = {}
+
+
+def _lock_do_usuario(user_id: str) -> threading.Lock:
+    with _estados_lock:
+        lock = _locks_usuario.get(user_id)
+        if lock is None:
+            lock = _locks_usuario[user_id] = threading.Lock()
+        return lock
+
+
+def _estado_atual(user_id: str):
+    with _estados_lock:
+        return estados.get(user_id)
+
+
+def _processar(user_id: str, texto: str) -> str:
+    """Processa uma mensagem do usuário (estado, faixa de execução) e devolve a resposta."""
+    # 'novo'/'sair' não esperam o plano em andamento terminar: cancelam antes
+    atual = _estado_atual(user_id)
+    if atual is not None:
+        interromper_plano(atual, texto)
+
+    with _lock_do_usuario(user_id):
+        # Obtém o estado existente ou inicializa um novo
+        with _estados_lock:
+            state = estados.get(user_id) or ChatState(etapa="inicio", dados={})
+
+        # processar_mensagem devolve (texto_resposta, novo_estado), na
+        # faixa de planos (fila limitada) ou na de diálogo
+        faixa = FAIXA_PLANO if gera_plano(state, texto) else FAIXA_DIALOGO
+        try:
+            resposta, novo_state = faixa.executar(user_id, processar_mensagem, state, texto)
+        except FilaCheia:
+            # recusado na entrada: nada foi processado, o estado continua igual
+            resposta, novo_state = MSG_ALTA_DEMANDA, state
+
+        # Armazena o estado atualizado
+        with _estados_lock:
+            estados[user_id] = novo_state
+    return resposta
+
+
+# ---------------------------------------------------------------------------
+# IDEMPOTÊNCIA (message_id)
+# ---------------------------------------------------------------------------
+# Respostas já enviadas, por (user_id, message_id), em LRU limitado; as
+# mensagens ainda em processamento ficam no Coalescedor (as repetidas
+# esperam por elas). A resposta entra no LRU ANTES de a execução sair do
+# Coalescedor, então não há janela em que uma repetição recalcule.
+DEDUP_MAX = int(os.environ.get("NUTRIBOT_DEDUP_MAX", 4096))
+_respostas_dedup: "OrderedDict[str, str]" = OrderedDict()
+_dedup_lock = threading.Lock()
+_mensagens_em_voo = Coalescedor(copiar=lambda resposta: resposta)  # str: imutável
+
+
+def _processar_idempotente(user_id: str, texto: str, message_id=None) -> str:
+    """`_processar` com deduplicação por message_id (sem id, processa sempre)."""
+    if message_id is None:
+        return _processar(user_id, texto)
+
+    chave = f"{user_id}\x00{message_id}"
+    with _dedup_lock:
+        resposta = _respostas_dedup.get(chave)
+        if resposta is not None:
+            _respostas_dedup.move_to_end(chave)
+    if resposta is not None:
+        REGISTRO.incrementar("nutribot_idempotencia_total", resultado="repetida")
+        return resposta
+
+    def processar_e_guardar() -> str:
+        r = _processar(user_id, texto)
+        if r != MSG_ALTA_DEMANDA:
+            with _dedup_lock:
+                _respostas_dedup[chave] = r
+                while len(_respostas_dedup) > DEDUP_MAX:
+                    _respostas_dedup.popitem(last=False)
+        return r
+
+    resposta, compartilhada = _mensagens_em_voo.executar(chave, processar_e_guardar)
+    REGISTRO.incrementar("nutribot_idempotencia_total", resultado="aguardou" if compartilhada else "nova")
+    return resposta
+
+
+REGISTRO.declarar(
+    "nutribot_idempotencia_total",
+    "counter",
+    "Mensagens com message_id: nova, repetida (resposta guardada) ou aguardou (repetição em andamento).",
+)
+
 
 # ---------------------------------------------------------------------------
 # ROTA PRINCIPAL DO CHATBOT
@@ -47,7 +222,8 @@ def mensagem():
     Entrada:
         {
             "user_id": "usuario123",
-            "texto": "Olá, quero montar uma dieta"
+            "texto": "Olá, quero montar uma dieta",
+            "message_id": "ABC123"          # opcional: torna o reenvio idempotente
         }
 
     Lógica:
@@ -67,17 +243,128 @@ def mensagem():
     user_id = data.get("user_id", "anonimo")
     texto = data.get("texto", "")
 
-    # Obtém o estado existente ou inicializa um novo
-    state = estados.get(user_id, ChatState(etapa="inicio", dados={}))
+    # Retorna somente a resposta (mínimo necessário para o cliente)
+    return jsonify({"resposta": _processar_idempotente(user_id, texto, data.get("message_id"))})
 
-    # processar_mensagem devolve (texto_resposta, novo_estado)
-    resposta, novo_state = processar_mensagem(state, texto)
 
-    # Armazena o estado atualizado
-    estados[user_id] = novo_state
+# ---------------------------------------------------------------------------
+# LOTE DE MENSAGENS (PONTE DO WHATSAPP)
+# ---------------------------------------------------------------------------
+# Cada usuário do lote vira UMA tarefa que processa as mensagens dele em
+# ordem; as tarefas só esperam as faixas de execução (não usam CPU), por
+# isso ficam num pool próprio — nunca nos pools das faixas, o que
+# poderia travar um pool esperando por ele mesmo.
+LOTE_MAX = int(os.environ.get("NUTRIBOT_LOTE_MAX", 256))
+_pool_lotes = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("NUTRIBOT_WORKERS_LOTE", 32)), thread_name_prefix="lote"
+)
 
-    # Retorna somente a resposta (mínimo necessário para o cliente)
-    return jsonify({"resposta": resposta})
+
+def _processar_do_usuario(user_id: str, itens: list) -> list:
+    """Processa as mensagens de um usuário em ordem: [(posição, resposta ou erro)]."""
+    saida = []
+    for pos, texto, message_id in itens:
+        try:
+            saida.append((pos, {"resposta": _processar_idempotente(user_id, texto, message_id)}))
+        except Exception as e:
+            saida.append((pos, {"erro": str(e)}))
+    return saida
+
+
+def _mensagem_valida(m) -> bool:
+    """Item do lote: objeto com user_id/texto/message_id em texto (ou ausentes)."""
+    if not isinstance(m, dict):
+        return False
+    return (
+        isinstance(m.get("user_id", "anonimo"), str)
+        and isinstance(m.get("texto", ""), str)
+        and (m.get("message_id") is None or isinstance(m.get("message_id"), str))
+    )
+
+
+@app.route("/mensagens", methods=["POST"])
+def mensagens():
+    """
+    Lote de mensagens numa única requisição (ponte do WhatsApp sob carga).
+
+    Entrada (lista pura ou dentro de "mensagens"):
+        {
+            "mensagens": [
+                {"user_id": "5511...", "texto": "2", "message_id": "ABC"},
+                {"user_id": "5521...", "texto": "77.7", "message_id": "DEF"},
+                ...
+            ]
+        }
+
+    Usuários diferentes são processados em paralelo; as mensagens do MESMO
+    usuário, na ordem em que aparecem no lote. Um message_id já visto
+    (reenvio) devolve a resposta original sem reprocessar.
+
+    Saída (na ordem da entrada):
+        {
+            "respostas": [
+                {"message_id": "ABC", "user_id": "5511...", "resposta": "..."},
+                {"message_id": "DEF", "user_id": "5521...", "erro": "..."},   # se falhar
+                ...
+            ]
+        }
+    """
+    data = request.get_json(silent=True)
+    lote = data if isinstance(data, list) else (data or {}).get("mensagens")
+    if not isinstance(lote, list) or not all(_mensagem_valida(m) for m in lote):
+        return jsonify({"erro": "Envie uma lista de mensagens {user_id, texto, message_id} (textos)."}), 400
+    if len(lote) > LOTE_MAX:
+        return jsonify({"erro": f"Lote acima do limite de {LOTE_MAX} mensagens."}), 413
+
+    # agrupa por usuário preservando a ordem de cada um
+    por_usuario = {}
+    for pos, m in enumerate(lote):
+        por_usuario.setdefault(m.get("user_id", "anonimo"), []).append((pos, m.get("texto", ""), m.get("message_id")))
+
+    futuros = [_pool_lotes.submit(_processar_do_usuario, uid, itens) for uid, itens in por_usuario.items()]
+    respostas = [None] * len(lote)
+    for f in futuros:
+        for pos, r in f.result():
+            m = lote[pos]
+            respostas[pos] = {"message_id": m.get("message_id"), "user_id": m.get("user_id", "anonimo"), **r}
+
+    return jsonify({"respostas": respostas})
+
+
+# ---------------------------------------------------------------------------
+# CANCELAMENTO (PONTE DESISTIU)
+# ---------------------------------------------------------------------------
+@app.route("/cancelar", methods=["POST"])
+def cancelar():
+    """
+    Interrompe o plano em geração de um usuário, ex.: a ponte do WhatsApp
+    desistiu da requisição por timeout e a resposta não seria entregue.
+
+    Entrada:
+        {"user_id": "5511...", "motivo": "ponte"}   # motivo: "ponte" (padrão), "novo" ou "sair"
+
+    Saída:
+        {"cancelado": true}   # false se não havia plano em geração
+    """
+    data = request.get_json(silent=True) or {}
+    state = _estado_atual(data.get("user_id", "anonimo"))
+    token = state.cancelamento if state is not None else None
+    motivo = data.get("motivo") if data.get("motivo") in ("novo", "sair") else "ponte"
+    cancelado = token is not None and token.cancelar(motivo)
+    return jsonify({"cancelado": cancelado})
+
+
+# ---------------------------------------------------------------------------
+# MÉTRICAS (PROMETHEUS)
+# ---------------------------------------------------------------------------
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Exposição das métricas agregadas do processo (tempos por etapa,
+    avaliações de fitness, gerações, cache, penalidade por restrições)
+    no formato texto do Prometheus.
+    """
+    return Response(REGISTRO.exportar_prometheus(), mimetype="text/plain; version=0.0.4")
 
 
 # ---------------------------------------------------------------------------
@@ -86,4 +373,8 @@ def mensagem():
 if __name__ == "__main__":
     print("API NutriBot rodando em http://localhost:5000")
     # debug=True para recarregar automaticamente durante desenvolvimento
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    debug = True
+    # com o reloader, só o processo filho (WERKZEUG_RUN_MAIN) atende
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        iniciar_vigia()
+    app.run(host="0.0.0.0", port=5000, debug=debug)
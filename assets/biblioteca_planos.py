@@ -0,0 +1,457 @@
+# biblioteca_planos.py
+"""
+Módulo: biblioteca_planos
+-------------------------
+
+Biblioteca de planos pré-calculados, servida por vizinho mais próximo.
+
+O espaço de entradas que importa é pequeno: 3 objetivos × atividade 0–10
+× faixas de colesterol × faixas de peso × 3–7 refeições × conjuntos de
+restrições comuns. A construção (offline) roda o AG uma vez por ponto da
+grade num `ProcessPoolExecutor` e grava tudo num índice compacto
+(`.npz`). Para servir:
+
+1. A partição (n_refeicoes, restrições normalizadas) escolhe as linhas
+   elegíveis; entre elas, o vizinho mais próximo é o de menor distância
+   relativa no vetor de metas (kcal, carb, prot, gord).
+2. As porções do vizinho são reescaladas por um fator global para a kcal
+   exata do usuário (microssegundos).
+3. Se o erro relativo máximo das metas passar de `limiar_erro`, o J
+   passar de (1 + `tolerancia_J`) × o J do vizinho na construção (as
+   penalidades por refeição/variedade também contam) ou o custo passar do
+   orçamento, as porções são recalculadas pelo solver do modo híbrido
+   (`porcoes.resolver_porcoes`, alguns ms).
+4. Só se ainda assim passar do limiar roda um AG curto (`ger_refino`
+   gerações), aquecido com os `k_vizinhos` planos mais próximos.
+
+Layout do `.npz` (versão 1):
+
+    meta        JSON: {"versao", "tabela": {"sha256"}, "params_ag", "grade",
+                       "particoes": [chave, ...], "ids": [id do alimento, ...]}
+    alvos       float32 (N, 4)   metas (kcal, carb, prot, gord) de cada plano
+    J           float32 (N,)     J do plano na construção
+    particao    uint16  (N,)     índice em meta["particoes"]
+    inicio      uint32  (N+1,)   início dos genes de cada plano
+    refeicao    uint8   (G,)     refeição de cada gene
+    alimento    uint16  (G,)     índice em meta["ids"]
+    porcao      uint16  (G,)     gramas
+
+Construção:
+
+    python -m assets.biblioteca_planos assets/data/taco_min.csv --workers 8
+
+gera `assets/data/taco_min.planos.npz`. O core_engine usa a biblioteca com
+`dados["biblioteca"] = True` (caminho padrão) ou um caminho/dicionário.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .fuzzy_module import calcular_macros
+    from .fuzzy_module.calcular_vet import calculo_valor_energetico_total
+    from .genetic_module.genetic_module import (
+        _avalia_cardapio,
+        _carregar_tabela_cacheada,
+        _formatar_refeicoes,
+        _safe_portion,
+        _totais_cardapio,
+        gerar_cardapio,
+    )
+    from .genetic_module.porcoes import resolver_porcoes
+    from .genetic_module.restricoes import normalizar_termos
+    from .genetic_module.tabela_compilada import _sha256_arquivo
+    from .telemetria import telemetria_opcional
+except ImportError:
+    import sys
+
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # pasta assets
+    if BASE_DIR not in sys.path:
+        sys.path.append(BASE_DIR)
+
+    from fuzzy_module import calcular_macros
+    from fuzzy_module.calcular_vet import calculo_valor_energetico_total
+    from genetic_module.genetic_module import (
+        _avalia_cardapio,
+        _carregar_tabela_cacheada,
+        _formatar_refeicoes,
+        _safe_portion,
+        _totais_cardapio,
+        gerar_cardapio,
+    )
+    from genetic_module.porcoes import resolver_porcoes
+    from genetic_module.restricoes import normalizar_termos
+    from genetic_module.tabela_compilada import _sha256_arquivo
+    from telemetria import telemetria_opcional
+
+# 2: banidos casados pelo motor de `restricoes` (sem acento, com sinônimos)
+VERSAO = 2
+SUFIXO = ".planos.npz"
+_METAS = ("kcal", "carb_g", "prot_g", "fat_g")
+
+# colesterol: representantes das faixas <175, 175–205, 205–235, >235 mg/dL
+GRADE_PADRAO = {
+    "objetivo": (0, 1, 2),
+    "atividade": tuple(range(11)),
+    "colesterol": (160, 190, 220, 250),
+    "peso": tuple(range(50, 125, 10)),
+    "n_refeicoes": (3, 4, 5, 6, 7),
+    "restricoes": ((), ("lactose",), ("gluten",), ("lactose", "gluten")),
+}
+
+# mesmos parâmetros do AG usados pelo chatbot
+PARAMS_AG_BIBLIOTECA = {"pop": 120, "ger": 200, "elit": 6, "seed": 42}
+
+
+def caminho_biblioteca(caminho_csv: str) -> str:
+    """`x.csv` → `x.planos.npz` (biblioteca padrão da tabela)."""
+    return os.path.splitext(caminho_csv)[0] + SUFIXO
+
+
+def chave_particao(n_refeicoes: int, restricoes: Dict) -> str:
+    """Partição canônica: nº de refeições + banidos normalizados (sem acento, minúsculos, ordenados)."""
+    banidos = sorted(normalizar_termos((restricoes or {}).get("banidos", [])))
+    return json.dumps([int(n_refeicoes), banidos], ensure_ascii=False)
+
+
+def alvos_do_perfil(objetivo: int, atividade: int, colesterol: int, peso: float) -> Dict[str, float]:
+    """Metas (Fuzzy + VET) de um perfil — as mesmas do core_engine."""
+    carb_g, prot_g, fat_g = calcular_macros(objetivo, atividade, colesterol, peso, debug=False)
+    return {
+        "kcal": calculo_valor_energetico_total(objetivo, peso),
+        "carb_g": carb_g,
+        "prot_g": prot_g,
+        "fat_g": fat_g,
+    }
+
+
+def _vetor(targets: Dict[str, float]) -> np.ndarray:
+    return np.array([float(targets[k]) for k in _METAS])
+
+
+# ============================================================
+#                        Construção
+# ============================================================
+def _tarefas(grade: Dict) -> Tuple[List[Tuple[str, Tuple[float, ...]]], int]:
+    """
+    (partição, metas) únicas da grade. Perfis diferentes que levam às
+    mesmas metas viram um único plano. Devolve também quantos perfis
+    foram descartados porque o Fuzzy não produziu saída.
+    """
+    metas = set()
+    sem_saida = 0
+    for o, a, c, p in product(grade["objetivo"], grade["atividade"], grade["colesterol"], grade["peso"]):
+        try:
+            t = alvos_do_perfil(o, a, c, p)
+        except KeyError:
+            # combinação sem regra ativa no sistema fuzzy
+            sem_saida += 1
+            continue
+        metas.add(tuple(round(float(t[k]), 1) for k in _METAS))
+
+    particoes = [chave_particao(n, {"banidos": list(r)}) for n in grade["n_refeicoes"] for r in grade["restricoes"]]
+    return [(part, m) for part in particoes for m in sorted(metas)], sem_saida
+
+
+def _gerar_entrada(tarefa: Tuple[str, Tuple[float, ...], str, Dict]):
+    """Worker: roda o AG para um ponto e devolve o plano como (id, gramas)."""
+    particao, metas, tabela_csv, params_ag = tarefa
+    n_refeicoes, banidos = json.loads(particao)
+    params = {
+        "n_refeicoes": n_refeicoes,
+        "restricoes": {"banidos": banidos},
+        "orcamento_max": 9999.0,
+        "tabela_csv": tabela_csv,
+        **params_ag,
+    }
+    sol = gerar_cardapio(dict(zip(_METAS, metas)), params)
+    plano = [[(b["id"], b["porcao_g"]) for b in ref] for ref in sol["refeicoes"]]
+    return particao, metas, sol["fitness"]["J"], plano
+
+
+def construir_biblioteca(
+    tabela_csv: str,
+    destino: Optional[str] = None,
+    grade: Optional[Dict] = None,
+    params_ag: Optional[Dict] = None,
+    workers: Optional[int] = None,
+) -> Dict:
+    """
+    Pré-calcula os planos da grade em paralelo (processos) e grava o
+    índice em `destino` (padrão: `caminho_biblioteca(tabela_csv)`).
+    Retorna um resumo {"destino", "planos", "perfis_sem_saida"}.
+    """
+    tabela_csv = os.path.abspath(tabela_csv)
+    destino = destino or caminho_biblioteca(tabela_csv)
+    grade = {**GRADE_PADRAO, **(grade or {})}
+    params_ag = {**PARAMS_AG_BIBLIOTECA, **(params_ag or {})}
+
+    tarefas, sem_saida = _tarefas(grade)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        entradas = list(
+            ex.map(_gerar_entrada, [(p, m, tabela_csv, params_ag) for p, m in tarefas], chunksize=4)
+        )
+
+    particoes = sorted({p for p, _, _, _ in entradas})
+    num_particao = {p: i for i, p in enumerate(particoes)}
+    ids = sorted({i for _, _, _, plano in entradas for ref in plano for i, _ in ref})
+    num_id = {i: k for k, i in enumerate(ids)}
+
+    inicio = [0]
+    refeicao, alimento, porcao = [], [], []
+    for _, _, _, plano in entradas:
+        for m, ref in enumerate(plano):
+            for i, por in ref:
+                refeicao.append(m)
+                alimento.append(num_id[i])
+                porcao.append(por)
+        inicio.append(len(alimento))
+
+    meta = {
+        "versao": VERSAO,
+        "tabela": {"sha256": _sha256_arquivo(tabela_csv)},
+        "params_ag": params_ag,
+        "grade": {k: [list(v) if isinstance(v, tuple) else v for v in vs] for k, vs in grade.items()},
+        "particoes": particoes,
+        "ids": ids,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+    with open(destino, "wb") as f:
+        np.savez_compressed(
+            f,
+            meta=np.array(json.dumps(meta, ensure_ascii=False)),
+            alvos=np.array([m for _, m, _, _ in entradas], dtype=np.float32).reshape(-1, len(_METAS)),
+            J=np.array([J for _, _, J, _ in entradas], dtype=np.float32),
+            particao=np.array([num_particao[p] for p, _, _, _ in entradas], dtype=np.uint16),
+            inicio=np.array(inicio, dtype=np.uint32),
+            refeicao=np.array(refeicao, dtype=np.uint8),
+            alimento=np.array(alimento, dtype=np.uint16),
+            porcao=np.array(porcao, dtype=np.uint16),
+        )
+    return {"destino": destino, "planos": len(entradas), "perfis_sem_saida": sem_saida}
+
+
+# ============================================================
+#                          Consulta
+# ============================================================
+class BibliotecaPlanos:
+    """Índice carregado em memória (somente leitura; pode ser compartilhado entre threads)."""
+
+    def __init__(self, caminho: str) -> None:
+        with np.load(caminho) as z:
+            self.meta = json.loads(str(z["meta"]))
+            if self.meta.get("versao") != VERSAO:
+                raise ValueError(f"Versão de biblioteca não suportada: {self.meta.get('versao')!r}")
+            self.alvos = z["alvos"].astype(float)
+            self.J = z["J"].astype(float)
+            particao = z["particao"]
+            self._inicio = z["inicio"]
+            self._refeicao = z["refeicao"]
+            self._alimento = z["alimento"]
+            self._porcao = z["porcao"]
+        self.ids: List[str] = self.meta["ids"]
+        self._linhas = {p: np.flatnonzero(particao == i) for i, p in enumerate(self.meta["particoes"])}
+        self._tabelas_ok: Dict[Tuple[str, int, int], bool] = {}
+
+    def __len__(self) -> int:
+        return len(self.alvos)
+
+    def compativel_com(self, tabela_csv: str) -> bool:
+        """True se a biblioteca foi construída com este conteúdo de tabela (SHA-256, memorizado por mtime)."""
+        st = os.stat(tabela_csv)
+        chave = (os.path.abspath(tabela_csv), st.st_mtime_ns, st.st_size)
+        ok = self._tabelas_ok.get(chave)
+        if ok is None:
+            ok = self._tabelas_ok[chave] = _sha256_arquivo(tabela_csv) == self.meta["tabela"]["sha256"]
+        return ok
+
+    def vizinhos(
+        self, targets: Dict[str, float], n_refeicoes: int, restricoes: Dict, k: int = 1
+    ) -> List[Tuple[float, float, List[List[Tuple[str, int]]]]]:
+        """
+        Os `k` planos mais próximos na partição, como (distância, J na
+        construção, plano).
+        Distância = norma L2 do erro relativo das metas. Vazio se a
+        partição não existir na biblioteca.
+        """
+        linhas = self._linhas.get(chave_particao(n_refeicoes, restricoes))
+        if linhas is None or not len(linhas):
+            return []
+        T = _vetor(targets)
+        d = np.sqrt((((self.alvos[linhas] - T) / T) ** 2).sum(axis=1))
+        melhores = np.argsort(d, kind="stable")[:k]
+        return [(float(d[j]), float(self.J[linhas[j]]), self._plano(int(linhas[j]))) for j in melhores]
+
+    def _plano(self, linha: int) -> List[List[Tuple[str, int]]]:
+        a, b = int(self._inicio[linha]), int(self._inicio[linha + 1])
+        plano: List[List[Tuple[str, int]]] = []
+        for m, i, por in zip(self._refeicao[a:b].tolist(), self._alimento[a:b].tolist(), self._porcao[a:b].tolist()):
+            while len(plano) <= m:
+                plano.append([])
+            plano[m].append((self.ids[i], por))
+        return plano
+
+
+# Bibliotecas abertas: caminho absoluto -> ((mtime_ns, tamanho), biblioteca)
+_CACHE_BIBLIOTECAS: Dict[str, Tuple[Tuple[int, int], BibliotecaPlanos]] = {}
+_cache_bibliotecas_lock = threading.Lock()
+
+
+def abrir_biblioteca(caminho: str) -> Optional[BibliotecaPlanos]:
+    """Biblioteca em cache (recarrega se o arquivo mudar); None se não existir ou for inválida."""
+    chave = os.path.abspath(caminho)
+    try:
+        st = os.stat(chave)
+    except OSError:
+        return None
+    assinatura = (st.st_mtime_ns, st.st_size)
+
+    entrada = _CACHE_BIBLIOTECAS.get(chave)
+    if entrada is not None and entrada[0] == assinatura:
+        return entrada[1]
+    with _cache_bibliotecas_lock:
+        entrada = _CACHE_BIBLIOTECAS.get(chave)
+        if entrada is not None and entrada[0] == assinatura:
+            return entrada[1]
+        try:
+            bib = BibliotecaPlanos(chave)
+        except (OSError, ValueError, KeyError):
+            return None
+        _CACHE_BIBLIOTECAS[chave] = (assinatura, bib)
+    return bib
+
+
+def _erro_relativo(aval: Tuple, targets: Dict[str, float]) -> float:
+    """Maior erro relativo entre as metas (kcal, carb, prot, gord)."""
+    _J, kcal, carb, prot, gord, _custo = aval
+    return float(np.max(np.abs(np.array([kcal, carb, prot, gord]) - _vetor(targets)) / _vetor(targets)))
+
+
+def servir_da_biblioteca(
+    targets: Dict[str, float],
+    params: Dict,
+    config: Dict,
+    telemetria=None,
+    cancelamento=None,
+) -> Optional[Dict]:
+    """
+    Plano para `targets` a partir da biblioteca, no formato de
+    `gerar_cardapio` (+ "biblioteca": {"distancia", "erro", "etapa"}), ou
+    None se não houver biblioteca compatível / partição para o pedido.
+
+    config: {"caminho": str (padrão: ao lado da tabela), "limiar_erro": 0.10,
+             "tolerancia_J": 0.25, "k_vizinhos": 5, "ger_refino": 40}
+    cancelamento: repassado ao AG curto de refino (`gerar_cardapio`).
+    """
+    tele = telemetria_opcional(telemetria)
+    tabela_csv = params["tabela_csv"]
+    bib = abrir_biblioteca(config.get("caminho") or caminho_biblioteca(tabela_csv))
+    if bib is None or not bib.compativel_com(tabela_csv):
+        tele.contar("biblioteca_indisponivel")
+        return None
+
+    limiar = float(config.get("limiar_erro", 0.10))
+    tolerancia_J = float(config.get("tolerancia_J", 0.25))
+    orcamento = float(params.get("orcamento_max", float("inf")))
+
+    with tele.etapa("biblioteca"):
+        itens, indice = _carregar_tabela_cacheada(tabela_csv, tele)
+        itens_idx = indice.itens_idx
+        pos_por_id = {itens[i].id: p for p, i in enumerate(itens_idx)}
+
+        viz = bib.vizinhos(targets, int(params.get("n_refeicoes", 5)), params.get("restricoes", {}),
+                           k=int(config.get("k_vizinhos", 5)))
+        try:
+            genomas = [[[(pos_por_id[i], por) for i, por in ref] for ref in plano] for _, _, plano in viz]
+        except KeyError:
+            genomas = []
+        if not genomas:
+            tele.contar("biblioteca_misses")
+            return None
+        tele.contar("biblioteca_hits")
+
+        detalhe: Dict[str, float] = {}
+
+        def avaliar(ind):
+            return _avalia_cardapio(ind, itens_idx, itens, targets, params, detalhe)
+
+        J_max = viz[0][1] * (1 + tolerancia_J)
+
+        def aceitavel(aval) -> bool:
+            return _erro_relativo(aval, targets) <= limiar and aval[0] <= J_max and aval[5] <= orcamento
+
+        # 1) fator global para a kcal exata
+        ind = genomas[0]
+        kcal = _totais_cardapio(ind, itens_idx, itens)[0]
+        fator = float(targets["kcal"]) / kcal if kcal > 0 else 1.0
+        ind = [[(p, _safe_portion(itens[itens_idx[p]], int(round(por * fator)))) for p, por in ref] for ref in ind]
+        aval = avaliar(ind)
+        etapa = "escala"
+
+        # 2) solver de porções mantendo os alimentos do vizinho
+        if not aceitavel(aval):
+            resolver_porcoes([ind], indice, targets, params)
+            aval = avaliar(ind)
+            etapa = "solver"
+
+    # 3) AG curto aquecido com os vizinhos
+    if not aceitavel(aval):
+        tele.contar("biblioteca_refinos")
+        sol = gerar_cardapio(
+            targets,
+            {**params, "ger": int(config.get("ger_refino", 40))},
+            tele,
+            populacao_inicial=genomas,
+            cancelamento=cancelamento,
+        )
+        J, kcal, carb, prot, gord, custo = (sol["fitness"][k] for k in ("J", "kcal", "carb_g", "prot_g", "fat_g", "custo"))
+        sol["biblioteca"] = {
+            "distancia": viz[0][0],
+            "erro": _erro_relativo((J, kcal, carb, prot, gord, custo), targets),
+            "etapa": "ag",
+        }
+        return sol
+
+    for chave, valor in detalhe.items():
+        tele.contar(chave, valor)
+    J, kcal, carb, prot, gord, custo = aval
+    return {
+        "fitness": {"J": J, "kcal": kcal, "carb_g": carb, "prot_g": prot, "fat_g": gord, "custo": custo},
+        "refeicoes": _formatar_refeicoes(ind, itens, itens_idx),
+        "historico": [],
+        "tabela_versao": indice.versao,
+        "biblioteca": {"distancia": viz[0][0], "erro": _erro_relativo(aval, targets), "etapa": etapa},
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    ap = argparse.ArgumentParser(description="Pré-calcula a biblioteca de planos de uma tabela de alimentos")
+    ap.add_argument("csv", help="arquivo CSV de alimentos")
+    ap.add_argument("--destino", help="arquivo .npz de saída (padrão: <csv>.planos.npz)")
+    ap.add_argument("--workers", type=int, default=None, help="processos (padrão: nº de CPUs)")
+    ap.add_argument("--ger", type=int, default=PARAMS_AG_BIBLIOTECA["ger"], help="gerações do AG por plano")
+    ap.add_argument("--pop", type=int, default=PARAMS_AG_BIBLIOTECA["pop"], help="população do AG")
+    ap.add_argument("--rapido", action="store_true", help="grade reduzida (smoke test)")
+    args = ap.parse_args()
+
+    grade = None
+    if args.rapido:
+        grade = {"atividade": (2, 5, 8), "colesterol": (190,), "peso": (60, 80, 100), "n_refeicoes": (5,),
+                 "restricoes": ((), ("lactose",))}
+    t0 = time.perf_counter()
+    resumo = construir_biblioteca(
+        args.csv, args.destino, grade=grade, params_ag={"pop": args.pop, "ger": args.ger}, workers=args.workers
+    )
+    print(
+        f"{args.csv} -> {resumo['destino']} ({resumo['planos']} planos, "
+        f"{resumo['perfis_sem_saida']} perfis sem saída fuzzy, {time.perf_counter() - t0:.1f} s)"
+    )
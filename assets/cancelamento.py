@@ -0,0 +1,139 @@
+# cancelamento.py
+"""
+Módulo: cancelamento
+--------------------
+
+Cancelamento cooperativo da geração de planos.
+
+Antes, se o usuário digitava "novo" ou "sair" enquanto o plano dele era
+gerado (ou a ponte do WhatsApp desistia da requisição), o AG seguia até a
+última das `ger` gerações e o resultado ia para o lixo — com a faixa de
+planos ocupada e outros usuários na fila.
+
+Um `Cancelamento` é passado por `gerar_plano_para_usuario` até
+`gerar_cardapio`, que confere o token entre gerações (e, no motor
+steady-state, a cada `pop` avaliações). Cancelado, o AG para na próxima
+conferência e levanta `Cancelado`; nada é devolvido nem guardado em
+cache. Nenhuma thread é interrompida à força: o custo é uma leitura de
+`Event` por geração.
+
+Em pools de processos (`lote`), o token é um `multiprocessing.Event`
+entregue a cada worker na criação do pool (`inicializar_worker`); o
+processo principal cancela todos os planos em andamento com um `set()`.
+
+Métricas (em `telemetria.REGISTRO`):
+  - nutribot_cancelamentos_total{motivo}           pedidos que acharam um plano em andamento
+  - nutribot_planos_cancelados_total{motivo}       execuções que de fato pararam
+  - nutribot_cancelamento_geracoes_evitadas_total  gerações que não chegaram a rodar
+  - nutribot_cancelamento_segundos_gastos_total    tempo gasto nas execuções canceladas
+  - nutribot_cancelamento_latencia_segundos_total  do pedido até a execução parar
+"""
+
+import signal
+import threading
+import time
+from typing import Optional
+
+try:
+    from .telemetria import REGISTRO
+except ImportError:
+    from telemetria import REGISTRO
+
+
+class Cancelado(RuntimeError):
+    """A geração do plano foi cancelada (`Cancelamento.verificar`)."""
+
+    def __init__(self, motivo: str, geracao: Optional[int] = None, ger: Optional[int] = None) -> None:
+        super().__init__(f"Geração do plano cancelada: {motivo}")
+        self.motivo = motivo
+        self.geracao = geracao
+        self.ger = ger
+
+    @property
+    def geracoes_evitadas(self) -> int:
+        if self.geracao is None or self.ger is None:
+            return 0
+        return max(0, self.ger - self.geracao)
+
+
+class Cancelamento:
+    """
+    Token de cancelamento de um plano (ou de um pool de planos).
+
+    evento: objeto com `set()`/`is_set()`; padrão `threading.Event()`.
+            Use um `multiprocessing.Event` para cancelar em outros processos.
+    """
+
+    def __init__(self, evento=None) -> None:
+        self._evento = evento if evento is not None else threading.Event()
+        self.motivo = "cancelado"
+        self.instante: Optional[float] = None
+
+    @property
+    def cancelado(self) -> bool:
+        return self._evento.is_set()
+
+    def cancelar(self, motivo: str = "cancelado") -> bool:
+        """Marca o token. Retorna False se ele já estava cancelado."""
+        if self._evento.is_set():
+            return False
+        self.motivo = motivo
+        self.instante = time.perf_counter()
+        self._evento.set()
+        REGISTRO.incrementar("nutribot_cancelamentos_total", motivo=motivo)
+        return True
+
+    def verificar(self, geracao: Optional[int] = None, ger: Optional[int] = None) -> None:
+        """Levanta `Cancelado` se o token foi cancelado (geracao/ger: onde o AG parou)."""
+        if self._evento.is_set():
+            raise Cancelado(self.motivo, geracao, ger)
+
+
+def registrar_cancelado(erro: Cancelado, cancelamento: Optional[Cancelamento], gasto_s: float) -> None:
+    """Soma uma execução interrompida às métricas do processo."""
+    REGISTRO.incrementar("nutribot_planos_cancelados_total", motivo=erro.motivo)
+    REGISTRO.incrementar("nutribot_cancelamento_geracoes_evitadas_total", erro.geracoes_evitadas)
+    REGISTRO.incrementar("nutribot_cancelamento_segundos_gastos_total", gasto_s)
+    if cancelamento is not None and cancelamento.instante is not None:
+        REGISTRO.incrementar(
+            "nutribot_cancelamento_latencia_segundos_total", max(0.0, time.perf_counter() - cancelamento.instante)
+        )
+
+
+# ------------------------------
+# Workers de pools de processos
+# ------------------------------
+_DO_PROCESSO: Optional[Cancelamento] = None
+
+
+def inicializar_worker(evento) -> None:
+    """
+    `initializer` de `ProcessPoolExecutor`: guarda o token compartilhado
+    do pool e deixa o Ctrl-C para o processo principal (que cancela pelo
+    token em vez de derrubar o pool).
+    """
+    global _DO_PROCESSO
+    _DO_PROCESSO = Cancelamento(evento)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def cancelamento_do_processo() -> Optional[Cancelamento]:
+    """Token do pool ao qual este worker pertence (None fora de um pool)."""
+    return _DO_PROCESSO
+
+
+REGISTRO.declarar(
+    "nutribot_cancelamentos_total", "counter", "Pedidos de cancelamento de um plano em andamento, por motivo."
+)
+REGISTRO.declarar(
+    "nutribot_planos_cancelados_total", "counter", "Gerações de plano interrompidas por cancelamento, por motivo."
+)
+REGISTRO.declarar(
+    "nutribot_cancelamento_geracoes_evitadas_total", "counter", "Gerações do AG que deixaram de rodar por cancelamento."
+)
+REGISTRO.declarar(
+    "nutribot_cancelamento_segundos_gastos_total", "counter", "Tempo gasto em execuções que acabaram canceladas."
+)
+REGISTRO.declarar(
+    "nutribot_cancelamento_latencia_segundos_total", "counter", "Tempo do pedido de cancelamento até a execução parar."
+)
@@ -8,13 +8,18 @@
  *
  * Fluxo:
  *  - O bot recebe mensagens no WhatsApp
- *  - Repassa o texto para a API Flask em /mensagem
- *  - Devolve a resposta do chatbot para o usuário
+ *  - Agrupa as mensagens que chegam numa janela curta (LOTE_JANELA_MS) e
+ *    repassa o lote para a API Flask em /mensagens (uma requisição HTTP
+ *    para várias mensagens, útil sob carga de muitos chats)
+ *  - Devolve a resposta do chatbot para cada usuário
+ *  - 'novo'/'sair' de um usuário com lote em voo (ex.: plano sendo gerado)
+ *    e lotes que passam de API_TIMEOUT_MS cancelam o plano em /cancelar,
+ *    para o AG não seguir rodando à toa
  *
  * Requisitos:
  *  - Node.js + npm
  *  - Dependências: whatsapp-web.js, qrcode-terminal, axios
- *  - API Flask do NutriBot rodando (por padrão em http://localhost:5000/mensagem)
+ *  - API Flask do NutriBot rodando (por padrão em http://localhost:5000/mensagens)
  *
  * Observação:
  *  - A sessão do WhatsApp fica salva localmente via LocalAuth
@@ -28,9 +33,21 @@ const { Client, LocalAuth } = require('whatsapp-web.js');
 const qrcode = require('qrcode-terminal');
 const axios = require('axios');
 
-// URL da API Flask que expõe a rota /mensagem
+// URL da API Flask que expõe a rota de lote /mensagens
 // Ajuste se a API estiver em outro host/porta.
-const API_URL = 'http://localhost:5000/mensagem';
+const API_URL = 'http://localhost:5000/mensagens';
+const API_CANCELAR_URL = 'http://localhost:5000/cancelar';
+
+// Espera máxima por um lote; depois disso a ponte desiste e cancela os planos dele
+const API_TIMEOUT_MS = 120000;
+
+// Comandos globais do chatbot (ver COMANDOS_SAIR / COMANDOS_NOVO no chatbot_engine)
+const COMANDOS_SAIR = new Set(['sair', 'exit', 'quit']);
+const COMANDOS_NOVO = new Set(['novo', 'recomecar', 'recomeçar', 'reset']);
+
+// Janela de agrupamento e tamanho máximo de cada lote
+const LOTE_JANELA_MS = 50;
+const LOTE_MAX = 100;
 
 /**
  * Log helper com prefixo padrão do bot.
@@ -39,6 +56,95 @@ function log(msg) {
     console.log('[BOT]', msg);
 }
 
+// ============================================================================
+//  Lote de mensagens para a API
+// ============================================================================
+
+// Mensagens esperando o próximo lote: { user_id, texto, message_id, resolve, reject }
+let pendentes = [];
+let timerLote = null;
+// Usuários com mensagem num lote ainda sem resposta: a próxima mensagem
+// deles espera esse lote voltar, para manter a ordem por usuário.
+const usuariosEmVoo = new Set();
+
+/**
+ * Pede à API que interrompa o plano em geração do usuário (sem esperar).
+ */
+function cancelarPlano(userId, motivo) {
+    axios
+        .post(API_CANCELAR_URL, { user_id: userId, motivo }, { timeout: 5000 })
+        .catch((err) => log(`Falha ao cancelar o plano de ${userId}: ${err.message}`));
+}
+
+/**
+ * Enfileira uma mensagem para a API e devolve uma Promise com a resposta
+ * do chatbot (texto).
+ */
+function enviarParaApi(userId, texto, messageId) {
+    // a mensagem só sai quando o lote em voo do usuário voltar; se for
+    // 'novo'/'sair', o plano que ele está esperando é cancelado já
+    if (usuariosEmVoo.has(userId)) {
+        const cmd = String(texto).trim().toLowerCase();
+        if (COMANDOS_SAIR.has(cmd)) cancelarPlano(userId, 'sair');
+        else if (COMANDOS_NOVO.has(cmd)) cancelarPlano(userId, 'novo');
+    }
+    return new Promise((resolve, reject) => {
+        pendentes.push({ user_id: userId, texto, message_id: messageId, resolve, reject });
+        agendarLote();
+    });
+}
+
+function agendarLote() {
+    if (pendentes.length >= LOTE_MAX) {
+        descarregarLote();
+    } else if (!timerLote && pendentes.length) {
+        timerLote = setTimeout(descarregarLote, LOTE_JANELA_MS);
+    }
+}
+
+async function descarregarLote() {
+    clearTimeout(timerLote);
+    timerLote = null;
+
+    // no máximo LOTE_MAX mensagens; usuários com lote em voo ficam para depois
+    const lote = [];
+    const restantes = [];
+    const noLote = new Set();
+    for (const m of pendentes) {
+        const livre = !usuariosEmVoo.has(m.user_id) || noLote.has(m.user_id);
+        if (livre && lote.length < LOTE_MAX) {
+            lote.push(m);
+            noLote.add(m.user_id);
+        } else {
+            restantes.push(m);
+        }
+    }
+    pendentes = restantes;
+    if (!lote.length) return;
+
+    noLote.forEach((u) => usuariosEmVoo.add(u));
+    try {
+        const resp = await axios.post(
+            API_URL,
+            { mensagens: lote.map(({ user_id, texto, message_id }) => ({ user_id, texto, message_id })) },
+            { timeout: API_TIMEOUT_MS }
+        );
+        const respostas = resp.data?.respostas || [];
+        lote.forEach((m, i) => {
+            const r = respostas[i];
+            if (r && r.resposta !== undefined) m.resolve(r.resposta);
+            else m.reject(new Error(r?.erro || 'resposta ausente no lote'));
+        });
+    } catch (err) {
+        // a ponte desistiu: a resposta não será entregue, o plano pode parar
+        if (err.code === 'ECONNABORTED') noLote.forEach((u) => cancelarPlano(u, 'ponte'));
+        lote.forEach((m) => m.reject(err));
+    } finally {
+        noLote.forEach((u) => usuariosEmVoo.delete(u));
+        agendarLote();
+    }
+}
+
 // ============================================================================
 //  Configuração do cliente WhatsApp
 // ============================================================================
@@ -133,19 +239,15 @@ client.on('message', async (msg) => {
     if (texto.toLowerCase() === 'plano') {
         // Envia a mensagem "novo" para a API, o que faz o chatbot reiniciar o fluxo
         try {
-            const resp = await axios.post(API_URL, {
-                user_id: from, // usamos o número do WhatsApp como identificador de usuário
-                texto: 'novo',
-            });
-
+            // usamos o número do WhatsApp como identificador de usuário
             const respostaBot =
-                resp.data?.resposta ||
+                (await enviarParaApi(from, 'novo', msg.id?._serialized)) ||
                 'Erro inesperado ao iniciar o plano. Tente novamente.';
 
             await client.sendMessage(from, respostaBot);
             log(`Fluxo iniciado para ${from}`);
         } catch (err) {
-            console.error('Erro ao chamar API /mensagem (novo):', err.message);
+            console.error('Erro ao chamar API /mensagens (novo):', err.message);
             await client.sendMessage(
                 from,
                 'Tive um erro técnico ao iniciar seu plano 😥\nTente novamente em alguns instantes.'
@@ -158,18 +260,15 @@ client.on('message', async (msg) => {
     // Qualquer outra mensagem é repassada para o chatbot Python (API Flask)
     // ------------------------------------------------------------------------
     try {
-        const resp = await axios.post(API_URL, {
-            user_id: from, // mantém o estado por usuário no backend
-            texto: texto,
-        });
-
+        // o user_id mantém o estado por usuário no backend
         const respostaBot =
-            resp.data?.resposta || 'Erro inesperado ao processar sua mensagem.';
+            (await enviarParaApi(from, texto, msg.id?._serialized)) ||
+            'Erro inesperado ao processar sua mensagem.';
 
         await client.sendMessage(from, respostaBot);
         log(`Mensagem processada para ${from}`);
     } catch (err) {
-        console.error('Erro ao chamar API /mensagem:', err.message);
+        console.error('Erro ao chamar API /mensagens:', err.message);
         await client.sendMessage(
             from,
             'Ops, tive um problema técnico ao falar com o NutriBot 😥\n' +
@@ -28,6 +28,7 @@ from typing import Dict, Optional, Tuple, Any, List
 import json
 import os
 import sys
+import threading
 
 from openai import OpenAI
 
@@ -38,6 +39,7 @@ from openai import OpenAI
 # Tentativa 1: import relativo (quando o projeto é usado como pacote,
 # ex.: `python -m assets.chatbot.api_chat`)
 try:
+    from ..cancelamento import Cancelado, Cancelamento
     from ..core_engine import gerar_plano_para_usuario
 except ImportError:
     # Tentativa 2: ajustar sys.path para rodar em modo "script solto"
@@ -45,6 +47,7 @@ except ImportError:
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     if BASE_DIR not in sys.path:
         sys.path.append(BASE_DIR)
+    from cancelamento import Cancelado, Cancelamento
     from core_engine import gerar_plano_para_usuario
 
 print(">>> chatbot_engine carregado de:", __file__)
@@ -59,13 +62,33 @@ class ChatState:
     Representa o estado de uma conversa com um usuário.
 
     Atributos:
-        etapa   : em qual passo do fluxo estamos (inicio, objetivo, peso, ...)
-        dados   : dicionário com os dados já coletados
-        terminou: flag indicando se a conversa foi encerrada
+        etapa       : em qual passo do fluxo estamos (inicio, objetivo, peso, ...)
+        dados       : dicionário com os dados já coletados
+        terminou    : flag indicando se a conversa foi encerrada
+        cancelamento: token do plano em geração (só durante a etapa "gerando")
+        plano_interrompido: o último plano foi cancelado pela ponte (timeout)
+                            e a resposta não chegou ao usuário
     """
     etapa: str = "inicio"
     dados: Dict[str, Any] = field(default_factory=dict)
     terminou: bool = False
+    cancelamento: Optional[Cancelamento] = field(default=None, repr=False, compare=False)
+    plano_interrompido: bool = False
+
+
+# Parâmetros do AG usados nos planos gerados pela conversa. Ajustável pelo
+# processo que serve o bot (ex.: planos mais leves em testes de carga).
+PARAMS_AG_CHAT: Dict[str, Any] = {
+    "pop": 120,
+    "ger": 200,
+    "elit": 6,
+    "seed": 42,
+}
+
+
+# Comandos globais (valem em qualquer etapa)
+COMANDOS_SAIR = ("sair", "exit", "quit")
+COMANDOS_NOVO = ("novo", "recomecar", "recomeçar", "reset")
 
 
 # =======================================
@@ -83,6 +106,13 @@ MSG_BOAS_VINDAS = (
     "Digite 0, 1 ou 2:"
 )
 
+MSG_PLANO_CANCELADO = "Ok, parei de gerar o plano anterior."
+
+MSG_PLANO_NAO_CONCLUIDO = (
+    "Não consegui terminar o seu plano a tempo 😥\n"
+    "Envie o orçamento de novo (ex.: 25.0) que eu tento outra vez."
+)
+
 
 # =======================================
 #  Funções de parsing / utilitários
@@ -201,6 +231,7 @@ def _cardapio_em_json(cardapio) -> str:
 #  Integração com OpenAI (ChatGPT)
 # =======================================
 _openai_client: Optional[OpenAI] = None
+_openai_client_lock = threading.Lock()
 
 
 def _get_client() -> OpenAI:
@@ -208,14 +239,20 @@ def _get_client() -> OpenAI:
     Cria (ou reutiliza) um cliente da OpenAI usando a variável
     de ambiente OPENAI_API_KEY.
 
+    Thread-safe: com o servidor em threads, só um cliente é criado
+    (verificação dupla com lock). O cliente da OpenAI pode ser
+    compartilhado entre threads.
+
     Lança RuntimeError se a variável não estiver definida.
     """
     global _openai_client
     if _openai_client is None:
-        api_key = os.environ.get("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY não definida nas variáveis de ambiente.")
-        _openai_client = OpenAI(api_key=api_key)
+        with _openai_client_lock:
+            if _openai_client is None:
+                api_key = os.environ.get("OPENAI_API_KEY")
+                if not api_key:
+                    raise RuntimeError("OPENAI_API_KEY não definida nas variáveis de ambiente.")
+                _openai_client = OpenAI(api_key=api_key)
     return _openai_client
 
 
@@ -332,6 +369,39 @@ def _formatar_plano_com_ia(resultado: Dict) -> str:
 # =======================================
 #  Função principal do chatbot
 # =======================================
+def gera_plano(state: ChatState, mensagem: str) -> bool:
+    """
+    True se `mensagem` vai disparar a geração do plano (Fuzzy + AG):
+    etapa `orcamento` com um valor válido. Usado pela API para mandar a
+    mensagem para a faixa de execução de planos (ver `agendador`).
+    """
+    msg = mensagem.strip()
+    if state.etapa != "orcamento" or msg.lower() in COMANDOS_SAIR + COMANDOS_NOVO:
+        return False
+    orc = _parse_float(msg)
+    return orc is not None and orc >= 0
+
+
+def interromper_plano(state: ChatState, mensagem: str) -> bool:
+    """
+    Se `mensagem` é um comando global ('sair', 'novo', ...) e há um plano
+    sendo gerado para `state`, cancela a geração (o AG para na próxima
+    geração). Retorna True se cancelou.
+
+    Chamado por `processar_mensagem` e, pela API, ANTES de esperar a vez
+    do usuário: a mensagem que gera o plano segura o estado até terminar.
+    """
+    msg = mensagem.strip().lower()
+    if msg in COMANDOS_SAIR:
+        motivo = "sair"
+    elif msg in COMANDOS_NOVO:
+        motivo = "novo"
+    else:
+        return False
+    token = state.cancelamento
+    return token is not None and token.cancelar(motivo)
+
+
 def processar_mensagem(state: ChatState, mensagem: str) -> Tuple[str, ChatState]:
     """
     Função principal de orquestração do diálogo.
@@ -351,7 +421,8 @@ def processar_mensagem(state: ChatState, mensagem: str) -> Tuple[str, ChatState]
     # ------------------------------
     # Comando global 'sair'
     # ------------------------------
-    if msg.lower() in ("sair", "exit", "quit"):
+    if msg.lower() in COMANDOS_SAIR:
+        interromper_plano(state, msg)
         state.terminou = True
         return (
             "Tudo bem! Encerrando a conversa. Qualquer coisa é só chamar novamente. 👋",
@@ -361,7 +432,8 @@ def processar_mensagem(state: ChatState, mensagem: str) -> Tuple[str, ChatState]
     # ------------------------------
     # Recomeçar do zero
     # ------------------------------
-    if msg.lower() in ("novo", "recomecar", "recomeçar", "reset"):
+    if msg.lower() in COMANDOS_NOVO:
+        interromper_plano(state, msg)
         state = ChatState(etapa="inicio", dados={})
         return MSG_BOAS_VINDAS, state
 
@@ -460,11 +532,16 @@ def processar_mensagem(state: ChatState, mensagem: str) -> Tuple[str, ChatState]
     if state.etapa == "orcamento":
         orc = _parse_float(msg)
         if orc is None or orc < 0:
+            if state.plano_interrompido:
+                return MSG_PLANO_NAO_CONCLUIDO, state
             return "Valor inválido. Digite apenas o número em reais (ex.: 25.0):", state
+        state.plano_interrompido = False
         state.dados["orcamento_max"] = orc if orc > 0 else 9999.0
 
-        # Aqui já temos todas as informações necessárias para gerar o plano
+        # Aqui já temos todas as informações necessárias para gerar o plano.
+        # O token permite que 'novo'/'sair' interrompam o AG (`interromper_plano`).
         state.etapa = "gerando"
+        state.cancelamento = Cancelamento()
         try:
             dados_core = {
                 "objetivo": state.dados["objetivo"],
@@ -476,15 +553,12 @@ def processar_mensagem(state: ChatState, mensagem: str) -> Tuple[str, ChatState]
                 "orcamento_max": state.dados["orcamento_max"],
                 # Ajuste o caminho da tabela_csv conforme a estrutura do projeto
                 "tabela_csv": "assets/data/taco_min.csv",
-                "ag": {
-                    "pop": 120,
-                    "ger": 200,
-                    "elit": 6,
-                    "seed": 42,
-                },
+                "ag": dict(PARAMS_AG_CHAT),
+                # plano pré-calculado mais próximo, se a biblioteca existir
+                "biblioteca": True,
             }
 
-            resultado = gerar_plano_para_usuario(dados_core)
+            resultado = gerar_plano_para_usuario(dados_core, cancelamento=state.cancelamento)
 
             # Se houver chave de API, tenta usar a IA para humanizar o cardápio;
             # caso contrário, usa o formato bruto.
@@ -496,6 +570,16 @@ def processar_mensagem(state: ChatState, mensagem: str) -> Tuple[str, ChatState]
             state.etapa = "fim"
             return texto, state
 
+        except Cancelado as e:
+            state.etapa = "orcamento"
+            if e.motivo in ("novo", "sair"):
+                # o próprio comando é processado em seguida e dá a resposta
+                return MSG_PLANO_CANCELADO, state
+            # a ponte desistiu (timeout): esta resposta provavelmente não chega,
+            # então a próxima mensagem que não for um orçamento repete o pedido
+            state.plano_interrompido = True
+            return MSG_PLANO_NAO_CONCLUIDO, state
+
         except Exception as e:
             # Em caso de erro inesperado, guarda a etapa e retorna mensagem técnica
             state.etapa = "erro"
@@ -506,6 +590,9 @@ def processar_mensagem(state: ChatState, mensagem: str) -> Tuple[str, ChatState]
                 state,
             )
 
+        finally:
+            state.cancelamento = None
+
     # Depois que o plano já foi gerado ou houve erro
     if state.etapa in ("fim", "erro"):
         if msg.lower() in ("novo", "sim", "s", "gerar outro", "outro"):
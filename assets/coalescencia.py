@@ -0,0 +1,108 @@
+# coalescencia.py
+"""
+Módulo: coalescencia
+--------------------
+
+Coalescência de chamadas idênticas em andamento ("single-flight").
+
+Em campanhas, muitos usuários respondem a mesma coisa ao mesmo tempo
+(ex.: a sugestão padrão de colesterol 180–200) e cada um disparava a sua
+própria execução do AG — idêntica, já que o AG é determinístico para a
+mesma entrada. Com `Coalescedor.executar(chave, fn)`:
+
+  - a primeira chamada com uma chave (o "líder") executa `fn`;
+  - chamadas com a mesma chave que chegam enquanto o líder ainda está
+    rodando ("seguidores") esperam e recebem o mesmo resultado (ou a
+    mesma exceção);
+  - terminada a execução a chave sai da tabela: não é um cache, um pedido
+    posterior executa de novo.
+
+Quando houve seguidores, cada chamador recebe a sua própria cópia
+(`copiar`, padrão `copy.deepcopy`), para que ninguém altere o resultado
+de outro.
+
+Um seguidor com token de cancelamento (`cancelamento.Cancelamento`)
+confere o próprio token a cada `_ESPERA_S` enquanto espera: cancelado,
+desiste da espera (levanta `Cancelado`) e o líder segue para os demais.
+"""
+
+import copy
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# intervalo entre conferências do token de um seguidor que espera o líder
+_ESPERA_S = 0.05
+
+
+class _Voo:
+    """Uma execução em andamento e quem está esperando por ela."""
+
+    __slots__ = ("evento", "resultado", "erro", "seguidores")
+
+    def __init__(self) -> None:
+        self.evento = threading.Event()
+        self.resultado: Any = None
+        self.erro: Optional[BaseException] = None
+        self.seguidores = 0
+
+
+class Coalescedor:
+    """
+    Tabela de execuções em andamento por chave, protegida por lock.
+
+    Uso:
+        coal = Coalescedor()
+        resultado, compartilhado = coal.executar(chave, lambda: calcula(dados))
+    """
+
+    def __init__(self, copiar: Callable[[Any], Any] = copy.deepcopy) -> None:
+        self._copiar = copiar
+        self._lock = threading.Lock()
+        self._em_voo: Dict[str, _Voo] = {}
+        self.lideres = 0
+        self.seguidores = 0
+
+    def executar(self, chave: str, fn: Callable[[], Any], cancelamento=None) -> Tuple[Any, bool]:
+        """
+        Executa `fn` ou espera a execução em andamento com a mesma chave.
+
+        Retorna (resultado, compartilhado): `compartilhado` é True para os
+        seguidores, que não executaram `fn`. `cancelamento` (opcional) só
+        vale para a espera do seguidor; o líder o recebe dentro de `fn`.
+        """
+        with self._lock:
+            voo = self._em_voo.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._em_voo[chave] = _Voo()
+                self.lideres += 1
+            else:
+                voo.seguidores += 1
+                self.seguidores += 1
+
+        if not lider:
+            while not voo.evento.wait(_ESPERA_S if cancelamento is not None else None):
+                cancelamento.verificar()
+            if voo.erro is not None:
+                raise voo.erro
+            return self._copiar(voo.resultado), True
+
+        try:
+            voo.resultado = fn()
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            # depois de sair da tabela ninguém mais se junta a este voo
+            with self._lock:
+                del self._em_voo[chave]
+            voo.evento.set()
+
+        # o original fica intocado para os seguidores copiarem
+        if voo.seguidores:
+            return self._copiar(voo.resultado), False
+        return voo.resultado, False
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {"lideres": self.lideres, "seguidores": self.seguidores, "em_voo": len(self._em_voo)}
@@ -19,15 +19,24 @@ Responsável por orquestrar o fluxo principal do NutriBotIA:
 # Data: 2025-11-19
 # ---------------------------------------------------------------------------
 
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
 
 # Tenta primeiro importar como pacote (caso o projeto seja usado com `python -m ...`).
 # Se falhar, faz um fallback ajustando sys.path para rodar o módulo de forma "solta"
 # dentro da pasta assets.
 try:
+    from .biblioteca_planos import servir_da_biblioteca
+    from .cancelamento import Cancelado, registrar_cancelado
+    from .coalescencia import Coalescedor
     from .fuzzy_module import calcular_macros
     from .fuzzy_module.calcular_vet import calculo_valor_energetico_total
-    from .genetic_module.genetic_module import gerar_cardapio
+    from .genetic_module.genetic_module import ao_trocar_tabela, gerar_cardapio
+    from .genetic_module.pareto import escolher_da_frente
+    from .telemetria import REGISTRO, Telemetria
 except ImportError:
     # Fallback para quando rodamos scripts diretamente dentro de assets/
     import sys
@@ -36,9 +45,66 @@ except ImportError:
     if BASE_DIR not in sys.path:
         sys.path.append(BASE_DIR)
 
+    from biblioteca_planos import servir_da_biblioteca
+    from cancelamento import Cancelado, registrar_cancelado
+    from coalescencia import Coalescedor
     from fuzzy_module import calcular_macros
     from fuzzy_module.calcular_vet import calculo_valor_energetico_total
-    from genetic_module.genetic_module import gerar_cardapio
+    from genetic_module.genetic_module import ao_trocar_tabela, gerar_cardapio
+    from genetic_module.pareto import escolher_da_frente
+    from telemetria import REGISTRO, Telemetria
+
+
+# Frentes de Pareto já calculadas (modo `ag: {"modo": "pareto"}`), por
+# entrada canônica SEM o orçamento: mudar só `orcamento_max` escolhe outro
+# plano da frente em vez de rodar o AG de novo. LRU limitado.
+_CACHE_FRENTES: "OrderedDict[str, dict]" = OrderedDict()
+_CACHE_FRENTES_MAX = 64
+_cache_frentes_lock = threading.Lock()
+
+
+def _chave_frente(dados: dict) -> str:
+    """Entrada canônica (JSON ordenado) sem os campos que não mudam a frente."""
+    sem_orcamento = {k: v for k, v in dados.items() if k not in ("orcamento_max", "telemetria")}
+    return json.dumps(sem_orcamento, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _frente_em_cache(chave: str):
+    with _cache_frentes_lock:
+        base = _CACHE_FRENTES.get(chave)
+        if base is not None:
+            _CACHE_FRENTES.move_to_end(chave)
+        return base
+
+
+def _descartar_frentes(caminho: str, versao_antiga, versao_nova, itens_antigos) -> None:
+    """Troca de versão de uma tabela: frentes calculadas com a versão antiga deixam de valer."""
+    if versao_antiga is None:
+        return
+    with _cache_frentes_lock:
+        for chave in [c for c, base in _CACHE_FRENTES.items() if base.get("tabela_versao") == versao_antiga]:
+            del _CACHE_FRENTES[chave]
+
+
+ao_trocar_tabela(_descartar_frentes)
+
+
+def _guardar_frente(chave: str, base: dict) -> None:
+    with _cache_frentes_lock:
+        _CACHE_FRENTES[chave] = base
+        _CACHE_FRENTES.move_to_end(chave)
+        while len(_CACHE_FRENTES) > _CACHE_FRENTES_MAX:
+            _CACHE_FRENTES.popitem(last=False)
+
+
+# Pedidos idênticos simultâneos (mesma entrada canônica) compartilham uma
+# única execução: o AG é determinístico para a mesma entrada.
+_COALESCEDOR = Coalescedor()
+
+
+def _chave_plano(dados: dict) -> str:
+    """Entrada canônica (JSON ordenado) de um pedido de plano."""
+    return json.dumps(dados, sort_keys=True, ensure_ascii=False, default=str)
 
 
 def _rotular_dieta(objetivo: int, c_perc: float, p_perc: float, g_perc: float):
@@ -71,7 +137,7 @@ def _rotular_dieta(objetivo: int, c_perc: float, p_perc: float, g_perc: float):
     return tipo, tags
 
 
-def gerar_plano_para_usuario(dados: dict) -> dict:
+def gerar_plano_para_usuario(dados: dict, cancelamento=None) -> dict:
     """
     Gera o plano de dieta completo para um usuário, integrando:
       - Lógica Fuzzy (cálculo de metas de macros e VET)
@@ -90,6 +156,7 @@ def gerar_plano_para_usuario(dados: dict) -> dict:
 
           # parâmetros de organização do cardápio
           "n_refeicoes": 5,
+          "dias": 1,                        # >1 → plano de vários dias (ex.: 7 = semana)
 
           # restrições alimentares
           "restricoes": {"banidos": ["lactose", "glúten", ...]},
@@ -105,7 +172,15 @@ def gerar_plano_para_usuario(dados: dict) -> dict:
           "tabela_csv": "data/taco_min.csv",
 
           # parâmetros do Algoritmo Genético (opcionais)
-          "ag": {"pop": 100, "ger": 120, "elit": 6, "seed": 42}
+          "ag": {"pop": 100, "ger": 120, "elit": 6, "seed": 42},
+
+          # biblioteca de planos pré-calculados (opcional): True usa a
+          # padrão ao lado da tabela; também aceita caminho ou
+          # {"caminho", "limiar_erro", "k_vizinhos", "ger_refino"}
+          "biblioteca": False,
+
+          # anexa tempos por etapa e contadores ao resultado (opcional)
+          "telemetria": False
         }
 
     Retorno
@@ -125,11 +200,61 @@ def gerar_plano_para_usuario(dados: dict) -> dict:
                   "gord": float
               }
           },
-          "cardapio": [...],               # lista de refeições e itens (saída do AG)
+          "cardapio": [...],               # lista de refeições e itens (saída do AG; dia 1)
+          "semana": [...],                 # só com dias > 1: {"dia", "cardapio", "metricas"} por dia
           "metricas": {...},               # métrica de fitness do melhor cardápio
           "historico_otimizacao": [...],   # histórico das últimas gerações do AG
+          "telemetria": {...},             # só se dados["telemetria"] for True
+          "perfil": {...},                 # só com dados["ag"]["profile"] (cProfile/tracemalloc)
+          "frente": [...],                 # só no modo pareto: planos não dominados erro x custo
+          "biblioteca": {...},             # só se veio da biblioteca: distância, erro e etapa
         }
+
+    No modo pareto (`"ag": {"modo": "pareto"}`) a frente fica em cache por
+    entrada (sem o orçamento): repetir o pedido mudando só `orcamento_max`
+    escolhe outro plano da frente, sem Fuzzy nem AG.
+
+    Os tempos e contadores de todas as execuções são sempre somados ao
+    registro do processo (`telemetria.REGISTRO`), exposto em `/metrics`.
+
+    Pedidos com a mesma entrada canônica que chegam enquanto um deles
+    ainda está sendo calculado não rodam de novo: esperam a execução em
+    andamento e recebem uma cópia do mesmo resultado (ver `coalescencia`;
+    contagens em `nutribot_coalescencia_total`).
+
+    `cancelamento` (opcional, `cancelamento.Cancelamento`): conferido
+    entre as gerações do AG; cancelado, a execução para e levanta
+    `cancelamento.Cancelado`. Quem esperava por uma execução cancelada
+    por OUTRO pedido não herda o cancelamento: executa de novo. Quem
+    espera e é cancelado desiste da espera sem parar a execução alheia.
     """
+    chave = _chave_plano(dados)
+    while True:
+        try:
+            resultado, compartilhado = _COALESCEDOR.executar(
+                chave, lambda: _gerar_plano(dados, cancelamento), cancelamento=cancelamento
+            )
+            break
+        except Cancelado:
+            if cancelamento is not None and cancelamento.cancelado:
+                raise
+    REGISTRO.incrementar("nutribot_coalescencia_total", papel="seguidor" if compartilhado else "lider")
+    return resultado
+
+
+def _gerar_plano(dados: dict, cancelamento=None) -> dict:
+    """Corpo de `gerar_plano_para_usuario` (uma execução real do pipeline)."""
+    tele = Telemetria()
+    t0 = time.perf_counter()
+
+    chave_frente = _chave_frente(dados) if dados.get("ag", {}).get("modo") == "pareto" else None
+    if chave_frente is not None:
+        base = _frente_em_cache(chave_frente)
+        if base is not None:
+            tele.contar("cache_frente_hits")
+            return _resposta_da_frente(base, dados, tele)
+        tele.contar("cache_frente_misses")
+
     # ------------------------------------------------------------------
     # 1) Validação mínima e extração dos dados principais
     # ------------------------------------------------------------------
@@ -144,16 +269,17 @@ def gerar_plano_para_usuario(dados: dict) -> dict:
     # ------------------------------------------------------------------
     # 2) Lógica Fuzzy → metas de macronutrientes (g) e VET (kcal)
     # ------------------------------------------------------------------
-    # calcular_macros: retorna (carb_g, prot_g, fat_g) usando fuzzy
-    carb_g, prot_g, fat_g = calcular_macros(
-        objetivo,
-        atividade,
-        colesterol,
-        peso,
-        debug=False,  # mantém sem logs extras aqui; o debug pode ser ativado em testes
-    )
-    # calculo_valor_energetico_total: valor energético alvo em kcal
-    vet = calculo_valor_energetico_total(objetivo, peso)
+    with tele.etapa("fuzzy"):
+        # calcular_macros: retorna (carb_g, prot_g, fat_g) usando fuzzy
+        carb_g, prot_g, fat_g = calcular_macros(
+            objetivo,
+            atividade,
+            colesterol,
+            peso,
+            debug=False,  # mantém sem logs extras aqui; o debug pode ser ativado em testes
+        )
+        # calculo_valor_energetico_total: valor energético alvo em kcal
+        vet = calculo_valor_energetico_total(objetivo, peso)
 
     # ------------------------------------------------------------------
     # 3) Cálculo de percentuais (para rótulo) com base nas calorias dos macros
@@ -203,6 +329,7 @@ def gerar_plano_para_usuario(dados: dict) -> dict:
     params = {
         # parâmetros de layout do cardápio
         "n_refeicoes": int(dados.get("n_refeicoes", 5)),
+        "dias": int(dados.get("dias", 1)),
         "restricoes": dados.get("restricoes", {}),
         "orcamento_max": float(dados.get("orcamento_max", 9999)),
 
@@ -217,22 +344,42 @@ def gerar_plano_para_usuario(dados: dict) -> dict:
     # ------------------------------------------------------------------
     # 6) Execução do Algoritmo Genético para gerar o cardápio final
     # ------------------------------------------------------------------
-    sol = gerar_cardapio(targets, params)
+    # Com `dados["biblioteca"]`, tenta antes o plano pré-calculado mais
+    # próximo (ver `biblioteca_planos`); sem biblioteca compatível, roda o AG.
+    sol = None
+    biblioteca = dados.get("biblioteca")
+    try:
+        if cancelamento is not None:
+            cancelamento.verificar()
+        if biblioteca and params["dias"] == 1 and params.get("modo", "padrao") != "pareto":
+            if isinstance(biblioteca, dict):
+                config = biblioteca
+            else:
+                config = {} if biblioteca is True else {"caminho": str(biblioteca)}
+            sol = servir_da_biblioteca(targets, params, config, telemetria=tele, cancelamento=cancelamento)
+        if sol is None:
+            sol = gerar_cardapio(targets, params, telemetria=tele, cancelamento=cancelamento)
+    except Cancelado as e:
+        registrar_cancelado(e, cancelamento, time.perf_counter() - t0)
+        raise
 
     # ------------------------------------------------------------------
     # 7) Construir um resumo textual amigável para mostrar ao usuário
     # ------------------------------------------------------------------
-    resumo = (
-        f"Plano {tipo}, "
-        + (", ".join(tags) + ", " if tags else "")
-        + f"para {peso:.1f} kg: ~{vet:.0f} kcal/dia. Metas: "
-        f"CHO {carb_g} g, PRO {prot_g} g, GORD {fat_g} g."
-    )
+    with tele.etapa("formatacao"):
+        resumo = (
+            f"Plano {tipo}, "
+            + (", ".join(tags) + ", " if tags else "")
+            + f"para {peso:.1f} kg: ~{vet:.0f} kcal/dia. Metas: "
+            f"CHO {carb_g} g, PRO {prot_g} g, GORD {fat_g} g."
+        )
+
+    REGISTRO.agregar(tele)
 
     # ------------------------------------------------------------------
     # 8) Retornar estrutura consolidada
     # ------------------------------------------------------------------
-    return {
+    resultado = {
         "resumo": resumo,
         "alvos": {
             "vet": vet,
@@ -246,4 +393,34 @@ def gerar_plano_para_usuario(dados: dict) -> dict:
         "cardapio": sol["refeicoes"],
         "metricas": sol["fitness"],
         "historico_otimizacao": sol["historico"],
+        "tabela_versao": sol.get("tabela_versao"),
     }
+    if "biblioteca" in sol:
+        resultado["biblioteca"] = sol["biblioteca"]
+    if "frente" in sol:
+        resultado["frente"] = sol["frente"]
+        _guardar_frente(chave_frente, dict(resultado))
+    if "dias" in sol:
+        # mesmas metas (fuzzy), tabela e pools para todos os dias
+        resultado["semana"] = [
+            {"dia": d + 1, "cardapio": dia["refeicoes"], "metricas": dia["fitness"]}
+            for d, dia in enumerate(sol["dias"])
+        ]
+    if dados.get("telemetria"):
+        resultado["telemetria"] = tele.como_dict()
+    if "perfil" in sol:
+        resultado["perfil"] = sol["perfil"]
+    return resultado
+
+
+def _resposta_da_frente(base: dict, dados: dict, tele: Telemetria) -> dict:
+    """Resultado a partir de uma frente em cache, para o orçamento pedido."""
+    with tele.etapa("formatacao"):
+        pesos = tuple(dados.get("ag", {}).get("pesos", (4.0, 3.2, 1.8, 1.2, 1.0)))
+        escolhido = escolher_da_frente(base["frente"], float(dados.get("orcamento_max", 9999)), float(pesos[4]))
+        resultado = {**base, "cardapio": escolhido["refeicoes"], "metricas": escolhido["fitness"]}
+
+    REGISTRO.agregar(tele)
+    if dados.get("telemetria"):
+        resultado["telemetria"] = tele.como_dict()
+    return resultado
@@ -25,6 +25,9 @@ e onde queremos regras claras e visualmente compreensíveis.)
 # Data: 2025-11-19
 # ---------------------------------------------------------------------------
 
+from functools import lru_cache
+import threading
+
 from skfuzzy import control as ctrl
 from .calcular_vet import calculo_valor_energetico_total
 import numpy as np
@@ -170,6 +173,12 @@ regras = [
 # Sistema de controle fuzzy
 nutri_ctrl = ctrl.ControlSystem(regras)
 
+# O skfuzzy guarda as entradas de TODAS as simulações nos próprios
+# antecedentes (`var.input["current"]`, compartilhado), então duas
+# simulações em threads diferentes trocam entradas entre si. Toda
+# simulação sobre `nutri_ctrl` passa por este lock.
+_fuzzy_lock = threading.Lock()
+
 
 # ============================================================================
 # FUNÇÕES AUXILIARES
@@ -179,6 +188,42 @@ def _clamp(v, lo, hi):
     return max(lo, min(hi, v))
 
 
+def _simular(objetivo_in: int, atividade_in: int, colesterol_in: int):
+    """Roda a simulação fuzzy (serializada) e devolve o objeto de simulação."""
+    with _fuzzy_lock:
+        sim = ctrl.ControlSystemSimulation(nutri_ctrl)
+
+        sim.input["objetivo"]   = objetivo_in
+        sim.input["atividade"]  = atividade_in
+        sim.input["colesterol"] = colesterol_in
+
+        sim.compute()
+    return sim
+
+
+@lru_cache(maxsize=4096)
+def _percentuais_fuzzy(objetivo_in: int, atividade_in: int, colesterol_in: int) -> tuple[float, float, float]:
+    """
+    Percentuais (% CHO, % PRO, % FAT) da saída fuzzy, já normalizados.
+
+    As entradas são inteiros limitados (3 × 11 × 301 combinações), então o
+    resultado é memoizado: depois da primeira vez, nenhuma thread precisa
+    do lock da simulação para o mesmo perfil.
+    """
+    sim = _simular(objetivo_in, atividade_in, colesterol_in)
+
+    # Saídas (em porcentagem do VET)
+    c_perc = float(sim.output["carbo"])
+    p_perc = float(sim.output["proteina"])
+    g_perc = float(sim.output["gordura"])
+
+    # ------------------------------
+    # Normalização — soma deve ser 100%
+    # ------------------------------
+    total = c_perc + p_perc + g_perc
+    return tuple(x / total * 100 for x in (c_perc, p_perc, g_perc))
+
+
 # ============================================================================
 # FUNÇÃO PRINCIPAL
 # ============================================================================
@@ -206,26 +251,9 @@ def calcular_macros(
     assert peso > 0, "Peso deve ser > 0"
 
     # ------------------------------
-    # Executa simulação fuzzy
-    # ------------------------------
-    sim = ctrl.ControlSystemSimulation(nutri_ctrl)
-
-    sim.input["objetivo"]   = objetivo_in
-    sim.input["atividade"]  = atividade_in
-    sim.input["colesterol"] = colesterol_in
-
-    sim.compute()
-
-    # Saídas (em porcentagem do VET)
-    c_perc = float(sim.output["carbo"])
-    p_perc = float(sim.output["proteina"])
-    g_perc = float(sim.output["gordura"])
-
-    # ------------------------------
-    # Normalização — soma deve ser 100%
+    # Executa simulação fuzzy (thread-safe, memoizada por perfil)
     # ------------------------------
-    total = c_perc + p_perc + g_perc
-    c_perc, p_perc, g_perc = (x / total * 100 for x in (c_perc, p_perc, g_perc))
+    c_perc, p_perc, g_perc = _percentuais_fuzzy(objetivo_in, atividade_in, colesterol_in)
 
     # ------------------------------
     # Conversão para gramas
@@ -242,6 +270,7 @@ def calcular_macros(
     if debug:
         try:
             import matplotlib.pyplot as plt
+            sim = _simular(objetivo_in, atividade_in, colesterol_in)
             carbo.view(sim=sim)
             proteina.view(sim=sim)
             gordura.view(sim=sim)
@@ -5,4 +5,4 @@ from .genetic_module import (
 )
 
 __all__ = ["FoodItem", "carregar_tabela_alimentos", "gerar_cardapio"]
-print(">>> assets.genetic_module.__init__ carregado")
\ No newline at end of file
+# print(">>> assets.genetic_module.__init__ carregado")  # opcional; polui o stdout do lote (JSONL)
\ No newline at end of file
@@ -0,0 +1,167 @@
+# assets/genetic_module/adaptacao.py
+"""
+Módulo: adaptacao
+-----------------
+
+Controle adaptativo dos operadores do AG (`ag: {"adaptativo": True}` ou
+um dicionário com os parâmetros abaixo).
+
+Dois mecanismos:
+
+1. Taxas e passo que encolhem com a convergência (regra de sucesso).
+   As taxas de mutação (`taxa_item`, `taxa_porc`) e o passo de porção
+   (±20 g) são multiplicados por um `fator` em [fator_min, 1]. A cada
+   geração mede-se a taxa de sucesso dos filhos (fração que ficou melhor
+   que o melhor dos pais): abaixo de `alvo_sucesso` (5%, e não o 1/5
+   clássico — num AG superar o melhor pai é bem mais raro do que numa
+   estratégia evolutiva) o fator é multiplicado por `contracao`; acima,
+   dividido. No início quase todo filho melhora (passos grandes,
+   exploração); à medida que a população converge o sucesso cai e os
+   passos encolhem (ajuste fino).
+
+   O espalhamento relativo (mediana(J) - melhor J) / mediana(J) vai no
+   traço como indicador de convergência, mas não controla o fator: a
+   mutação sempre gera alguns filhos muito ruins e a mediana não cai.
+
+2. Crédito por operador (probability matching).
+   Cada par de filhos sorteia um crossover ("um_ponto" | "uniforme") e
+   cada filho um perfil de mutação ("troca" | "porcao" | "ambos"). Na
+   geração seguinte, quando o filho é avaliado, o operador recebe a
+   recompensa
+       r = max(0, (J_melhor_pai - J_filho) / J_melhor_pai)
+   e a qualidade q de cada operador é uma média móvel (taxa `alfa`) da
+   recompensa média dos seus filhos. A probabilidade de uso é
+       p_i = p_min + (1 - K·p_min) · q_i / Σq
+   — operadores que de fato melhoram os pais passam a ser mais usados,
+   sem nunca zerar os demais.
+
+`traco()` devolve o estado atual (taxas, passo, probabilidades,
+convergência), anexado a cada entrada de `historico`.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+CROSSOVERS = ("um_ponto", "uniforme")
+MUTACOES = ("troca", "porcao", "ambos")
+
+
+@dataclass
+class ControleOperadores:
+    taxa_item: float = 0.25
+    taxa_porc: float = 0.40
+    passo_g: int = 20
+    passo_min_g: int = 5
+    fator_min: float = 0.2
+    alvo_sucesso: float = 0.05
+    contracao: float = 0.9
+    alfa: float = 0.3
+    p_min: float = 0.1
+    mutacoes: Tuple[str, ...] = MUTACOES
+
+    fator: float = 1.0
+    convergencia: float = 1.0
+    taxa_sucesso: float = 1.0
+    q_cx: Dict[str, float] = field(default_factory=dict)
+    q_mut: Dict[str, float] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.q_cx = {op: 1.0 for op in CROSSOVERS}
+        self.q_mut = {op: 1.0 for op in self.mutacoes}
+
+    @classmethod
+    def de_params(cls, params: Dict, taxa_porc: float) -> Optional["ControleOperadores"]:
+        """Lê `params["adaptativo"]`; None se desligado. `taxa_porc` = 0 desliga o perfil "porcao"."""
+        cfg = params.get("adaptativo")
+        if not cfg:
+            return None
+        if cfg is True:
+            cfg = {}
+        mutacoes = MUTACOES if taxa_porc > 0 else ("troca",)
+        return cls(
+            taxa_item=float(cfg.get("taxa_item", cls.taxa_item)),
+            taxa_porc=taxa_porc,
+            passo_g=int(cfg.get("passo_g", cls.passo_g)),
+            passo_min_g=int(cfg.get("passo_min_g", cls.passo_min_g)),
+            fator_min=float(cfg.get("fator_min", cls.fator_min)),
+            alvo_sucesso=float(cfg.get("alvo_sucesso", cls.alvo_sucesso)),
+            contracao=float(cfg.get("contracao", cls.contracao)),
+            alfa=float(cfg.get("alfa", cls.alfa)),
+            p_min=float(cfg.get("p_min", cls.p_min)),
+            mutacoes=mutacoes,
+        )
+
+    # ------------------------------
+    # Atualização por geração
+    # ------------------------------
+    def atualizar(self, J_pop: np.ndarray, origens: Sequence) -> None:
+        """
+        Recebe o J da população recém-avaliada e, para cada indivíduo, a
+        origem (None para elite/iniciais; (crossover, mutação, J_melhor_pai)
+        para filhos). Atualiza crédito, taxa de sucesso e fator.
+        """
+        melhor = float(J_pop.min())
+        mediana = float(np.median(J_pop))
+        self.convergencia = max(0.0, (mediana - melhor) / mediana) if mediana > 0 else 0.0
+
+        sucessos = filhos = 0
+        soma_cx: Dict[str, List[float]] = {op: [] for op in self.q_cx}
+        soma_mut: Dict[str, List[float]] = {op: [] for op in self.q_mut}
+        for J, origem in zip(J_pop.tolist(), origens):
+            if origem is None:
+                continue
+            cx, mut, J_pai = origem
+            r = max(0.0, (J_pai - J) / J_pai) if J_pai > 0 else 0.0
+            soma_cx[cx].append(r)
+            soma_mut[mut].append(r)
+            filhos += 1
+            sucessos += J < J_pai
+
+        if filhos:
+            self.taxa_sucesso = sucessos / filhos
+            if self.taxa_sucesso < self.alvo_sucesso:
+                self.fator = max(self.fator_min, self.fator * self.contracao)
+            else:
+                self.fator = min(1.0, self.fator / self.contracao)
+
+        for q, soma in ((self.q_cx, soma_cx), (self.q_mut, soma_mut)):
+            for op, rs in soma.items():
+                if rs:
+                    q[op] = (1 - self.alfa) * q[op] + self.alfa * (sum(rs) / len(rs))
+
+    def _probabilidades(self, q: Dict[str, float]) -> Dict[str, float]:
+        total = sum(q.values())
+        k = len(q)
+        if total <= 0:
+            return {op: 1.0 / k for op in q}
+        return {op: self.p_min + (1 - k * self.p_min) * v / total for op, v in q.items()}
+
+    # ------------------------------
+    # Sorteio de operadores
+    # ------------------------------
+    def sortear_crossover(self, rnd) -> str:
+        p = self._probabilidades(self.q_cx)
+        return rnd.choices(list(p), weights=list(p.values()))[0]
+
+    def sortear_mutacao(self, rnd) -> Tuple[str, float, float, int]:
+        """(perfil, taxa_item, taxa_porc, passo_g) para um filho."""
+        p = self._probabilidades(self.q_mut)
+        mut = rnd.choices(list(p), weights=list(p.values()))[0]
+        taxa_item = self.taxa_item * self.fator if mut in ("troca", "ambos") else 0.0
+        taxa_porc = self.taxa_porc * self.fator if mut in ("porcao", "ambos") else 0.0
+        passo = max(self.passo_min_g, int(round(self.passo_g * self.fator)))
+        return mut, taxa_item, taxa_porc, passo
+
+    def traco(self) -> Dict:
+        return {
+            "convergencia": self.convergencia,
+            "taxa_sucesso": self.taxa_sucesso,
+            "fator": self.fator,
+            "taxa_item": self.taxa_item * self.fator,
+            "taxa_porc": self.taxa_porc * self.fator,
+            "passo_g": max(self.passo_min_g, int(round(self.passo_g * self.fator))),
+            "p_crossover": self._probabilidades(self.q_cx),
+            "p_mutacao": self._probabilidades(self.q_mut),
+        }
@@ -0,0 +1,247 @@
+# assets/genetic_module/busca_local.py
+"""
+Módulo: busca_local
+-------------------
+
+Refinamento por busca local (etapa "memética") sobre os melhores
+indivíduos do AG. Ativado por `ag: {"busca_local": {...}}` (ou `True`
+para os valores padrão):
+
+    quando                 "final"   → só no fim, nos top_k da população final
+                           "geracao" → a cada geração, na elite (top_k)
+    top_k                  quantos indivíduos refinar (padrão 3)
+    orcamento_avaliacoes   avaliações incrementais por indivíduo (padrão 400)
+    passo_g                passo de porção em gramas (padrão 10)
+    trocas_por_gene        candidatos de troca sorteados por gene (padrão 2)
+
+Movimentos, aceitos pela regra de PRIMEIRA melhora:
+  - porção ± passo_g em um gene (limitada por `_safe_portion`)
+  - troca do alimento de um gene por outro da MESMA categoria
+    (`IndiceAlimentos.vizinho`), mantendo a porção
+
+Cada movimento é avaliado de forma incremental: o estado guarda os totais
+do dia, carbo/proteína por refeição e gramas por alimento, então o J de
+um vizinho custa O(1) em vez de reavaliar o cardápio inteiro. As fórmulas
+são as mesmas de `_avalia_cardapio` (via `_penal_metas`,
+`_penal_refeicao` e `_penal_variedade`).
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class ConfigBuscaLocal:
+    quando: str = "final"
+    top_k: int = 3
+    orcamento_avaliacoes: int = 400
+    passo_g: int = 10
+    trocas_por_gene: int = 2
+
+    @classmethod
+    def de_params(cls, params: Dict) -> Optional["ConfigBuscaLocal"]:
+        """Lê `params["busca_local"]`; None se a etapa estiver desligada."""
+        cfg = params.get("busca_local")
+        if not cfg:
+            return None
+        if cfg is True:
+            cfg = {}
+        quando = str(cfg.get("quando", cls.quando))
+        if quando not in ("final", "geracao"):
+            raise ValueError(f"busca_local.quando inválido: {quando!r} (use 'final' ou 'geracao')")
+        return cls(
+            quando=quando,
+            top_k=max(1, int(cfg.get("top_k", cls.top_k))),
+            orcamento_avaliacoes=max(0, int(cfg.get("orcamento_avaliacoes", cls.orcamento_avaliacoes))),
+            passo_g=max(1, int(cfg.get("passo_g", cls.passo_g))),
+            trocas_por_gene=max(0, int(cfg.get("trocas_por_gene", cls.trocas_por_gene))),
+        )
+
+
+class AvaliadorIncremental:
+    """
+    Estado de avaliação de UM cardápio, com J de vizinhos em O(1).
+
+    Dados por posição (valor do gene) ficam em cache e são compartilhados
+    entre todos os indivíduos refinados na mesma execução.
+    """
+
+    def __init__(self, itens, itens_idx: List[int], targets: Dict[str, float], params: Dict) -> None:
+        from .genetic_module import _params_refeicao
+        from .restricoes import mascara_restricoes
+
+        self.itens = itens
+        self.itens_idx = itens_idx
+        self.targets = targets
+        self.params = params
+        self.lim_ref = _params_refeicao(params)
+        self.dens_thr = float(params.get("high_density_kcal_threshold", 550.0))
+        self.banido = mascara_restricoes(itens, params.get("restricoes", {}))
+        self.uso_anterior: Dict[str, float] = params.get("uso_anterior_g") or {}
+        self.lim_dias = float(params.get("variedade_limite_dias_g", 150.0))
+        self._dados: Dict[int, Tuple] = {}
+
+    def dados(self, pos: int) -> Tuple:
+        """(id, kcal, carb, prot, gord, preço, densidade, restrição) por grama / por gene."""
+        d = self._dados.get(pos)
+        if d is None:
+            i = self.itens_idx[pos]
+            it = self.itens[i]
+            d = (
+                it.id,
+                it.kcal_100g / 100.0,
+                it.carb_100g / 100.0,
+                it.prot_100g / 100.0,
+                it.gord_100g / 100.0,
+                it.preco_100g / 100.0,
+                max(0.0, it.kcal_100g - self.dens_thr) * 0.2 / 100.0,
+                500.0 if self.banido is not None and self.banido[i] else 0.0,
+            )
+            self._dados[pos] = d
+        return d
+
+    # ------------------------------
+    # Estado do cardápio
+    # ------------------------------
+    def carregar(self, cardapio) -> float:
+        """Monta os agregados de `cardapio` (porções já limitadas) e devolve J."""
+        from .genetic_module import _penal_refeicao, _penal_variedade
+
+        self.tot = [0.0] * 5                 # kcal, carb, prot, gord, custo
+        self.carb_ref: List[float] = []
+        self.prot_ref: List[float] = []
+        self.uso: Dict[str, float] = {}
+        self.fixo = 0.0                       # restrições + densidade
+        for ref in cardapio:
+            c_ref = p_ref = 0.0
+            for (pos, por) in ref:
+                d = self.dados(pos)
+                for k in range(5):
+                    self.tot[k] += d[1 + k] * por
+                c_ref += d[2] * por
+                p_ref += d[3] * por
+                self.uso[d[0]] = self.uso.get(d[0], 0.0) + por
+                self.fixo += d[6] * por + d[7]
+            self.carb_ref.append(c_ref)
+            self.prot_ref.append(p_ref)
+
+        self.pen_ref = [_penal_refeicao(c, p, self.lim_ref) for c, p in zip(self.carb_ref, self.prot_ref)]
+        self.soma_pen_ref = sum(self.pen_ref)
+        ant = self.uso_anterior
+        self.variedade = sum(
+            _penal_variedade(g, ant.get(_id, 0.0), self.lim_dias) for _id, g in self.uso.items()
+        )
+        self.J = self._J(self.tot, self.fixo, self.soma_pen_ref, self.variedade)
+        return self.J
+
+    def _J(self, tot, fixo: float, pen_ref: float, variedade: float) -> float:
+        from .genetic_module import _penal_metas
+
+        metas = _penal_metas(tot[0], tot[1], tot[2], tot[3], tot[4], self.targets, self.params)
+        return metas + fixo + pen_ref + variedade
+
+    def avaliar_movimento(self, m: int, gene: Tuple[int, int], novo: Tuple[int, int]):
+        """
+        J do cardápio se o gene `gene` da refeição `m` virar `novo`.
+        Devolve (J, estado) — `estado` é repassado a `aplicar`.
+        """
+        from .genetic_module import _penal_refeicao, _penal_variedade
+
+        pos_a, por_a = gene
+        pos_b, por_b = novo
+        a = self.dados(pos_a)
+        b = self.dados(pos_b)
+
+        tot = [self.tot[k] + b[1 + k] * por_b - a[1 + k] * por_a for k in range(5)]
+        fixo = self.fixo + (b[6] * por_b + b[7]) - (a[6] * por_a + a[7])
+
+        c_ref = self.carb_ref[m] + b[2] * por_b - a[2] * por_a
+        p_ref = self.prot_ref[m] + b[3] * por_b - a[3] * por_a
+        pen_m = _penal_refeicao(c_ref, p_ref, self.lim_ref)
+        soma_pen_ref = self.soma_pen_ref - self.pen_ref[m] + pen_m
+
+        # variedade: só os alimentos que entram/saem mudam
+        uso_novo = {a[0]: self.uso.get(a[0], 0.0) - por_a}
+        uso_novo[b[0]] = uso_novo.get(b[0], self.uso.get(b[0], 0.0)) + por_b
+        variedade = self.variedade
+        for _id, g in uso_novo.items():
+            ant = self.uso_anterior.get(_id, 0.0)
+            variedade += _penal_variedade(g, ant, self.lim_dias) - _penal_variedade(
+                self.uso.get(_id, 0.0), ant, self.lim_dias
+            )
+
+        J = self._J(tot, fixo, soma_pen_ref, variedade)
+        return J, (m, tot, fixo, c_ref, p_ref, pen_m, soma_pen_ref, uso_novo, variedade, J)
+
+    def aplicar(self, estado) -> None:
+        m, tot, fixo, c_ref, p_ref, pen_m, soma_pen_ref, uso_novo, variedade, J = estado
+        self.tot = tot
+        self.fixo = fixo
+        self.carb_ref[m] = c_ref
+        self.prot_ref[m] = p_ref
+        self.pen_ref[m] = pen_m
+        self.soma_pen_ref = soma_pen_ref
+        self.uso.update(uso_novo)
+        self.variedade = variedade
+        self.J = J
+
+
+def refinar(cardapio, avaliador: AvaliadorIncremental, indice, cfg: ConfigBuscaLocal, rnd=random) -> Tuple[int, int]:
+    """
+    Busca local de primeira melhora, NO LUGAR, sobre `cardapio`.
+
+    Varre os genes em ordem aleatória; para cada gene tenta porção ± passo
+    e algumas trocas na mesma categoria, aceitando o primeiro movimento
+    que reduz J. Repete as varreduras até uma passada sem melhora ou até
+    esgotar `cfg.orcamento_avaliacoes`.
+
+    Retorna (avaliações incrementais usadas, movimentos aceitos).
+    """
+    from .genetic_module import _safe_portion
+
+    itens, itens_idx = avaliador.itens, avaliador.itens_idx
+
+    # porções passam a ser as efetivamente avaliadas pelo fitness
+    for ref in cardapio:
+        for j, (pos, por) in enumerate(ref):
+            ref[j] = (pos, _safe_portion(itens[itens_idx[pos]], por))
+    avaliador.carregar(cardapio)
+
+    orcamento = cfg.orcamento_avaliacoes
+    usadas = melhorias = 0
+    genes = [(m, j) for m, ref in enumerate(cardapio) for j in range(len(ref))]
+
+    melhorou = True
+    while melhorou and usadas < orcamento:
+        melhorou = False
+        rnd.shuffle(genes)
+        for (m, j) in genes:
+            if usadas >= orcamento:
+                break
+            pos, por = cardapio[m][j]
+            item = itens[itens_idx[pos]]
+
+            candidatos = []
+            for passo in (cfg.passo_g, -cfg.passo_g):
+                nova = _safe_portion(item, por + passo)
+                if nova != por:
+                    candidatos.append((pos, nova))
+            for _ in range(cfg.trocas_por_gene):
+                outro = indice.vizinho(pos, rnd)
+                if outro != pos:
+                    candidatos.append((outro, _safe_portion(itens[itens_idx[outro]], por)))
+
+            for novo in candidatos:
+                if usadas >= orcamento:
+                    break
+                usadas += 1
+                J, estado = avaliador.avaliar_movimento(m, (pos, por), novo)
+                if J < avaliador.J - 1e-9:
+                    avaliador.aplicar(estado)
+                    cardapio[m][j] = novo
+                    melhorias += 1
+                    melhorou = True
+                    break
+
+    return usadas, melhorias
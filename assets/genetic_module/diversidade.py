@@ -0,0 +1,108 @@
+# assets/genetic_module/diversidade.py
+"""
+Módulo: diversidade
+-------------------
+
+Deduplicação de genomas e medidas baratas de diversidade da população.
+
+Quando a população converge, `pop` se enche de cópias da elite: a elite
+entra inteira em `filhos`, o crossover de pais quase iguais devolve os
+próprios pais e uma mutação fraca nem sempre muda alguma coisa. Cada
+cópia gasta uma avaliação sem trazer informação nova e acelera a
+convergência prematura.
+
+A cada geração (`ag: {"deduplicar": True}`, padrão):
+
+  - a elite é formada pelos `elit` melhores genomas DISTINTOS;
+  - os filhos repetidos (mesmo genoma de um indivíduo anterior na nova
+    população) são trocados por uma mutação forte do próprio filho
+    (`dedup_taxa`, padrão 0.75 de troca de item e de porção) ou, se ainda
+    assim repetir, por um indivíduo novo.
+
+A identidade do genoma é uma chave "hashável": as refeições em ordem, e
+dentro de cada refeição os genes (posição, gramas) ordenados — a ordem
+dos itens no prato não muda o plano.
+
+Medidas (em cada entrada de `historico`, chave "diversidade"):
+    unicos     → fração de genomas distintos na população avaliada
+    entropia   → entropia média dos alimentos por refeição, normalizada
+                 em [0, 1] por log(nº de candidatos)
+    duplicados → filhos repetidos substituídos para formar esta população
+"""
+
+from collections import Counter
+from math import log
+from typing import Callable, Dict, List, Sequence
+
+Genoma = List[List[tuple]]
+
+
+def chave_genoma(ind: Genoma) -> tuple:
+    return tuple(tuple(sorted(ref)) for ref in ind)
+
+
+def elite_distinta(pop: Sequence[Genoma], ordem: Sequence[int], n: int) -> List[Genoma]:
+    """Os `n` melhores genomas distintos (pela ordem de J); menos se faltar."""
+    vistos = set()
+    elite = []
+    for i in ordem:
+        chave = chave_genoma(pop[i])
+        if chave in vistos:
+            continue
+        vistos.add(chave)
+        elite.append(pop[i])
+        if len(elite) == n:
+            break
+    return elite
+
+
+def deduplicar(
+    pop: List[Genoma],
+    protegidos: int,
+    mutar_forte: Callable[[Genoma], Genoma],
+    novo: Callable[[], Genoma],
+    origens: List | None = None,
+    tentativas: int = 2,
+) -> int:
+    """
+    Troca, em `pop` (a partir de `protegidos`), cada genoma repetido.
+    Os `protegidos` primeiros (elite) são mantidos e contam como vistos.
+    Substituídos perdem a origem (None: não dão crédito a operadores).
+
+    Retorna quantos foram substituídos.
+    """
+    vistos = {chave_genoma(ind) for ind in pop[:protegidos]}
+    trocados = 0
+    for i in range(protegidos, len(pop)):
+        chave = chave_genoma(pop[i])
+        if chave in vistos:
+            trocados += 1
+            candidato = pop[i]
+            for _ in range(tentativas):
+                candidato = mutar_forte(candidato)
+                chave = chave_genoma(candidato)
+                if chave not in vistos:
+                    break
+            else:
+                candidato = novo()
+                chave = chave_genoma(candidato)
+            pop[i] = candidato
+            if origens is not None and i < len(origens):
+                origens[i] = None
+        vistos.add(chave)
+    return trocados
+
+
+def medir_diversidade(pop: Sequence[Genoma], n_candidatos: int) -> Dict[str, float]:
+    """Fração de genomas únicos e entropia normalizada dos alimentos por refeição."""
+    unicos = len({chave_genoma(ind) for ind in pop}) / max(1, len(pop))
+    n_ref = max((len(ind) for ind in pop), default=0)
+    escala = log(n_candidatos) if n_candidatos > 1 else 1.0
+    entropias = []
+    for r in range(n_ref):
+        contagem = Counter(pos for ind in pop if r < len(ind) for (pos, _g) in ind[r])
+        total = sum(contagem.values())
+        if total:
+            entropias.append(-sum(c / total * log(c / total) for c in contagem.values()) / escala)
+    entropia = sum(entropias) / len(entropias) if entropias else 0.0
+    return {"unicos": unicos, "entropia": entropia}
@@ -0,0 +1,150 @@
+# assets/genetic_module/estacionario.py
+"""
+Módulo: estacionario
+--------------------
+
+Motor "steady-state" do AG (`ag: {"engine": "steady"}`): em vez de
+montar uma população nova por geração, troca os piores indivíduos um par
+de filhos por vez.
+
+No laço geracional, cada geração materializa a lista `avals` inteira
+(tuplas de 6 campos por indivíduo), a ordenação e uma população `filhos`
+completa antes de descartar a anterior. Aqui a população é um vetor de
+tamanho fixo e o estado por indivíduo é só o J (array NumPy):
+
+  - pais por torneio de tamanho `torneio_k` sobre posições sorteadas
+    (comparando J, sem ordenar a população);
+  - cada par de filhos é avaliado e cada filho entra no lugar do PIOR
+    indivíduo se for melhor que ele. O pior vem do topo de um heap de
+    máximo por J; como só o topo é substituído (`heapreplace`), o heap
+    nunca tem entradas velhas;
+  - a elite se preserva sozinha (só o pior sai);
+  - com `deduplicar`, filhos iguais a um genoma já presente são
+    descartados ANTES de avaliar (não gastam orçamento).
+
+A unidade de orçamento é a avaliação de fitness: `avaliacoes_max`
+(padrão pop × ger + pop, o mesmo número de avaliações do laço
+geracional). `historico` recebe uma entrada a cada `pop` avaliações
+("geração equivalente"), com os mesmos campos do modo geracional.
+"""
+
+import heapq
+from collections import Counter, deque
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from .diversidade import chave_genoma, medir_diversidade
+
+Genoma = List[List[tuple]]
+
+
+def laco_estacionario(
+    pop: List[Genoma],
+    avaliar: Callable[[Genoma], Tuple],
+    gerar_filhos: Callable[[Genoma, Genoma], List[Genoma]],
+    avaliacoes_max: int,
+    rng: np.random.Generator,
+    torneio_k: int = 3,
+    deduplicar: bool = True,
+    n_candidatos: int = 1,
+    historico_max: int = 10,
+    cancelamento=None,
+) -> Tuple[List[Genoma], Tuple, List[Dict], Dict[str, int]]:
+    """
+    Evolui `pop` (alterada no lugar) até gastar `avaliacoes_max`.
+
+    Retorna (população ordenada por J, avaliação do melhor, histórico,
+    contadores {"avaliacoes", "substituicoes", "duplicados_descartados"}).
+    `cancelamento` é conferido a cada `pop` avaliações (geração equivalente).
+    """
+    n = len(pop)
+    J = np.empty(n, dtype=float)
+    melhor, i_melhor = None, 0
+    for i, ind in enumerate(pop):
+        a = avaliar(ind)
+        J[i] = a[0]
+        if melhor is None or a[0] < melhor[0]:
+            melhor, i_melhor = a, i
+    avaliacoes = n
+
+    pior = [(-J[i], i) for i in range(n)]   # heap de máximo por J
+    heapq.heapify(pior)
+    presentes = Counter(chave_genoma(ind) for ind in pop) if deduplicar else None
+
+    historico: deque = deque(maxlen=max(1, historico_max))
+    substituicoes = descartados = 0
+    k = max(1, min(torneio_k, n))
+
+    def registrar() -> None:
+        historico.append(
+            {
+                "ger": avaliacoes // n - 1,
+                "best_J": melhor[0],
+                "kcal": melhor[1],
+                "carb": melhor[2],
+                "prot": melhor[3],
+                "gord": melhor[4],
+                "custo": melhor[5],
+                "avaliacoes": avaliacoes,
+                "diversidade": medir_diversidade(pop, n_candidatos),
+            }
+        )
+
+    def torneio() -> int:
+        cand = rng.integers(0, n, size=k)
+        return int(cand[np.argmin(J[cand])])
+
+    registrar()
+    proximo_registro = avaliacoes + n
+    tentativas_vazias = 0
+    while avaliacoes < avaliacoes_max:
+        avaliou = False
+        for filho in gerar_filhos(pop[torneio()], pop[torneio()]):
+            if avaliacoes >= avaliacoes_max:
+                break
+            chave = None
+            if presentes is not None:
+                chave = chave_genoma(filho)
+                if chave in presentes:
+                    descartados += 1
+                    continue
+            a = avaliar(filho)
+            avaliacoes += 1
+            avaliou = True
+
+            negJ, i = pior[0]
+            if a[0] < -negJ:
+                if presentes is not None:
+                    antiga = chave_genoma(pop[i])
+                    presentes[antiga] -= 1
+                    if not presentes[antiga]:
+                        del presentes[antiga]
+                    presentes[chave] += 1
+                pop[i] = filho
+                J[i] = a[0]
+                heapq.heapreplace(pior, (-a[0], i))
+                substituicoes += 1
+                if a[0] < melhor[0]:
+                    melhor, i_melhor = a, i
+
+            if avaliacoes >= proximo_registro:
+                registrar()
+                proximo_registro += n
+                if cancelamento is not None:
+                    cancelamento.verificar(geracao=avaliacoes // n - 1, ger=avaliacoes_max // n - 1)
+
+        # população toda igual e filhos sempre repetidos: não há o que avaliar
+        tentativas_vazias = 0 if avaliou else tentativas_vazias + 1
+        if tentativas_vazias > 100 * n:
+            break
+
+    # o dono de `melhor` na frente (empates de J não trocam o plano devolvido)
+    ordem = [i_melhor] + [int(i) for i in np.argsort(J, kind="stable") if i != i_melhor]
+    pop[:] = [pop[i] for i in ordem]
+    return (
+        pop,
+        melhor,
+        list(historico),
+        {"avaliacoes": avaliacoes, "substituicoes": substituicoes, "duplicados_descartados": descartados},
+    )
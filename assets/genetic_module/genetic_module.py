@@ -28,9 +28,31 @@ A função principal exposta é:
 # ---------------------------------------------------------------------------
 
 from dataclasses import dataclass
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Tuple
 import csv
+import os
 import random
+import threading
+
+import numpy as np
+
+from .adaptacao import ControleOperadores
+from .busca_local import AvaliadorIncremental, ConfigBuscaLocal, refinar
+from .diversidade import deduplicar, elite_distinta, medir_diversidade
+from .estacionario import laco_estacionario
+from .indices import IndiceAlimentos
+from .pareto import executar_pareto
+from .perfil import PerfilExecucao
+from .porcoes import resolver_porcoes
+from .restricoes import esquecer_tabela, mascara_restricoes
+from .selecao import selecionar
+from .subtabela import derivar_subtabela, remapear_genomas
+
+try:
+    from ..telemetria import Telemetria, telemetria_opcional
+except ImportError:
+    # módulo carregado como `genetic_module.genetic_module` (pasta assets no sys.path)
+    from telemetria import Telemetria, telemetria_opcional
 
 # Mantido comentado para evitar poluir o log ao importar o módulo como biblioteca.
 # Descomente se precisar depurar problemas de import.
@@ -56,6 +78,31 @@ class FoodItem:
 
 
 def carregar_tabela_alimentos(caminho_csv: str) -> List[FoodItem]:
+    """
+    Carrega a tabela de alimentos e devolve uma lista de FoodItem.
+
+    Se existir um pacote compilado em dia ao lado do CSV (`x.csv` → `x.nbt`,
+    ver módulo `tabela_compilada`), ele é usado no lugar do parsing do texto.
+    Caso contrário, lê o CSV normalmente.
+    """
+    return _carregar_tabela(caminho_csv)[0]
+
+
+def _carregar_tabela(caminho_csv: str):
+    """
+    Como `carregar_tabela_alimentos`, mas devolve também a `TabelaCompilada`
+    usada (None se veio do CSV), para o cache manter o mapeamento aberto.
+    """
+    # import tardio: o módulo também é executado como script (`python -m`)
+    from .tabela_compilada import abrir_se_em_dia
+
+    compilada = abrir_se_em_dia(caminho_csv)
+    if compilada is not None:
+        return compilada.para_itens(), compilada
+    return _ler_csv_alimentos(caminho_csv), None
+
+
+def _ler_csv_alimentos(caminho_csv: str) -> List[FoodItem]:
     """
     Lê um CSV de alimentos e devolve uma lista de FoodItem.
 
@@ -98,6 +145,148 @@ def carregar_tabela_alimentos(caminho_csv: str) -> List[FoodItem]:
     return itens
 
 
+# Cache de tabelas já lidas:
+#   caminho absoluto -> ((mtime_ns, tamanho), itens, índice de candidatos, TabelaCompilada | None)
+# A tabela compilada fica mapeada enquanto a entrada viver: as colunas
+# (páginas compartilhadas entre processos) alimentam `arrays_nutrientes`.
+# A assinatura do arquivo invalida a entrada quando o CSV é alterado.
+# Leitura sem lock (dict do CPython); a carga em si é serializada para que
+# threads concorrentes não leiam/indexem a mesma tabela várias vezes.
+#
+# Cada entrada é um "retrato" imutável da tabela, com versão
+# (`indice.versao`, prefixo do SHA-256 do CSV). A troca por uma versão
+# nova é uma única atribuição no dict: execuções em andamento continuam
+# com a lista/índice que já pegaram. Tabelas em `_TABELAS_VIGIADAS` são
+# recarregadas em segundo plano (`recarga_tabelas.VigiaTabelas`) e, para
+# elas, a requisição não faz `stat` nem recarrega no caminho crítico.
+_CACHE_TABELAS: Dict[str, Tuple[Tuple[int, int], List[FoodItem], IndiceAlimentos, Any]] = {}
+_cache_tabelas_lock = threading.Lock()
+_TABELAS_VIGIADAS: set = set()
+_OUVINTES_TROCA: List = []
+
+
+def _versao_arquivo(caminho_csv: str) -> str:
+    from .tabela_compilada import _sha256_memorizado
+
+    return _sha256_memorizado(caminho_csv)[:12]
+
+
+def ao_trocar_tabela(fn) -> None:
+    """
+    Registra `fn(caminho_abs, versao_antiga, versao_nova, itens_antigos)`,
+    chamada depois de cada troca de versão de uma tabela (para invalidar
+    caches derivados da versão antiga). `versao_antiga`/`itens_antigos`
+    são None na primeira carga.
+    """
+    if fn not in _OUVINTES_TROCA:
+        _OUVINTES_TROCA.append(fn)
+
+
+def _esquecer_motor_restricoes(caminho: str, versao_antiga, versao_nova, itens_antigos) -> None:
+    if itens_antigos is not None:
+        esquecer_tabela(itens_antigos)
+
+
+ao_trocar_tabela(_esquecer_motor_restricoes)
+
+
+def versao_tabela(caminho_csv: str) -> str | None:
+    """Versão da tabela atualmente em cache (None se ainda não carregada)."""
+    entrada = _CACHE_TABELAS.get(os.path.abspath(caminho_csv))
+    return entrada[2].versao if entrada is not None else None
+
+
+def _instalar_tabela(chave: str, assinatura: Tuple[int, int], itens: List[FoodItem], versao: str, compilada=None):
+    """Indexa e publica uma versão da tabela (chamar com `_cache_tabelas_lock`)."""
+    antiga = _CACHE_TABELAS.get(chave)
+    if antiga is not None and antiga[2].versao == versao:
+        # só mudou o mtime: mantém o retrato (e os caches derivados dele)
+        _CACHE_TABELAS[chave] = (assinatura,) + antiga[1:]
+        return antiga[1], antiga[2]
+    indice = IndiceAlimentos(itens, list(range(len(itens))))
+    indice.versao = versao
+    indice.compilada = compilada
+    _CACHE_TABELAS[chave] = (assinatura, itens, indice, compilada)
+    for fn in list(_OUVINTES_TROCA):
+        try:
+            fn(chave, antiga[2].versao if antiga else None, versao, antiga[1] if antiga else None)
+        except Exception as e:  # um ouvinte com erro não impede a troca
+            print(f"[tabela] ouvinte de troca falhou: {e!r}")
+    return itens, indice
+
+
+def recarregar_tabela(caminho_csv: str) -> Tuple[str | None, str]:
+    """
+    Lê a versão atual do arquivo (sem passar pelo cache) e, se o conteúdo
+    mudou, troca a entrada do cache atomicamente.
+
+    Retorna (versão antiga, versão nova). Levanta RuntimeError se a tabela
+    nova estiver vazia/inválida — a versão antiga continua em uso.
+    """
+    chave = os.path.abspath(caminho_csv)
+    st = os.stat(chave)
+    assinatura = (st.st_mtime_ns, st.st_size)
+    versao = _versao_arquivo(chave)
+    antiga = _CACHE_TABELAS.get(chave)
+    versao_antiga = antiga[2].versao if antiga is not None else None
+    if antiga is not None and versao_antiga == versao:
+        if antiga[0] != assinatura:
+            with _cache_tabelas_lock:
+                _CACHE_TABELAS[chave] = (assinatura,) + antiga[1:]
+        return versao_antiga, versao
+
+    # leitura e indexação fora do lock: as requisições seguem na versão antiga
+    itens, compilada = _carregar_tabela(chave)
+    if not itens:
+        raise RuntimeError(f"Tabela de alimentos vazia ou inválida: {chave}")
+    with _cache_tabelas_lock:
+        _instalar_tabela(chave, assinatura, itens, versao, compilada)
+    return versao_antiga, versao
+
+
+def _carregar_tabela_cacheada(
+    caminho_csv: str,
+    telemetria: Telemetria | None = None,
+) -> Tuple[List[FoodItem], IndiceAlimentos]:
+    """
+    Versão com cache de `carregar_tabela_alimentos`, que também devolve
+    o `IndiceAlimentos` da tabela inteira (construído uma única vez).
+
+    Reaproveita a lista já carregada enquanto o arquivo não mudar
+    (mtime + tamanho). A lista e o índice são compartilhados: não devem
+    ser alterados pelo chamador.
+    """
+    chave = os.path.abspath(caminho_csv)
+    entrada = _CACHE_TABELAS.get(chave)
+    if entrada is not None and chave in _TABELAS_VIGIADAS:
+        # a troca de versão é feita pelo vigia, fora da requisição
+        if telemetria is not None:
+            telemetria.contar("cache_tabela_hits")
+        return entrada[1], entrada[2]
+
+    st = os.stat(chave)
+    assinatura = (st.st_mtime_ns, st.st_size)
+
+    if entrada is not None and entrada[0] == assinatura:
+        if telemetria is not None:
+            telemetria.contar("cache_tabela_hits")
+        return entrada[1], entrada[2]
+
+    with _cache_tabelas_lock:
+        # outra thread pode ter carregado enquanto esperávamos o lock
+        entrada = _CACHE_TABELAS.get(chave)
+        if entrada is not None and entrada[0] == assinatura:
+            if telemetria is not None:
+                telemetria.contar("cache_tabela_hits")
+            return entrada[1], entrada[2]
+
+        itens, compilada = _carregar_tabela(chave)
+        itens, indice = _instalar_tabela(chave, assinatura, itens, _versao_arquivo(chave), compilada)
+    if telemetria is not None:
+        telemetria.contar("cache_tabela_misses")
+    return itens, indice
+
+
 # ============================================================
 #                       Funções auxiliares
 # ============================================================
@@ -202,34 +391,116 @@ def _nutr_por_porcao(item: FoodItem, gramas: float) -> Tuple[float, float, float
     )
 
 
-def _violacao_restricoes(item: FoodItem, restricoes: Dict) -> bool:
+# ============================================================
+#                     Função de Fitness
+# ============================================================
+def _params_refeicao(params: Dict) -> Tuple[float, float, float, float]:
+    """(mín. carbo, peso, mín. proteína, peso) por refeição."""
+    return (
+        float(params.get("meal_carb_min", 45.0)),      # g CHO / refeição
+        float(params.get("meal_carb_weight", 14.0)),
+        float(params.get("meal_prot_min", 15.0)),      # g PRO / refeição
+        float(params.get("meal_prot_weight", 10.0)),
+    )
+
+
+def _penal_refeicao(carbs_ref: float, prot_ref: float, lim_ref: Tuple[float, float, float, float]) -> float:
+    """Penalidade de UMA refeição com pouco carboidrato e/ou proteína."""
+    meal_min_carb, meal_carb_weight, meal_min_prot, meal_prot_weight = lim_ref
+    pen = 0.0
+    if carbs_ref < meal_min_carb:
+        pen += (meal_min_carb - carbs_ref) * meal_carb_weight
+    if prot_ref < meal_min_prot:
+        pen += (meal_min_prot - prot_ref) * meal_prot_weight
+    return pen
+
+
+def _penal_variedade(gramas: float, anterior: float = 0.0, limite_dias: float = 150.0) -> float:
     """
-    Verifica se o alimento viola alguma restrição declarada.
+    Penalidade por gramas de UM alimento no dia (mais de ~3,5 porções).
 
-    Atualmente:
-      - restricoes["banidos"]: lista de palavras-chave que não podem
-        aparecer nem no nome nem nas tags do alimento.
+    Em planos de vários dias, `anterior` é o uso do mesmo alimento nos dias
+    já gerados, com decaimento (ver `_executar_semana`). A mesma regra
+    linear vale sobre o uso acumulado, com limite menor (`limite_dias`):
+    só a parte do excesso causada pelos dias anteriores é somada.
+
+    Alimento fora do cardápio do dia (`gramas` <= 0) não é penalizado,
+    mesmo com uso anterior: `_avalia_cardapio` só soma os que aparecem, e a
+    avaliação incremental (`busca_local`) reavalia quem sai/entra com 0 g.
     """
-    banidos = set(map(str.lower, restricoes.get("banidos", [])))
-    if not banidos:
-        return False
+    if gramas <= 0:
+        return 0.0
+    pen = (gramas - 350) * 2.0 if gramas > 350 else 0.0
+    if anterior > 0:
+        pen += (max(0.0, gramas + anterior - limite_dias) - max(0.0, gramas - limite_dias)) * 2.0
+    return pen
 
-    nome = item.nome.lower()
-    tags = {t.lower() for t in item.tags}
 
-    # se fragmento banido aparecer no nome ou em alguma tag → violação
-    return any(b in nome for b in banidos) or (banidos & tags)
+def _penal_metas(
+    kcal: float, carb: float, prot: float, gord: float, custo: float, targets: Dict[str, float], params: Dict
+) -> float:
+    """
+    Parte do fitness que depende só dos totais do dia: erro assimétrico
+    em relação às metas, excesso de proteína e custo além do orçamento.
+    Separada para permitir avaliação incremental (ver `busca_local`).
+    """
+    # --- Metas globais ---
+    alvo_kcal = float(targets["kcal"])
+    alvo_c = float(targets["carb_g"])
+    alvo_p = float(targets["prot_g"])
+    alvo_g = float(targets["fat_g"])
+
+    # pesos do erro (podem ser ajustados via params["pesos"])
+    # maior peso em kcal e carboidratos; proteína com peso extra no excesso.
+    α, β, γ, δ, ε = params.get("pesos", (4.0, 3.2, 1.8, 1.2, 1.0))
+
+    # assimetrias:
+    # kcal: ficar ABAIXO dói mais que ACIMA
+    if kcal < alvo_kcal:
+        kcal_pen = 2.2 * (alvo_kcal - kcal)
+    else:
+        kcal_pen = 1.0 * (kcal - alvo_kcal)
+
+    # carbo: déficit dói mais que excesso
+    if carb < alvo_c:
+        carb_pen = 2.0 * (alvo_c - carb) * 4.0
+    else:
+        carb_pen = 1.0 * (carb - alvo_c) * 4.0
+
+    # proteína: excesso dói mais que déficit
+    if prot > alvo_p:
+        prot_pen = 2.5 * (prot - alvo_p) * 4.0
+    else:
+        prot_pen = 1.0 * (alvo_p - prot) * 4.0
+
+    # gordura: assimetria mais suave
+    if gord < alvo_g:
+        gord_pen = 1.2 * (alvo_g - gord) * 9.0
+    else:
+        gord_pen = 1.0 * (gord - alvo_g) * 9.0
+
+    # penal extra se proteína estourar MUITO (acima de 140% da meta)
+    prot_extra_pen = 0.0
+    lim_prot_alto = alvo_p * 1.4
+    if prot > lim_prot_alto:
+        prot_extra_pen = (prot - lim_prot_alto) * 40.0
+
+    # custo além do orçamento
+    excesso_custo = max(0.0, custo - params.get("orcamento_max", float("inf")))
+
+    # erro total ponderado (sem custo / penalidades ainda)
+    err = α * kcal_pen + β * carb_pen + γ * prot_pen + δ * gord_pen
+
+    return err + ε * excesso_custo + prot_extra_pen
 
 
-# ============================================================
-#                     Função de Fitness
-# ============================================================
 def _avalia_cardapio(
     cardapio,
     itens_idx: List[int],
     itens: List[FoodItem],
     targets: Dict[str, float],
     params: Dict,
+    detalhe: Dict[str, float] | None = None,
 ):
     """
     Avalia um indivíduo (cardápio completo do dia).
@@ -247,6 +518,9 @@ def _avalia_cardapio(
           * falta de variedade (muitas gramas do mesmo alimento)
           * excesso exagerado de proteína (acima de ~140% da meta)
 
+    Se `detalhe` for informado, acumula nele a soma de J e da penalidade
+    por restrições (usado pela telemetria).
+
     Retorna:
         (J_total, kcal, carb, prot, gord, custo)
     """
@@ -260,15 +534,13 @@ def _avalia_cardapio(
     uso_por_id: Dict[str, float] = {}
 
     # parâmetros por refeição (para bulking mais realista)
-    meal_min_carb = float(params.get("meal_carb_min", 45.0))      # g CHO / refeição
-    meal_carb_weight = float(params.get("meal_carb_weight", 14.0))
-    meal_min_prot = float(params.get("meal_prot_min", 15.0))      # g PRO / refeição
-    meal_prot_weight = float(params.get("meal_prot_weight", 10.0))
+    lim_ref = _params_refeicao(params)
 
     # limiar de densidade calórica (kcal/100g) acima do qual começamos a penalizar
     dens_thr = float(params.get("high_density_kcal_threshold", 550.0))
 
-    restricoes = params.get("restricoes", {})
+    # máscara de banidos por índice em `itens` (ver `restricoes`), em cache por tabela
+    banido = mascara_restricoes(itens, params.get("restricoes", {}))
 
     # --- loop por refeição ---
     for refeicao in cardapio:
@@ -296,79 +568,32 @@ def _avalia_cardapio(
                 dens_penalty += (item.kcal_100g - dens_thr) * (porcao / 100.0) * 0.2
 
             # viola alimento banido
-            if _violacao_restricoes(item, restricoes):
+            if banido is not None and banido[itens_idx[idx]]:
                 penal_restr += 500.0
 
-        # mínimo de carbo / refeição
-        if carbs_ref < meal_min_carb:
-            meal_penalty += (meal_min_carb - carbs_ref) * meal_carb_weight
+        # mínimo de carbo / proteína por refeição
+        meal_penalty += _penal_refeicao(carbs_ref, prot_ref, lim_ref)
 
-        # mínimo de proteína / refeição
-        if prot_ref < meal_min_prot:
-            meal_penalty += (meal_min_prot - prot_ref) * meal_prot_weight
-
-    # penalidade por falta de variedade (muitas gramas do mesmo alimento no dia)
+    # penalidade por falta de variedade (muitas gramas do mesmo alimento no dia,
+    # somadas ao uso decaído dos dias anteriores em planos semanais)
+    uso_anterior = params.get("uso_anterior_g") or {}
+    lim_dias = float(params.get("variedade_limite_dias_g", 150.0))
     for _id, gramas in uso_por_id.items():
-        if gramas > 350:  # mais de ~3,5 porções do mesmo alimento
-            variety_penalty += (gramas - 350) * 2.0
-
-    # --- Metas globais ---
-    alvo_kcal = float(targets["kcal"])
-    alvo_c = float(targets["carb_g"])
-    alvo_p = float(targets["prot_g"])
-    alvo_g = float(targets["fat_g"])
-
-    # pesos do erro (podem ser ajustados via params["pesos"])
-    # maior peso em kcal e carboidratos; proteína com peso extra no excesso.
-    α, β, γ, δ, ε = params.get("pesos", (4.0, 3.2, 1.8, 1.2, 1.0))
-
-    # assimetrias:
-    # kcal: ficar ABAIXO dói mais que ACIMA
-    if kcal < alvo_kcal:
-        kcal_pen = 2.2 * (alvo_kcal - kcal)
-    else:
-        kcal_pen = 1.0 * (kcal - alvo_kcal)
-
-    # carbo: déficit dói mais que excesso
-    if carb < alvo_c:
-        carb_pen = 2.0 * (alvo_c - carb) * 4.0
-    else:
-        carb_pen = 1.0 * (carb - alvo_c) * 4.0
-
-    # proteína: excesso dói mais que déficit
-    if prot > alvo_p:
-        prot_pen = 2.5 * (prot - alvo_p) * 4.0
-    else:
-        prot_pen = 1.0 * (alvo_p - prot) * 4.0
-
-    # gordura: assimetria mais suave
-    if gord < alvo_g:
-        gord_pen = 1.2 * (alvo_g - gord) * 9.0
-    else:
-        gord_pen = 1.0 * (gord - alvo_g) * 9.0
-
-    # penal extra se proteína estourar MUITO (acima de 140% da meta)
-    prot_extra_pen = 0.0
-    lim_prot_alto = alvo_p * 1.4
-    if prot > lim_prot_alto:
-        prot_extra_pen = (prot - lim_prot_alto) * 40.0
-
-    # custo além do orçamento
-    excesso_custo = max(0.0, custo - params.get("orcamento_max", float("inf")))
-
-    # erro total ponderado (sem custo / penalidades ainda)
-    err = α * kcal_pen + β * carb_pen + γ * prot_pen + δ * gord_pen
+        variety_penalty += _penal_variedade(gramas, uso_anterior.get(_id, 0.0), lim_dias)
 
     J = (
-        err
-        + ε * excesso_custo
+        _penal_metas(kcal, carb, prot, gord, custo, targets, params)
         + penal_restr
         + dens_penalty
         + meal_penalty
         + variety_penalty
-        + prot_extra_pen
     )
 
+    if detalhe is not None:
+        detalhe["avaliacoes_fitness"] = detalhe.get("avaliacoes_fitness", 0) + 1
+        detalhe["soma_J"] = detalhe.get("soma_J", 0.0) + J
+        detalhe["soma_penalidade_restricao"] = detalhe.get("soma_penalidade_restricao", 0.0) + penal_restr
+
     return J, kcal, carb, prot, gord, custo
 
 
@@ -382,6 +607,8 @@ def _criar_individuo(
     min_itens: int = 2,
     max_itens: int = 3,
     low_kcal_bias: float = 0.6,
+    indice: IndiceAlimentos | None = None,
+    rnd=random,
 ):
     """
     Cria um indivíduo inicial (cardápio do dia).
@@ -397,86 +624,109 @@ def _criar_individuo(
           * 1 alimento base de carbo
           * 1 alimento proteico
           * 0–1 alimento extra neutro
+
+    Os pools (já restritos pelo `low_kcal_bias`) vêm do `indice`; se ele
+    não for informado, é construído aqui (custo O(n) por chamada).
+
+    `rnd` é o gerador da execução (`random.Random`); o padrão é o módulo
+    `random` global, mantido só por compatibilidade.
     """
-    # Ordena por kcal para começar preferindo itens menos densos.
-    # Atenção: os elementos em itens_idx são índices em `itens`.
-    idx_sorted = sorted(itens_idx, key=lambda i: itens[i].kcal_100g)
-    corte = max(1, int(len(idx_sorted) * float(low_kcal_bias)))
-    base_pool = idx_sorted[:corte] if corte < len(idx_sorted) else idx_sorted
+    if indice is None:
+        indice = IndiceAlimentos(itens, itens_idx)
 
-    # pools especializados
-    carb_pool = [i for i in base_pool if _is_carb_base(itens[i])] or base_pool[:]
-    prot_pool = [i for i in base_pool if _is_high_protein(itens[i])] or base_pool[:]
-    neutro_pool = [i for i in base_pool if not _is_high_fat(itens[i])] or base_pool[:]
+    # pools especializados, com posições em `itens_idx` (valor do gene)
+    carb_pool, prot_pool, neutro_pool = indice.pools_iniciais(low_kcal_bias)
 
     individuo = []
 
     for _ in range(n_refeicoes):
-        n = random.randint(min_itens, max_itens)
+        n = rnd.randint(min_itens, max_itens)
         genes = []
 
         # 1) sempre 1 carbo base
-        idx_carb = random.choice(carb_pool)  # índice em `itens`
+        pos_carb = rnd.choice(carb_pool)
         por_carb = _safe_portion(
-            itens[idx_carb],
-            random.choice([120, 150, 180, 200]),
+            itens[itens_idx[pos_carb]],
+            rnd.choice([120, 150, 180, 200]),
         )
-        # converte para índice no vetor `itens_idx`
-        genes.append((itens_idx.index(idx_carb), por_carb))
+        genes.append((pos_carb, por_carb))
 
         # 2) sempre 1 proteico
-        idx_prot = random.choice(prot_pool)
+        pos_prot = rnd.choice(prot_pool)
         por_prot = _safe_portion(
-            itens[idx_prot],
-            random.choice([70, 90, 110, 130]),
+            itens[itens_idx[pos_prot]],
+            rnd.choice([70, 90, 110, 130]),
         )
-        genes.append((itens_idx.index(idx_prot), por_prot))
+        genes.append((pos_prot, por_prot))
 
         # 3) opcional: 1 extra neutro (legume, fruta, cereal, etc.)
         if n > 2:
-            idx_extra = random.choice(neutro_pool)
+            pos_extra = rnd.choice(neutro_pool)
             por_extra = _safe_portion(
-                itens[idx_extra],
-                random.choice([60, 80, 100]),
+                itens[itens_idx[pos_extra]],
+                rnd.choice([60, 80, 100]),
             )
-            genes.append((itens_idx.index(idx_extra), por_extra))
+            genes.append((pos_extra, por_extra))
 
         individuo.append(genes)
 
     return individuo
 
 
+def _indice_do_contexto(contexto: Dict | None) -> IndiceAlimentos | None:
+    """
+    Devolve o `IndiceAlimentos` do contexto de mutação, construindo-o
+    (e guardando no próprio contexto) se ainda não existir.
+    """
+    if not contexto or contexto.get("itens") is None or contexto.get("itens_idx") is None:
+        return None
+    indice = contexto.get("indice")
+    if indice is None:
+        indice = IndiceAlimentos(contexto["itens"], contexto["itens_idx"])
+        contexto["indice"] = indice
+    return indice
+
+
 def _mutar(
     ind,
     taxa_item: float = 0.25,
     taxa_porc: float = 0.40,
     itens_idx: List[int] | None = None,
     contexto: Dict | None = None,
+    rnd=random,
+    passo_g: int = 20,
 ):
     """
     Operador de mutação:
-      - troca itens (com probabilidade taxa_item)
-      - ajusta porções (com probabilidade taxa_porc)
+      - troca itens (com probabilidade taxa_item), por um alimento da
+        mesma categoria / faixa de kcal (ver `indices.IndiceAlimentos`)
+      - ajusta porções em ±passo_g (com probabilidade taxa_porc)
       - garante que cada refeição tenha:
           * pelo menos 1 proteico
           * pelo menos 1 base de carbo
 
     `itens_idx` e `contexto` são usados para mapear os índices internos
-    do indivíduo para a lista original de alimentos.
+    do indivíduo para a lista original de alimentos. `contexto["indice"]`
+    é opcional (construído sob demanda). `rnd`: gerador da execução.
     """
     itens = contexto.get("itens") if contexto else None
     full_idx = contexto.get("itens_idx") if contexto else itens_idx
+    indice = _indice_do_contexto(contexto)
 
     for refeicao in ind:
         # troca item (altera o índice do gene mantendo porção)
-        if random.random() < taxa_item and itens_idx:
-            i = random.randrange(len(refeicao))
-            refeicao[i] = (random.randrange(len(itens_idx)), refeicao[i][1])
+        if rnd.random() < taxa_item and itens_idx:
+            i = rnd.randrange(len(refeicao))
+            if indice is not None:
+                novo = indice.vizinho(refeicao[i][0], rnd)
+            else:
+                novo = rnd.randrange(len(itens_idx))
+            refeicao[i] = (novo, refeicao[i][1])
 
         # ajusta porção
-        if random.random() < taxa_porc and len(refeicao) > 0:
-            j = random.randrange(len(refeicao))
-            delta = random.choice([-20, +20])
+        if rnd.random() < taxa_porc and len(refeicao) > 0:
+            j = rnd.randrange(len(refeicao))
+            delta = rnd.choice([-passo_g, +passo_g])
             idxj, porj = refeicao[j]
             if itens is not None and full_idx is not None:
                 itemj = itens[full_idx[idxj]]
@@ -487,43 +737,63 @@ def _mutar(
             refeicao[j] = (idxj, nova)
 
         # garante sempre proteína + carbo em cada refeição
-        if itens is not None and full_idx is not None and len(refeicao) > 0:
-            has_prot = any(_is_high_protein(itens[full_idx[idx]]) for (idx, _) in refeicao)
-            has_carb = any(_is_carb_base(itens[full_idx[idx]]) for (idx, _) in refeicao)
+        if indice is not None and len(refeicao) > 0:
+            has_prot = any(indice.eh_prot[idx] for (idx, _) in refeicao)
+            has_carb = any(indice.eh_carb[idx] for (idx, _) in refeicao)
 
             # se não tiver proteína, substitui um gene por alimento proteico
             if not has_prot:
-                j = random.randrange(len(refeicao))
-                prot_ids = [i for i in full_idx if _is_high_protein(itens[i])] or full_idx
-                idx_p = random.choice(prot_ids)
-                por = refeicao[j][1]
-                por = _safe_portion(itens[idx_p], por)
-                refeicao[j] = (full_idx.index(idx_p), por)
+                j = rnd.randrange(len(refeicao))
+                pos_p = rnd.choice(indice.prot)
+                por = _safe_portion(itens[full_idx[pos_p]], refeicao[j][1])
+                refeicao[j] = (pos_p, por)
 
             # se não tiver carbo base, substitui um gene por base de carbo
             if not has_carb:
-                j = random.randrange(len(refeicao))
-                carb_ids = [i for i in full_idx if _is_carb_base(itens[i])] or full_idx
-                idx_c = random.choice(carb_ids)
-                por = refeicao[j][1]
-                por = _safe_portion(itens[idx_c], por)
-                refeicao[j] = (full_idx.index(idx_c), por)
+                j = rnd.randrange(len(refeicao))
+                pos_c = rnd.choice(indice.carb)
+                por = _safe_portion(itens[full_idx[pos_c]], refeicao[j][1])
+                refeicao[j] = (pos_c, por)
 
     return ind
 
 
-def _crossover(p1, p2):
+def _crossover(p1, p2, rnd=random):
     """
     Crossover de 1 ponto ao nível de refeição.
 
     p1, p2: indivíduos (listas de refeições)
+    rnd:    gerador da execução
+
+    Os filhos recebem CÓPIAS das refeições: `_mutar` altera as refeições
+    no lugar, e compartilhar as listas com os pais corromperia a elite.
     """
     n = len(p1)
     if n < 2:
         # com menos de 2 refeições não há ponto de corte válido
-        return p1[:], p2[:]
-    cp = random.randrange(1, n)
-    return p1[:cp] + p2[cp:], p2[:cp] + p1[cp:]
+        return [r[:] for r in p1], [r[:] for r in p2]
+    cp = rnd.randrange(1, n)
+    f1 = [r[:] for r in p1[:cp]] + [r[:] for r in p2[cp:]]
+    f2 = [r[:] for r in p2[:cp]] + [r[:] for r in p1[cp:]]
+    return f1, f2
+
+
+def _crossover_uniforme(p1, p2, rnd=random):
+    """
+    Crossover uniforme ao nível de refeição: cada refeição do filho 1 vem
+    de p1 ou de p2 com probabilidade 1/2 (o filho 2 recebe a outra).
+    Como no 1 ponto, os filhos recebem cópias das refeições.
+    """
+    f1, f2 = [], []
+    for r1, r2 in zip(p1, p2):
+        if rnd.random() < 0.5:
+            r1, r2 = r2, r1
+        f1.append(r1[:])
+        f2.append(r2[:])
+    return f1, f2
+
+
+_CROSSOVERS = {"um_ponto": _crossover, "uniforme": _crossover_uniforme}
 
 
 # ============================================================
@@ -591,10 +861,35 @@ def _escala_para_kcal(
     return nova_sol
 
 
+def _formatar_refeicoes(sol, itens: List[FoodItem], itens_idx: List[int]) -> List[List[Dict]]:
+    """Converte o genoma em refeições amigáveis: [{"id", "nome", "porcao_g"}, ...]."""
+    refeicoes = []
+    for r in sol:
+        blocos = []
+        for (idx, porcao) in r:
+            it = itens[itens_idx[idx]]
+            porcao = _safe_portion(it, porcao)
+            blocos.append(
+                {
+                    "id": it.id,
+                    "nome": it.nome,
+                    "porcao_g": porcao,
+                }
+            )
+        refeicoes.append(blocos)
+    return refeicoes
+
+
 # ============================================================
 #                 Função principal do módulo
 # ============================================================
-def gerar_cardapio(targets: Dict[str, float], params: Dict) -> Dict:
+def gerar_cardapio(
+    targets: Dict[str, float],
+    params: Dict,
+    telemetria: Telemetria | None = None,
+    populacao_inicial: List | None = None,
+    cancelamento=None,
+) -> Dict:
     """
     Gera um cardápio otimizado via Algoritmo Genético.
 
@@ -626,7 +921,50 @@ def gerar_cardapio(targets: Dict[str, float], params: Dict) -> Dict:
           "high_density_kcal_threshold": 550,
           "low_kcal_bias": 0.6,
           "meal_carb_min": 35.0,
-          "meal_prot_min": 18.0
+          "meal_prot_min": 18.0,
+          "historico_max": 10,  # quantas gerações finais ficam em "historico"
+
+          # modo híbrido: o AG escolhe os alimentos e um mínimo-quadrados
+          # limitado escolhe as gramas (ver módulo `porcoes`)
+          "porcoes": "ag" | "solver",
+          "solver_iteracoes": 60,
+
+          # seleção de pais por rank (ver módulo `selecao`)
+          "selecao": "torneio" | "sus",
+          "torneio_k": 3,
+          "pressao_sus": 2.0,
+
+          # operadores: crossover fixo ou controle adaptativo (módulo `adaptacao`)
+          "crossover": "um_ponto" | "uniforme",
+          "adaptativo": True | {"alvo_sucesso": 0.05, "fator_min": 0.2, "alfa": 0.3, "p_min": 0.1},
+
+          # motor: gerações completas ou troca do pior par a par (módulo `estacionario`);
+          # no "steady" o orçamento é em avaliações (padrão pop * ger + pop)
+          "engine": "geracional" | "steady",
+          "avaliacoes_max": 9720,
+
+          # genomas repetidos trocados a cada geração (módulo `diversidade`)
+          "deduplicar": True,
+          "dedup_taxa": 0.75,
+
+          # candidatos da requisição sem banidos / itens caros (módulo `subtabela`)
+          "subtabela": True,
+          "subtabela_min_categoria": 3,
+          "subtabela_min_itens": 12,
+
+          # busca local nos melhores indivíduos (ver módulo `busca_local`)
+          "busca_local": {"quando": "final", "top_k": 3, "orcamento_avaliacoes": 400},
+
+          # multiobjetivo erro x custo, devolve a frente de Pareto (módulo `pareto`)
+          "modo": "padrao" | "pareto",
+          "frente_max": 30,
+
+          # plano de vários dias (ver `_executar_semana`)
+          "dias": 7,
+          "variedade_decaimento": 0.7,
+          "variedade_limite_dias_g": 150,
+          "ger_dias_seguintes": 100,
+          "aquecimento_fracao": 0.5
         }
 
     Retorna:
@@ -636,11 +974,147 @@ def gerar_cardapio(targets: Dict[str, float], params: Dict) -> Dict:
               [ {"id":..., "nome":..., "porcao_g":...}, ... ],  # refeição 1
               ...
           ],
-          "historico": [... últimas 10 gerações ...]
+          "historico": [... últimas `historico_max` gerações ...],
+          "tabela_versao": "3f2a...",  # versão da tabela usada (ver `recarregar_tabela`)
+          "perfil": {...}   # só com params["profile"] (ver módulo `perfil`)
+        }
+
+    No modo pareto o retorno ganha "frente" (planos não dominados em erro
+    x custo, ordenados por custo) e o plano principal é o melhor que cabe
+    em `orcamento_max` (ver `pareto.escolher_da_frente`).
+
+    Com params["dias"] > 1 o retorno ganha "dias": uma entrada no formato
+    acima por dia; "fitness" passa a ser o total da semana (J somado,
+    macros e custo médios por dia) e "refeicoes"/"historico" são os do dia 1.
+
+    telemetria (opcional):
+        coletor `Telemetria`; recebe o tempo de cada etapa (carga_tabela,
+        populacao_inicial, geracoes, escala, formatacao) e os contadores
+        de avaliações, gerações e cache.
+
+    populacao_inicial (opcional, só no modo padrão de um dia):
+        genomas que aquecem a população inicial (até `aquecimento_fracao`
+        dela), ex.: os vizinhos da biblioteca de planos pré-calculados.
+
+    cancelamento (opcional):
+        token `cancelamento.Cancelamento`, conferido entre gerações; se
+        cancelado, a execução para e levanta `cancelamento.Cancelado`.
+    """
+    if params.get("modo", "padrao") == "pareto":
+        if int(params.get("dias", 1)) > 1:
+            raise ValueError("O modo 'pareto' gera um único dia; não combine com 'dias' > 1.")
+        def executar(t, p, tele):
+            return executar_pareto(t, p, tele, cancelamento=cancelamento)
+    elif int(params.get("dias", 1)) > 1:
+        def executar(t, p, tele):
+            return _executar_semana(t, p, tele, cancelamento=cancelamento)
+    else:
+        def executar(t, p, tele):
+            return _executar_ag(t, p, tele, populacao_inicial=populacao_inicial or None, cancelamento=cancelamento)
+
+    perfil = PerfilExecucao.de_params(params)
+    if perfil is None:
+        return executar(targets, params, telemetria)
+
+    with perfil:
+        sol = executar(targets, params, telemetria)
+    sol["perfil"] = perfil.relatorio()
+    return sol
+
+
+def _executar_semana(
+    targets: Dict[str, float], params: Dict, telemetria: Telemetria | None, cancelamento=None
+) -> Dict:
+    """
+    Plano de `params["dias"]` dias numa única otimização encadeada.
+
+    - Tabela, índice e pools são carregados uma vez (cache por tabela) e
+      as metas (fuzzy) vêm prontas do chamador, iguais para todos os dias.
+    - Variedade entre dias: o uso em gramas de cada alimento nos dias já
+      gerados entra no fitness do dia seguinte (`uso_anterior_g`), com
+      decaimento geométrico `variedade_decaimento` por dia; a regra dos
+      350 g/dia ganha um segundo limite, `variedade_limite_dias_g`, sobre
+      esse uso acumulado (ver `_penal_variedade`).
+    - Aquecimento: a partir do dia 2, a população inicial reaproveita a
+      fração `aquecimento_fracao` da população final do dia anterior
+      (completada com indivíduos novos) e roda só `ger_dias_seguintes`
+      gerações (padrão: metade de `ger`).
+
+    Os dias rodam em sequência: cada dia depende do uso dos anteriores.
+    """
+    dias = int(params["dias"])
+    decaimento = float(params.get("variedade_decaimento", 0.7))
+    ger = int(params.get("ger", 200))
+    ger_seguintes = int(params.get("ger_dias_seguintes", max(1, ger // 2)))
+    seed = params.get("seed", 42)
+
+    # uma versão da tabela para a semana inteira, mesmo que ela seja trocada no meio
+    tabela = _carregar_tabela_cacheada(params["tabela_csv"], telemetria) if params.get("tabela_csv") else None
+
+    uso_anterior: Dict[str, float] = {}
+    populacao = None
+    resultados = []
+    for d in range(dias):
+        params_dia = {
+            **params,
+            "seed": seed + d if isinstance(seed, int) else seed,
+            "ger": ger if d == 0 else ger_seguintes,
+            "uso_anterior_g": dict(uso_anterior),
         }
+        saida_pop: List = []
+        sol = _executar_ag(
+            targets,
+            params_dia,
+            telemetria,
+            populacao_inicial=populacao,
+            saida_populacao=saida_pop,
+            tabela=tabela,
+            cancelamento=cancelamento,
+        )
+        resultados.append(sol)
+        populacao = saida_pop
+
+        uso_anterior = {k: v * decaimento for k, v in uso_anterior.items()}
+        for ref in sol["refeicoes"]:
+            for bloco in ref:
+                uso_anterior[bloco["id"]] = uso_anterior.get(bloco["id"], 0.0) + bloco["porcao_g"]
+
+    fits = [r["fitness"] for r in resultados]
+    fitness = {"J": sum(f["J"] for f in fits)}
+    for chave in ("kcal", "carb_g", "prot_g", "fat_g", "custo"):
+        fitness[chave] = sum(f[chave] for f in fits) / dias
+
+    return {
+        "fitness": fitness,
+        "refeicoes": resultados[0]["refeicoes"],
+        "historico": resultados[0]["historico"],
+        "tabela_versao": resultados[0]["tabela_versao"],
+        "dias": resultados,
+    }
+
+
+def _executar_ag(
+    targets: Dict[str, float],
+    params: Dict,
+    telemetria: Telemetria | None,
+    populacao_inicial: List | None = None,
+    saida_populacao: List | None = None,
+    tabela: Tuple[List[FoodItem], IndiceAlimentos] | None = None,
+    cancelamento=None,
+) -> Dict:
+    """
+    Corpo de `gerar_cardapio` (separado para poder ser envolvido pelo profiling).
+
+    `populacao_inicial` (aquecimento), `saida_populacao` (recebe a
+    população final) e `tabela` ((itens, índice) já carregados, para que
+    todos os dias usem a mesma versão) são usados pelo modo de vários dias.
+    `cancelamento` é conferido no início de cada geração.
     """
-    # semente de aleatoriedade para reprodutibilidade
-    random.seed(params.get("seed", 42))
+    tele = telemetria_opcional(telemetria)
+
+    # gerador PRÓPRIO da execução: nada de `random.seed` global, então
+    # planos gerados em paralelo (threads) não interferem entre si
+    rnd = random.Random(params.get("seed", 42))
 
     # hiperparâmetros do AG
     n_refeicoes = int(params.get("n_refeicoes", 5))
@@ -648,96 +1122,241 @@ def gerar_cardapio(targets: Dict[str, float], params: Dict) -> Dict:
     ger = int(params.get("ger", 200))
     elit = int(params.get("elit", 6))
     low_bias = float(params.get("low_kcal_bias", 0.6))
+    historico_max = max(1, int(params.get("historico_max", 10)))
+    modo_solver = params.get("porcoes", "ag") == "solver"
+    # no modo solver o genoma só escolhe alimentos: a mutação não mexe em gramas
+    taxa_porc = 0.0 if modo_solver else 0.40
+    busca = ConfigBuscaLocal.de_params(params)
+    adaptativo = ControleOperadores.de_params(params, taxa_porc)
+    motor = params.get("engine", "geracional")
+    if motor not in ("geracional", "steady"):
+        raise ValueError(f"Engine desconhecida: {motor!r} (use 'geracional' ou 'steady')")
+    if motor == "steady" and (adaptativo or (busca and busca.quando == "geracao")):
+        raise ValueError("A engine 'steady' não combina com 'adaptativo' nem com busca local por geração.")
+    dedup = bool(params.get("deduplicar", True))
+    dedup_taxa = float(params.get("dedup_taxa", 0.75))
+    crossover_fixo = _CROSSOVERS.get(params.get("crossover", "um_ponto"))
+    if crossover_fixo is None:
+        raise ValueError(f"Crossover desconhecido: {params.get('crossover')!r} (use 'um_ponto' ou 'uniforme')")
 
     # carrega tabela de alimentos
     tabela_csv = params.get("tabela_csv")
     if not tabela_csv:
         raise ValueError("Parâmetro obrigatório ausente: 'tabela_csv' com o caminho do arquivo de alimentos.")
 
-    itens = carregar_tabela_alimentos(tabela_csv)
+    if tabela is not None:
+        itens, indice = tabela
+    else:
+        with tele.etapa("carga_tabela"):
+            itens, indice = _carregar_tabela_cacheada(tabela_csv, tele)
     if not itens:
         raise RuntimeError("Tabela de alimentos vazia ou inválida.")
-    itens_idx = list(range(len(itens)))
-
-    # população inicial
-    pop = [
-        _criar_individuo(
-            n_refeicoes,
-            itens,
-            itens_idx,
-            min_itens=2,
-            max_itens=3,
-            low_kcal_bias=low_bias,
-        )
-        for _ in range(pop_size)
-    ]
+
+    # subtabela da requisição: sem banidos nem itens caros para o orçamento
+    # (genes passam a ser posições nela; ver módulo `subtabela`)
+    completo = indice
+    indice, contagens = derivar_subtabela(itens, completo, params)
+    for chave, valor in contagens.items():
+        tele.contar(f"subtabela_{chave}", valor)
+    itens_idx = indice.itens_idx
+
+    # população inicial (aquecida com parte da população anterior, se houver)
+    with tele.etapa("populacao_inicial"):
+        pop = []
+        if populacao_inicial:
+            n_aquec = int(pop_size * float(params.get("aquecimento_fracao", 0.5)))
+            aquecidos = remapear_genomas(populacao_inicial[:n_aquec], completo.itens_idx, itens_idx)
+            pop = [[r[:] for r in ind] for ind in aquecidos]
+        pop += [
+            _criar_individuo(
+                n_refeicoes,
+                itens,
+                itens_idx,
+                min_itens=2,
+                max_itens=3,
+                low_kcal_bias=low_bias,
+                indice=indice,
+                rnd=rnd,
+            )
+            for _ in range(pop_size - len(pop))
+        ]
+        if modo_solver:
+            resolver_porcoes(pop, indice, targets, params)
+
+    # acumula nº de avaliações, soma de J e de penalidade por restrição
+    detalhe: Dict[str, float] = {}
 
     def avaliar(ind):
-        return _avalia_cardapio(ind, itens_idx, itens, targets, params)
+        return _avalia_cardapio(ind, itens_idx, itens, targets, params, detalhe)
+
+    avaliador = AvaliadorIncremental(itens, itens_idx, targets, params) if busca else None
+
+    def refinar_lote(individuos):
+        for ind in individuos:
+            usadas, aceitas = refinar(ind, avaliador, indice, busca, rnd)
+            detalhe["avaliacoes_busca_local"] = detalhe.get("avaliacoes_busca_local", 0) + usadas
+            detalhe["melhorias_busca_local"] = detalhe.get("melhorias_busca_local", 0) + aceitas
 
     historico = []
 
     # loop de gerações
-    for g in range(ger):
-        # avals: (indivíduo, J, kcal, carb, prot, gord, custo)
-        avals = [(ind, *avaliar(ind)) for ind in pop]
-        avals.sort(key=lambda x: x[1])  # ordena por J (fitness) crescente
-        elite = [a[0] for a in avals[:elit]]
-
-        historico.append(
-            {
-                "ger": g,
-                "best_J": avals[0][1],
-                "kcal": avals[0][2],
-                "carb": avals[0][3],
-                "prot": avals[0][4],
-                "gord": avals[0][5],
-                "custo": avals[0][6],
-            }
-        )
+    with tele.etapa("geracoes"):
+        # gerador NumPy da seleção, derivado do gerador da execução
+        rng = np.random.default_rng(rnd.getrandbits(64))
+        ctx = {"itens": itens, "itens_idx": itens_idx, "indice": indice}
+
+        # substitutos de genomas repetidos (ver módulo `diversidade`)
+        def mutar_forte(ind):
+            return _mutar(
+                [r[:] for r in ind],
+                taxa_item=dedup_taxa,
+                taxa_porc=dedup_taxa if taxa_porc > 0 else 0.0,
+                itens_idx=itens_idx,
+                contexto=ctx,
+                rnd=rnd,
+            )
 
-        # seleção por torneio
-        def torneio(k: int = 3):
-            cand = random.sample(avals, k)
-            cand.sort(key=lambda x: x[1])
-            return cand[0][0]
-
-        filhos = elite[:]
-        ctx = {"itens": itens, "itens_idx": itens_idx}
-        while len(filhos) < pop_size:
-            p1, p2 = torneio(), torneio()
-            f1, f2 = _crossover(p1, p2)
-            f1 = _mutar(f1, itens_idx=itens_idx, contexto=ctx)
-            f2 = _mutar(f2, itens_idx=itens_idx, contexto=ctx)
-            filhos.extend([f1, f2])
-
-        # garante tamanho exato da população (caso estoure ao adicionar pares)
-        pop = filhos[:pop_size]
-
-    # melhor solução final
-    final = [(ind, *avaliar(ind)) for ind in pop]
-    final.sort(key=lambda x: x[1])
-    best, J, kcal, carb, prot, gord, custo = final[0]
+        def individuo_novo():
+            return _criar_individuo(
+                n_refeicoes, itens, itens_idx, low_kcal_bias=low_bias, indice=indice, rnd=rnd
+            )
+
+        if motor == "steady":
+            def gerar_filhos(p1, p2):
+                filhos = [
+                    _mutar(f, taxa_porc=taxa_porc, itens_idx=itens_idx, contexto=ctx, rnd=rnd)
+                    for f in crossover_fixo(p1, p2, rnd)
+                ]
+                if modo_solver:
+                    resolver_porcoes(filhos, indice, targets, params)
+                return filhos
+
+            pop, melhor_est, historico, contagem = laco_estacionario(
+                pop,
+                avaliar,
+                gerar_filhos,
+                int(params.get("avaliacoes_max", pop_size * ger + pop_size)),
+                rng,
+                torneio_k=int(params.get("torneio_k", 3)),
+                deduplicar=dedup,
+                n_candidatos=len(itens_idx),
+                historico_max=historico_max,
+                cancelamento=cancelamento,
+            )
+            detalhe["substituicoes_steady"] = contagem["substituicoes"]
+            detalhe["duplicados_descartados"] = contagem["duplicados_descartados"]
+            ger = contagem["avaliacoes"] // max(1, pop_size) - 1  # gerações equivalentes
+            # só o melhor tem avaliação guardada; os demais só entram como genoma
+            final = [(pop[0], *melhor_est)] + [(ind,) for ind in pop[1:]]
+        else:
+            duplicados = 0
+            # origem de cada indivíduo (modo adaptativo): None ou (crossover, mutação, J do melhor pai)
+            origens: List = [None] * len(pop)
+
+            for g in range(ger):
+                if cancelamento is not None:
+                    cancelamento.verificar(geracao=g, ger=ger)
+                # avals[i] = (J, kcal, carb, prot, gord, custo) de pop[i]
+                avals = [avaliar(ind) for ind in pop]
+                J_pop = np.fromiter((a[0] for a in avals), dtype=float, count=len(avals))
+                ordem = np.argsort(J_pop, kind="stable")  # ranks: ordem[0] = menor J
+                elite = elite_distinta(pop, ordem, elit) if dedup else [pop[i] for i in ordem[:elit]]
+                melhor = avals[ordem[0]]
+                if adaptativo:
+                    adaptativo.atualizar(J_pop, origens)
+
+                historico.append(
+                    {
+                        "ger": g,
+                        "best_J": melhor[0],
+                        "kcal": melhor[1],
+                        "carb": melhor[2],
+                        "prot": melhor[3],
+                        "gord": melhor[4],
+                        "custo": melhor[5],
+                        # avaliações acumuladas (completas + incrementais da busca local)
+                        "avaliacoes": detalhe.get("avaliacoes_fitness", 0) + detalhe.get("avaliacoes_busca_local", 0),
+                        "diversidade": {**medir_diversidade(pop, len(itens_idx)), "duplicados": duplicados},
+                    }
+                )
+                if adaptativo:
+                    historico[-1]["adaptacao"] = adaptativo.traco()
+
+                # etapa memética: refina a elite antes de gerar os filhos
+                if busca and busca.quando == "geracao":
+                    refinar_lote(elite[: busca.top_k])
+
+                # seleção por rank: todos os pais da geração sorteados de uma vez.
+                # Pelo tamanho da elite desta geração: com dedup, `elite_distinta`
+                # pode devolver menos que `elit` genomas e a população encolheria.
+                n_pais = 2 * ((pop_size - min(len(elite), pop_size) + 1) // 2)
+                pais = selecionar(ordem, n_pais, params, rng).tolist()
+
+                filhos = elite[:]
+                origens = [None] * len(elite)
+                for a in range(0, n_pais, 2):
+                    p1, p2 = pais[a], pais[a + 1]
+                    if not adaptativo:
+                        f1, f2 = crossover_fixo(pop[p1], pop[p2], rnd)
+                        f1 = _mutar(f1, taxa_porc=taxa_porc, itens_idx=itens_idx, contexto=ctx, rnd=rnd)
+                        f2 = _mutar(f2, taxa_porc=taxa_porc, itens_idx=itens_idx, contexto=ctx, rnd=rnd)
+                        filhos.extend([f1, f2])
+                        continue
+
+                    cx = adaptativo.sortear_crossover(rnd)
+                    J_pai = min(J_pop[p1], J_pop[p2])
+                    for f in _CROSSOVERS[cx](pop[p1], pop[p2], rnd):
+                        mut, t_item, t_porc, passo = adaptativo.sortear_mutacao(rnd)
+                        f = _mutar(
+                            f, taxa_item=t_item, taxa_porc=t_porc, itens_idx=itens_idx, contexto=ctx, rnd=rnd, passo_g=passo
+                        )
+                        filhos.append(f)
+                        origens.append((cx, mut, float(J_pai)))
+
+                # garante tamanho exato da população (caso estoure ao adicionar pares)
+                pop = filhos[:pop_size]
+                origens = origens[:pop_size]
+                if dedup:
+                    duplicados = deduplicar(pop, len(elite), mutar_forte, individuo_novo, origens)
+                    detalhe["duplicados_substituidos"] = detalhe.get("duplicados_substituidos", 0) + duplicados
+
+                # gramas dos novos indivíduos (a elite já foi resolvida)
+                if modo_solver:
+                    resolver_porcoes(pop[len(elite):], indice, targets, params)
+
+
+            # melhor solução final
+            final = [(ind, *avaliar(ind)) for ind in pop]
+            final.sort(key=lambda x: x[1])
+        best, J, kcal, carb, prot, gord, custo = final[0]
+        if saida_populacao is not None:
+            # em posições da tabela inteira, como `populacao_inicial`
+            saida_populacao.extend(remapear_genomas([a[0] for a in final], itens_idx, completo.itens_idx))
 
     # ajuste global pra aproximar das kcal alvo
-    best = _escala_para_kcal(best, itens_idx, itens, targets, fator_min=0.8, fator_max=1.8)
-    J, kcal, carb, prot, gord, custo = _avalia_cardapio(best, itens_idx, itens, targets, params)
+    with tele.etapa("escala"):
+        best = _escala_para_kcal(best, itens_idx, itens, targets, fator_min=0.8, fator_max=1.8)
+        J, kcal, carb, prot, gord, custo = avaliar(best)
+
+    # busca local final: refina os top_k (já escalados) e fica com o melhor
+    if busca and busca.quando == "final":
+        with tele.etapa("busca_local"):
+            candidatos = [best] + [
+                _escala_para_kcal(a[0], itens_idx, itens, targets, fator_min=0.8, fator_max=1.8)
+                for a in final[1 : busca.top_k]
+            ]
+            refinar_lote(candidatos)
+            best, J, kcal, carb, prot, gord, custo = min(
+                ((c, *avaliar(c)) for c in candidatos), key=lambda x: x[1]
+            )
 
     # organiza saída em formato amigável
-    refeicoes = []
-    for r in best:
-        blocos = []
-        for (idx, porcao) in r:
-            it = itens[itens_idx[idx]]
-            porcao = _safe_portion(it, porcao)
-            blocos.append(
-                {
-                    "id": it.id,
-                    "nome": it.nome,
-                    "porcao_g": porcao,
-                }
-            )
-        refeicoes.append(blocos)
+    with tele.etapa("formatacao"):
+        refeicoes = _formatar_refeicoes(best, itens, itens_idx)
+
+    tele.contar("geracoes", ger)
+    for chave, valor in detalhe.items():
+        tele.contar(chave, valor)
 
     return {
         "fitness": {
@@ -749,5 +1368,6 @@ def gerar_cardapio(targets: Dict[str, float], params: Dict) -> Dict:
             "custo": custo,
         },
         "refeicoes": refeicoes,
-        "historico": historico[-10:],  # últimas 10 gerações (pra plot/relatório)
+        "historico": historico[-historico_max:],  # últimas gerações (pra plot/relatório)
+        "tabela_versao": indice.versao,
     }
@@ -0,0 +1,182 @@
+# assets/genetic_module/indices.py
+"""
+Módulo: indices
+---------------
+
+Índices por categoria e perfil de macros sobre a tabela de alimentos,
+construídos UMA vez por tabela e reutilizados por todas as execuções do AG.
+
+Sem índice, `_criar_individuo` ordena a tabela inteira a cada indivíduo e
+`_mutar` varre a tabela toda para achar proteicos/bases de carbo, além de
+trocar itens por qualquer alimento da tabela. Com milhares de itens isso
+deixa o AG lento e faz a maioria das trocas ser absurda para o "slot"
+(ex.: trocar o arroz do almoço por azeite).
+
+Categorias (papel do alimento na refeição):
+
+    carb    → base de carboidrato (`_is_carb_base`)
+    prot    → fonte proteica (`_is_high_protein`)
+    gordura → gorduroso/oleaginosa (`_is_high_fat`)
+    neutro  → demais (frutas, legumes, folhas...)
+
+Dentro de cada categoria os itens são agrupados em faixas (quantis) de
+densidade calórica. A troca de item na mutação sorteia, na
+maioria das vezes, um alimento da MESMA categoria e MESMA faixa de kcal,
+e o restante das vezes qualquer alimento da mesma categoria.
+
+Todas as posições guardadas aqui são posições em `itens_idx`
+(ou seja, o valor que vai no gene), não índices diretos em `itens`.
+"""
+
+import random
+import threading
+from bisect import bisect_right
+from typing import Dict, List, Sequence, Tuple
+
+CATEGORIAS = ("carb", "prot", "gordura", "neutro")
+
+
+def _cortes_quantis(valores: Sequence[float], n_faixas: int) -> List[float]:
+    """Limites internos que dividem `valores` em `n_faixas` quantis."""
+    if not valores:
+        return []
+    ordenados = sorted(valores)
+    return [ordenados[(len(ordenados) * k) // n_faixas] for k in range(1, n_faixas)]
+
+
+class IndiceAlimentos:
+    """
+    Índice de candidatos por categoria / faixa de kcal.
+
+    Atributos principais:
+        categoria[pos]          → categoria do alimento na posição `pos`
+        eh_carb[pos], eh_prot[pos]
+        por_categoria[cat]      → posições de todos os itens da categoria
+        por_faixa[(cat, fk)]    → posições por faixa de kcal (fk)
+        carb / prot             → posições de bases de carbo / proteicos
+                                  (garantia mínima por refeição em `_mutar`)
+    """
+
+    def __init__(self, itens, itens_idx: List[int], faixas_kcal: int = 4) -> None:
+        # import tardio para evitar ciclo com genetic_module
+        from .genetic_module import _is_carb_base, _is_high_fat, _is_high_protein
+
+        self.itens = itens
+        self.itens_idx = itens_idx
+        n = len(itens_idx)
+
+        self.eh_carb: List[bool] = [_is_carb_base(itens[i]) for i in itens_idx]
+        self.eh_prot: List[bool] = [_is_high_protein(itens[i]) for i in itens_idx]
+        self.eh_gord: List[bool] = [_is_high_fat(itens[i]) for i in itens_idx]
+        self.kcal: List[float] = [itens[i].kcal_100g for i in itens_idx]
+
+        self.categoria: List[str] = []
+        for pos in range(n):
+            if self.eh_carb[pos]:
+                cat = "carb"
+            elif self.eh_prot[pos]:
+                cat = "prot"
+            elif self.eh_gord[pos]:
+                cat = "gordura"
+            else:
+                cat = "neutro"
+            self.categoria.append(cat)
+
+        self.por_categoria: Dict[str, List[int]] = {c: [] for c in CATEGORIAS}
+        for pos, cat in enumerate(self.categoria):
+            self.por_categoria[cat].append(pos)
+
+        # faixas de kcal por categoria (quantis calculados dentro da própria categoria);
+        # vizinhança de troca: mesma categoria e mesma faixa de kcal
+        self.faixa: List[int] = [0] * n
+        self.por_faixa: Dict[Tuple[str, int], List[int]] = {}
+        for cat, posicoes in self.por_categoria.items():
+            cortes_k = _cortes_quantis([self.kcal[p] for p in posicoes], faixas_kcal)
+            for p in posicoes:
+                fk = bisect_right(cortes_k, self.kcal[p])
+                self.faixa[p] = fk
+                self.por_faixa.setdefault((cat, fk), []).append(p)
+
+        todos = list(range(n))
+        self.carb: List[int] = [p for p in todos if self.eh_carb[p]] or todos
+        self.prot: List[int] = [p for p in todos if self.eh_prot[p]] or todos
+
+        self._pools_iniciais: Dict[float, Tuple[List[int], List[int], List[int]]] = {}
+        self._arrays_nutrientes = None
+        # versão da tabela indexada (definida pelo cache de tabelas)
+        self.versao: str | None = None
+        # `TabelaCompilada` de onde `itens` veio (None se veio do CSV)
+        self.compilada = None
+        # subíndices por requisição (ver `subtabela`), vivem com este índice
+        self._subindices: Dict = {}
+        self._subindices_lock = threading.Lock()
+
+    # ------------------------------
+    # População inicial
+    # ------------------------------
+    def pools_iniciais(self, low_kcal_bias: float) -> Tuple[List[int], List[int], List[int]]:
+        """
+        Pools (carbo, proteico, neutro) usados por `_criar_individuo`,
+        restritos à fração `low_kcal_bias` de itens menos calóricos.
+        Calculado uma vez por valor de bias.
+        """
+        chave = float(low_kcal_bias)
+        pools = self._pools_iniciais.get(chave)
+        if pools is not None:
+            return pools
+
+        ordenados = sorted(range(len(self.itens_idx)), key=lambda p: self.kcal[p])
+        corte = max(1, int(len(ordenados) * chave))
+        base = ordenados[:corte] if corte < len(ordenados) else ordenados
+
+        carb = [p for p in base if self.eh_carb[p]] or base[:]
+        prot = [p for p in base if self.eh_prot[p]] or base[:]
+        neutro = [p for p in base if not self.eh_gord[p]] or base[:]
+        pools = (carb, prot, neutro)
+        self._pools_iniciais[chave] = pools
+        return pools
+
+    def arrays_nutrientes(self):
+        """
+        Arrays NumPy por posição, usados pelo solver de porções:
+            nutr_por_g (n, 4) → kcal, carb, prot, gord por grama
+            porcao_max (n,)   → maior porção aceita por `_safe_portion`
+        Com tabela compilada, `nutr_por_g` sai direto das colunas mapeadas.
+        Calculado uma vez por índice.
+        """
+        if self._arrays_nutrientes is None:
+            import numpy as np
+
+            from .genetic_module import _safe_portion
+
+            itens = [self.itens[i] for i in self.itens_idx]
+            if self.compilada is not None:
+                linhas = np.asarray(self.itens_idx, dtype=np.intp)
+                colunas = self.compilada.colunas
+                nutr = np.stack(
+                    [colunas[c][linhas] for c in ("kcal_100g", "carb_100g", "prot_100g", "gord_100g")], axis=1
+                ).astype(float) / 100.0
+            else:
+                nutr = np.array(
+                    [(it.kcal_100g, it.carb_100g, it.prot_100g, it.gord_100g) for it in itens],
+                    dtype=float,
+                ).reshape(-1, 4) / 100.0
+            porcao_max = np.array([_safe_portion(it, 10**6) for it in itens], dtype=float)
+            self._arrays_nutrientes = (nutr, porcao_max)
+        return self._arrays_nutrientes
+
+    # ------------------------------
+    # Mutação
+    # ------------------------------
+    def vizinho(self, pos: int, rnd=random, prob_mesma_faixa: float = 0.75) -> int:
+        """
+        Sorteia um substituto para o alimento em `pos` respeitando o slot:
+        mesma categoria; com probabilidade `prob_mesma_faixa`, também a
+        mesma faixa de densidade calórica.
+        """
+        cat = self.categoria[pos]
+        if rnd.random() < prob_mesma_faixa:
+            pool = self.por_faixa.get((cat, self.faixa[pos]))
+            if pool and len(pool) > 1:
+                return rnd.choice(pool)
+        return rnd.choice(self.por_categoria[cat])
@@ -0,0 +1,287 @@
+# assets/genetic_module/pareto.py
+"""
+Módulo: pareto
+--------------
+
+Modo multiobjetivo do AG (`ag: {"modo": "pareto"}`), no estilo NSGA-II.
+
+Em vez de um único J com o custo além do orçamento somado, cada cardápio
+tem dois objetivos a minimizar:
+
+    f1 = erro nutricional (o mesmo J do fitness, sem o termo de orçamento)
+    f2 = custo do dia
+
+A seleção usa ordenação não dominada + distância de aglomeração, e a
+execução devolve uma FRENTE de Pareto: do plano mais barato ao mais
+preciso. Qualquer orçamento pode então ser atendido escolhendo um plano
+da frente (`escolher_da_frente`), sem rodar o AG de novo — o core_engine
+guarda a frente em cache e responde assim a mudanças de `orcamento_max`.
+
+A ordenação e a aglomeração são vetorizadas com NumPy (matriz de
+dominância n×n), o que é barato para populações de algumas centenas.
+"""
+
+import random
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+# ============================================================
+#        Ordenação não dominada e distância de aglomeração
+# ============================================================
+def ordenacao_nao_dominada(F: np.ndarray) -> np.ndarray:
+    """
+    Rank de Pareto de cada linha de `F` (n, m), objetivos a minimizar.
+    Rank 0 = frente não dominada; rank k = não dominada após remover
+    as frentes 0..k-1.
+    """
+    n = F.shape[0]
+    menor_igual = (F[:, None, :] <= F[None, :, :]).all(axis=2)
+    menor = (F[:, None, :] < F[None, :, :]).any(axis=2)
+    domina = menor_igual & menor                       # domina[i, j]: i domina j
+    n_dominadores = domina.sum(axis=0)
+
+    rank = np.full(n, -1, dtype=np.intp)
+    restante = np.ones(n, dtype=bool)
+    r = 0
+    while restante.any():
+        frente = restante & (n_dominadores == 0)
+        rank[frente] = r
+        restante &= ~frente
+        n_dominadores = n_dominadores - domina[frente].sum(axis=0)
+        r += 1
+    return rank
+
+
+def distancia_aglomeracao(F: np.ndarray, rank: np.ndarray) -> np.ndarray:
+    """Distância de aglomeração (NSGA-II) calculada dentro de cada frente."""
+    n, m = F.shape
+    dist = np.zeros(n)
+    for r in np.unique(rank):
+        membros = np.flatnonzero(rank == r)
+        if len(membros) <= 2:
+            dist[membros] = np.inf
+            continue
+        Fr = F[membros]
+        for k in range(m):
+            ordem = np.argsort(Fr[:, k], kind="stable")
+            v = Fr[ordem, k]
+            amplitude = v[-1] - v[0]
+            d = np.empty(len(membros))
+            d[[0, -1]] = np.inf
+            d[1:-1] = (v[2:] - v[:-2]) / amplitude if amplitude > 0 else 0.0
+            dist[membros[ordem]] += d
+    return dist
+
+
+def selecionar_sobreviventes(F: np.ndarray, n: int) -> np.ndarray:
+    """
+    Índices dos `n` melhores de `F` pelo critério do NSGA-II:
+    menor rank e, em caso de empate, maior distância de aglomeração.
+    """
+    rank = ordenacao_nao_dominada(F)
+    dist = distancia_aglomeracao(F, rank)
+    ordem = np.lexsort((-dist, rank))
+    return ordem[:n]
+
+
+# ============================================================
+#                 Escolha de um plano da frente
+# ============================================================
+def escolher_da_frente(frente: List[Dict], orcamento_max: float, peso_custo: float = 1.0) -> Dict:
+    """
+    Plano da frente para um orçamento: o de menor erro entre os que cabem
+    no orçamento; se nenhum couber, o mais barato. O "fitness" devolvido
+    traz J = erro + peso_custo × excesso de custo (como no modo padrão).
+    """
+    cabem = [p for p in frente if p["fitness"]["custo"] <= orcamento_max]
+    if cabem:
+        plano = min(cabem, key=lambda p: p["fitness"]["erro"])
+    else:
+        plano = min(frente, key=lambda p: p["fitness"]["custo"])
+
+    fit = dict(plano["fitness"])
+    fit["J"] = fit["erro"] + peso_custo * max(0.0, fit["custo"] - orcamento_max)
+    return {"fitness": fit, "refeicoes": plano["refeicoes"]}
+
+
+def _afinar_frente(frente: List[Dict], frente_max: int) -> List[Dict]:
+    """Mantém no máximo `frente_max` planos espalhados ao longo do custo."""
+    if len(frente) <= frente_max:
+        return frente
+    posicoes = np.linspace(0, len(frente) - 1, frente_max).round().astype(int)
+    return [frente[i] for i in sorted(set(posicoes.tolist()))]
+
+
+# ============================================================
+#                       Laço NSGA-II
+# ============================================================
+def executar_pareto(targets: Dict[str, float], params: Dict, telemetria=None, cancelamento=None) -> Dict:
+    """
+    Corpo de `gerar_cardapio` no modo pareto. Mesmos operadores, tabela,
+    índice e parâmetros do modo padrão; muda só a seleção (μ+λ com
+    ordenação não dominada) e o retorno, que ganha:
+
+        "frente": [ {"fitness": {"erro", "J", "kcal", ..., "custo"},
+                     "refeicoes": [...]}, ... ]   # ordenada por custo
+
+    "fitness"/"refeicoes" são do plano escolhido para `orcamento_max`.
+    Parâmetros próprios: `frente_max` (padrão 30). `cancelamento` é
+    conferido no início de cada geração.
+    """
+    from .genetic_module import (
+        _avalia_cardapio,
+        _carregar_tabela_cacheada,
+        _criar_individuo,
+        _crossover,
+        _escala_para_kcal,
+        _formatar_refeicoes,
+        _mutar,
+        resolver_porcoes,
+        telemetria_opcional,
+    )
+    from .subtabela import derivar_subtabela
+
+    tele = telemetria_opcional(telemetria)
+    rnd = random.Random(params.get("seed", 42))
+
+    n_refeicoes = int(params.get("n_refeicoes", 5))
+    pop_size = int(params.get("pop", 120))
+    ger = int(params.get("ger", 200))
+    low_bias = float(params.get("low_kcal_bias", 0.6))
+    historico_max = max(1, int(params.get("historico_max", 10)))
+    frente_max = max(1, int(params.get("frente_max", 30)))
+    modo_solver = params.get("porcoes", "ag") == "solver"
+    taxa_porc = 0.0 if modo_solver else 0.40
+    orcamento = float(params.get("orcamento_max", float("inf")))
+    peso_custo = float(tuple(params.get("pesos", (4.0, 3.2, 1.8, 1.2, 1.0)))[4])
+
+    tabela_csv = params.get("tabela_csv")
+    if not tabela_csv:
+        raise ValueError("Parâmetro obrigatório ausente: 'tabela_csv' com o caminho do arquivo de alimentos.")
+
+    with tele.etapa("carga_tabela"):
+        itens, indice = _carregar_tabela_cacheada(tabela_csv, tele)
+    if not itens:
+        raise RuntimeError("Tabela de alimentos vazia ou inválida.")
+
+    # o custo é um objetivo próprio: o erro não leva o termo de orçamento
+    params_erro = {**params, "orcamento_max": float("inf")}
+
+    # a frente cobre todos os orçamentos: a subtabela só tira os banidos
+    indice, contagens = derivar_subtabela(itens, indice, params_erro)
+    for chave, valor in contagens.items():
+        tele.contar(f"subtabela_{chave}", valor)
+    itens_idx = indice.itens_idx
+    detalhe: Dict[str, float] = {}
+
+    def avaliar(ind) -> Tuple:
+        return _avalia_cardapio(ind, itens_idx, itens, targets, params_erro, detalhe)
+
+    def objetivos(avals: List[Tuple]) -> np.ndarray:
+        return np.array([(a[0], a[5]) for a in avals], dtype=float).reshape(-1, 2)
+
+    with tele.etapa("populacao_inicial"):
+        pop = [
+            _criar_individuo(
+                n_refeicoes, itens, itens_idx, min_itens=2, max_itens=3, low_kcal_bias=low_bias, indice=indice, rnd=rnd
+            )
+            for _ in range(pop_size)
+        ]
+        if modo_solver:
+            resolver_porcoes(pop, indice, targets, params)
+
+    historico = []
+    ctx = {"itens": itens, "itens_idx": itens_idx, "indice": indice}
+
+    with tele.etapa("geracoes"):
+        avals = [avaliar(ind) for ind in pop]
+        for g in range(ger):
+            if cancelamento is not None:
+                cancelamento.verificar(geracao=g, ger=ger)
+            F = objetivos(avals)
+            rank = ordenacao_nao_dominada(F)
+            dist = distancia_aglomeracao(F, rank)
+
+            frente0 = np.flatnonzero(rank == 0)
+            historico.append(
+                {
+                    "ger": g,
+                    "tamanho_frente": int(len(frente0)),
+                    "menor_erro": float(F[frente0, 0].min()),
+                    "menor_custo": float(F[frente0, 1].min()),
+                }
+            )
+
+            # torneio binário por (rank, -aglomeração)
+            def torneio():
+                i, j = rnd.randrange(pop_size), rnd.randrange(pop_size)
+                if rank[i] != rank[j]:
+                    return pop[i] if rank[i] < rank[j] else pop[j]
+                return pop[i] if dist[i] >= dist[j] else pop[j]
+
+            filhos = []
+            while len(filhos) < pop_size:
+                f1, f2 = _crossover(torneio(), torneio(), rnd)
+                filhos.append(_mutar(f1, taxa_porc=taxa_porc, itens_idx=itens_idx, contexto=ctx, rnd=rnd))
+                filhos.append(_mutar(f2, taxa_porc=taxa_porc, itens_idx=itens_idx, contexto=ctx, rnd=rnd))
+            filhos = filhos[:pop_size]
+            if modo_solver:
+                resolver_porcoes(filhos, indice, targets, params)
+
+            # (μ + λ): pais e filhos disputam as vagas
+            todos = pop + filhos
+            avals_todos = avals + [avaliar(f) for f in filhos]
+            manter = selecionar_sobreviventes(objetivos(avals_todos), pop_size)
+            pop = [todos[i] for i in manter]
+            avals = [avals_todos[i] for i in manter]
+
+    with tele.etapa("escala"):
+        rank = ordenacao_nao_dominada(objetivos(avals))
+        candidatos = []
+        vistos = set()
+        for i in np.flatnonzero(rank == 0):
+            ind = _escala_para_kcal(pop[i], itens_idx, itens, targets, fator_min=0.8, fator_max=1.8)
+            chave = tuple(tuple(r) for r in ind)
+            if chave in vistos:
+                continue
+            vistos.add(chave)
+            candidatos.append((ind, avaliar(ind)))
+
+        # a escala muda custo e erro: refiltra os não dominados
+        rank_final = ordenacao_nao_dominada(objetivos([a for _, a in candidatos]))
+        candidatos = [c for c, r in zip(candidatos, rank_final) if r == 0]
+        candidatos.sort(key=lambda c: c[1][5])
+
+    with tele.etapa("formatacao"):
+        frente = []
+        for ind, (erro, kcal, carb, prot, gord, custo) in candidatos:
+            frente.append(
+                {
+                    "fitness": {
+                        "erro": erro,
+                        "J": erro,
+                        "kcal": kcal,
+                        "carb_g": carb,
+                        "prot_g": prot,
+                        "fat_g": gord,
+                        "custo": custo,
+                    },
+                    "refeicoes": _formatar_refeicoes(ind, itens, itens_idx),
+                }
+            )
+        frente = _afinar_frente(frente, frente_max)
+        escolhido = escolher_da_frente(frente, orcamento, peso_custo)
+
+    tele.contar("geracoes", ger)
+    for chave, valor in detalhe.items():
+        tele.contar(chave, valor)
+
+    return {
+        "fitness": escolhido["fitness"],
+        "refeicoes": escolhido["refeicoes"],
+        "historico": historico[-historico_max:],
+        "tabela_versao": indice.versao,
+        "frente": frente,
+    }
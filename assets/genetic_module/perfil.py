@@ -0,0 +1,191 @@
+# assets/genetic_module/perfil.py
+"""
+Módulo: perfil
+--------------
+
+Modo de profiling embutido para UMA execução do AG
+(`ag: {"profile": true}`), sem precisar envolver o código à mão.
+
+Coleta, conforme as opções:
+
+- cProfile/pstats      → top-N funções por tempo próprio (tottime)
+- tracemalloc          → top-N linhas por memória alocada + pico
+- amostragem de pilhas → arquivo "collapsed stacks" (uma pilha por linha,
+                         `a;b;c contagem`), aceito por flamegraph.pl,
+                         speedscope, inferno etc.
+
+Opções lidas de `params` (todas opcionais, exceto `profile`):
+
+    "profile": True,
+    "profile_top": 15,                  # quantos hotspots anexar
+    "profile_pstats": "run.pstats",     # salva o dump binário do cProfile
+    "profile_tracemalloc": False,       # amostra alocações
+    "profile_flamegraph": "run.folded", # salva pilhas amostradas
+    "profile_intervalo_ms": 5.0,        # intervalo de amostragem das pilhas
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from typing import Dict, List, Optional
+
+
+class _AmostradorPilhas(threading.Thread):
+    """
+    Thread que amostra periodicamente a pilha de outra thread
+    (`sys._current_frames`) e conta pilhas idênticas.
+    """
+
+    def __init__(self, thread_alvo: int, intervalo_s: float) -> None:
+        super().__init__(name="nutribot-amostrador-pilhas", daemon=True)
+        self.thread_alvo = thread_alvo
+        self.intervalo_s = intervalo_s
+        self.contagens: Dict[str, int] = {}
+        self._parar = threading.Event()
+
+    @staticmethod
+    def _rotulo(frame) -> str:
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+    def run(self) -> None:
+        while not self._parar.wait(self.intervalo_s):
+            frame = sys._current_frames().get(self.thread_alvo)
+            if frame is None:
+                continue
+            pilha: List[str] = []
+            while frame is not None:
+                pilha.append(self._rotulo(frame))
+                frame = frame.f_back
+            chave = ";".join(reversed(pilha))  # raiz → folha
+            self.contagens[chave] = self.contagens.get(chave, 0) + 1
+
+    def parar(self) -> None:
+        self._parar.set()
+        self.join()
+
+    def salvar(self, caminho: str) -> None:
+        with open(caminho, "w", encoding="utf-8") as f:
+            for pilha, n in sorted(self.contagens.items()):
+                f.write(f"{pilha} {n}\n")
+
+
+class PerfilExecucao:
+    """
+    Context manager que liga os coletores pedidos em `params` durante
+    a execução do AG e monta um relatório serializável ao final.
+    """
+
+    def __init__(
+        self,
+        top: int = 15,
+        arquivo_pstats: Optional[str] = None,
+        usar_tracemalloc: bool = False,
+        arquivo_flamegraph: Optional[str] = None,
+        intervalo_ms: float = 5.0,
+    ) -> None:
+        self.top = max(1, int(top))
+        self.arquivo_pstats = arquivo_pstats
+        self.usar_tracemalloc = usar_tracemalloc
+        self.arquivo_flamegraph = arquivo_flamegraph
+        self.intervalo_ms = float(intervalo_ms)
+
+        self._prof = cProfile.Profile()
+        self._amostrador: Optional[_AmostradorPilhas] = None
+        self._tracemalloc_proprio = False
+        self._snapshot = None
+        self._pico_tracemalloc = 0
+
+    @classmethod
+    def de_params(cls, params: Dict) -> Optional["PerfilExecucao"]:
+        """Cria o perfil a partir de `params`; None se `profile` não estiver ligado."""
+        if not params.get("profile"):
+            return None
+        return cls(
+            top=params.get("profile_top", 15),
+            arquivo_pstats=params.get("profile_pstats"),
+            usar_tracemalloc=bool(params.get("profile_tracemalloc", False)),
+            arquivo_flamegraph=params.get("profile_flamegraph"),
+            intervalo_ms=params.get("profile_intervalo_ms", 5.0),
+        )
+
+    # ------------------------------
+    # Ciclo de vida
+    # ------------------------------
+    def __enter__(self) -> "PerfilExecucao":
+        if self.usar_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracemalloc_proprio = True
+        if self.usar_tracemalloc:
+            tracemalloc.reset_peak()
+        if self.arquivo_flamegraph:
+            self._amostrador = _AmostradorPilhas(threading.get_ident(), self.intervalo_ms / 1000.0)
+            self._amostrador.start()
+        self._prof.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._prof.disable()
+        if self._amostrador is not None:
+            self._amostrador.parar()
+            self._amostrador.salvar(self.arquivo_flamegraph)
+        if self.usar_tracemalloc:
+            self._snapshot = tracemalloc.take_snapshot()
+            self._pico_tracemalloc = tracemalloc.get_traced_memory()[1]
+            if self._tracemalloc_proprio:
+                tracemalloc.stop()
+        if self.arquivo_pstats:
+            self._prof.dump_stats(self.arquivo_pstats)
+
+    # ------------------------------
+    # Relatório
+    # ------------------------------
+    def _hotspots(self) -> List[Dict]:
+        stats = pstats.Stats(self._prof)
+        linhas = []
+        for (arquivo, linha, funcao), (_cc, nc, tt, ct, _callers) in stats.stats.items():
+            linhas.append(
+                {
+                    "funcao": f"{os.path.basename(arquivo)}:{linha}({funcao})",
+                    "chamadas": nc,
+                    "tottime_s": tt,
+                    "cumtime_s": ct,
+                }
+            )
+        linhas.sort(key=lambda x: x["tottime_s"], reverse=True)
+        return linhas[: self.top]
+
+    def _alocacoes(self) -> List[Dict]:
+        if self._snapshot is None:
+            return []
+        filtro = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        top = self._snapshot.filter_traces(filtro).statistics("lineno")[: self.top]
+        return [
+            {
+                "local": f"{os.path.basename(st.traceback[0].filename)}:{st.traceback[0].lineno}",
+                "kib": st.size / 1024.0,
+                "blocos": st.count,
+            }
+            for st in top
+        ]
+
+    def relatorio(self) -> Dict:
+        """Resumo anexado ao resultado do AG em `sol["perfil"]`."""
+        stats = pstats.Stats(self._prof)
+        rel: Dict = {
+            "tempo_total_s": stats.total_tt,
+            "chamadas_total": stats.total_calls,
+            "hotspots": self._hotspots(),
+        }
+        if self.usar_tracemalloc:
+            rel["alocacoes"] = self._alocacoes()
+            rel["pico_tracemalloc_kib"] = self._pico_tracemalloc / 1024.0
+        if self.arquivo_pstats:
+            rel["arquivo_pstats"] = self.arquivo_pstats
+        if self._amostrador is not None:
+            rel["arquivo_flamegraph"] = self.arquivo_flamegraph
+            rel["amostras_pilha"] = sum(self._amostrador.contagens.values())
+        return rel
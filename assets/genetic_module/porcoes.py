@@ -0,0 +1,112 @@
+# assets/genetic_module/porcoes.py
+"""
+Módulo: porcoes
+---------------
+
+Solver exato de porções para o modo híbrido do AG
+(`ag: {"porcoes": "solver"}`): o AG escolhe QUAIS alimentos entram em cada
+refeição e um mínimo-quadrados limitado escolhe QUANTOS gramas.
+
+Para cada indivíduo, com x_g = gramas do gene g:
+
+    min  Σ_k ω_k · (u_k · (Σ_g a_gk x_g − T_k))²                (metas globais)
+       + ω_c · Σ_ref (4 · max(0, Mc − Σ_{g∈ref} c_g x_g))²       (mín. carbo / refeição)
+       + ω_p · Σ_ref (4 · max(0, Mp − Σ_{g∈ref} p_g x_g))²       (mín. proteína / refeição)
+    s.a. 20 ≤ x_g ≤ porção máxima de `_safe_portion` para o item
+
+  - a_gk : kcal, carb, prot, gord por grama do alimento do gene g
+  - u    : (1, 4, 4, 9) → resíduos em "kcal equivalentes"
+  - ω    : pesos (α, β, γ, δ) de `params["pesos"]`, os mesmos do fitness
+  - Mc/Mp: `meal_carb_min` / `meal_prot_min`; ω_c/ω_p derivados de
+           `meal_carb_weight` / `meal_prot_weight`
+
+Resolvido por gradiente projetado acelerado (FISTA) com passo 1/L, onde L
+é um limitante do maior autovalor da Hessiana (traço). A população inteira
+é resolvida de uma vez com arrays (P, G) — genes faltantes entram com
+limites [0, 0] e não afetam nada.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+# resíduos de cada macro em "kcal equivalentes"
+_KCAL_POR_G = np.array([1.0, 4.0, 4.0, 9.0])
+
+
+def resolver_porcoes(pop: List, indice, targets: Dict[str, float], params: Dict) -> None:
+    """
+    Recalcula, NO LUGAR, as porções de todos os indivíduos de `pop`
+    mantendo os alimentos escolhidos. As porções atuais servem de ponto
+    de partida; o resultado é arredondado para gramas inteiros e passa por
+    `_safe_portion` (mesmos limites usados no fitness).
+    """
+    from .genetic_module import _safe_portion
+
+    if not pop:
+        return
+
+    nutr_por_g, porcao_max = indice.arrays_nutrientes()
+    itens, itens_idx = indice.itens, indice.itens_idx
+
+    P = len(pop)
+    G = max(sum(len(ref) for ref in ind) for ind in pop)
+    M = max(len(ind) for ind in pop)
+
+    pos = np.zeros((P, G), dtype=np.intp)
+    x0 = np.zeros((P, G))
+    ativo = np.zeros((P, G), dtype=bool)
+    refeicao = np.zeros((P, G), dtype=np.intp)
+    for p, ind in enumerate(pop):
+        g = 0
+        for m, ref in enumerate(ind):
+            for (idx, por) in ref:
+                pos[p, g] = idx
+                x0[p, g] = por
+                ativo[p, g] = True
+                refeicao[p, g] = m
+                g += 1
+
+    A = nutr_por_g[pos] * ativo[..., None]                # (P, G, 4)
+    lo = np.where(ativo, 20.0, 0.0)
+    hi = np.where(ativo, porcao_max[pos], 0.0)
+    E = (refeicao[..., None] == np.arange(M)) & ativo[..., None]   # (P, G, M)
+    c = A[..., 1]
+    pr = A[..., 2]
+
+    T = np.array([targets["kcal"], targets["carb_g"], targets["prot_g"], targets["fat_g"]], dtype=float)
+    alfa, beta, gama, delta = tuple(params.get("pesos", (4.0, 3.2, 1.8, 1.2, 1.0)))[:4]
+    w = np.array([alfa, beta, gama, delta]) * _KCAL_POR_G**2
+    Mc = float(params.get("meal_carb_min", 45.0))
+    Mp = float(params.get("meal_prot_min", 15.0))
+    wc = float(params.get("meal_carb_weight", 14.0)) / 4.0 * 16.0
+    wp = float(params.get("meal_prot_weight", 10.0)) / 4.0 * 16.0
+
+    # limitante de Lipschitz do gradiente (traço da Hessiana), por indivíduo
+    L = 2.0 * (np.einsum("pgk,k->p", A**2, w) + wc * (c**2).sum(1) + wp * (pr**2).sum(1))
+    passo = (1.0 / np.maximum(L, 1e-12))[:, None]
+
+    x = np.clip(x0, lo, hi)
+    y = x.copy()
+    t = 1.0
+    for _ in range(int(params.get("solver_iteracoes", 60))):
+        r = np.einsum("pg,pgk->pk", y, A) - T
+        grad = 2.0 * np.einsum("pk,pgk->pg", r * w, A)
+
+        def_c = np.maximum(Mc - np.einsum("pg,pgm->pm", y * c, E), 0.0)
+        def_p = np.maximum(Mp - np.einsum("pg,pgm->pm", y * pr, E), 0.0)
+        grad -= 2.0 * wc * np.einsum("pm,pgm->pg", def_c, E) * c
+        grad -= 2.0 * wp * np.einsum("pm,pgm->pg", def_p, E) * pr
+
+        x_novo = np.clip(y - passo * grad, lo, hi)
+        t_novo = (1.0 + np.sqrt(1.0 + 4.0 * t * t)) / 2.0
+        y = x_novo + ((t - 1.0) / t_novo) * (x_novo - x)
+        x, t = x_novo, t_novo
+
+    gramas = np.rint(x).astype(int).tolist()
+    for p, ind in enumerate(pop):
+        g = 0
+        for ref in ind:
+            for j, (idx, _por) in enumerate(ref):
+                ref[j] = (idx, _safe_portion(itens[itens_idx[idx]], gramas[p][g]))
+                g += 1
@@ -0,0 +1,216 @@
+# assets/genetic_module/restricoes.py
+"""
+Módulo: restricoes
+------------------
+
+Motor de restrições alimentares ("banidos"), construído UMA vez por
+tabela e compartilhado por todas as execuções.
+
+Antes, `_violacao_restricoes` fazia `b in nome` para cada termo banido,
+para cada alimento, a cada avaliação de fitness — custo termos × itens ×
+avaliações — e comparava o texto cru: "glúten" e "gluten", "camarão" e
+"camarao" davam resultados diferentes. Além disso "lactose" não batia em
+nada (nenhum alimento se chama "lactose"), então a restrição era ignorada.
+
+Agora:
+
+  - nomes, tags e termos passam por `normalizar` (NFKD sem acentos,
+    minúsculas, pontuação → espaço);
+  - cada termo é expandido pelo seu grupo de sinônimos (`SINONIMOS`, ex.:
+    lactose → leite, queijo, iogurte, ... e a tag "laticinio"); tags de
+    isenção (`ISENCOES`, ex.: "sem_gluten") tiram o alimento do grupo;
+  - o casamento continua sendo "fragmento no nome ou tag igual", mas sobre
+    um índice invertido: os padrões de uma palavra viram UMA expressão
+    regular (alternância) aplicada ao vocabulário de palavras dos nomes —
+    bem menor que a tabela — e as posições vêm das listas do índice;
+    padrões com espaço são procurados nos nomes completos;
+  - o resultado é uma máscara (tupla de bool por índice em `itens`),
+    guardada em cache por conjunto de termos. A avaliação de fitness só
+    consulta `mascara[i]`.
+
+Uso:
+    banido = mascara_restricoes(itens, params.get("restricoes", {}))
+    if banido is not None and banido[i]: ...
+"""
+
+import re
+import threading
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+# termo (normalizado) → padrões equivalentes; cada padrão vale para o nome
+# (fragmento) e para as tags (igualdade, com espaço → "_")
+SINONIMOS: Dict[str, Tuple[str, ...]] = {
+    "lactose": (
+        "leite", "queijo", "iogurte", "requeijao", "ricota", "cottage",
+        "skyr", "manteiga", "nata", "coalhada", "kefir", "laticinio",
+    ),
+    "gluten": (
+        "trigo", "centeio", "cevada", "malte", "pao", "macarrao",
+        "massa", "biscoito", "bolacha", "granola",
+    ),
+    "frutos do mar": (
+        "camarao", "lagosta", "marisco", "mexilhao", "ostra", "lula",
+        "polvo", "caranguejo",
+    ),
+    "oleaginosas": (
+        "amendoim", "castanha", "nozes", "amendoa", "avela", "pistache",
+        "macadamia", "oleaginosa",
+    ),
+}
+# aliases que apontam para o mesmo grupo
+SINONIMOS["laticinios"] = SINONIMOS["lactose"]
+SINONIMOS["leite"] = SINONIMOS["lactose"]
+SINONIMOS["frutos_do_mar"] = SINONIMOS["frutos do mar"]
+SINONIMOS["mariscos"] = SINONIMOS["frutos do mar"]
+SINONIMOS["castanhas"] = SINONIMOS["oleaginosas"]
+
+# termo (normalizado) → tags que isentam o alimento daquele termo
+ISENCOES: Dict[str, Tuple[str, ...]] = {
+    "lactose": ("sem_lactose", "zero_lactose"),
+    "laticinios": ("sem_lactose", "zero_lactose"),
+    "leite": ("sem_lactose", "zero_lactose"),
+    "gluten": ("sem_gluten",),
+}
+
+_MAX_MASCARAS = 256   # conjuntos de termos por tabela
+_MAX_TABELAS = 8
+
+_NAO_PALAVRA = re.compile(r"[^0-9a-z_]+")
+
+
+def normalizar(texto: str) -> str:
+    """'Camarão-Rosa ' → 'camarao rosa' (NFKD sem acentos, minúsculas, pontuação → espaço)."""
+    decomposto = unicodedata.normalize("NFKD", str(texto))
+    sem_acento = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return _NAO_PALAVRA.sub(" ", sem_acento.casefold()).strip()
+
+
+def normalizar_termos(termos: Iterable) -> FrozenSet[str]:
+    """Conjunto canônico de termos banidos (normalizados, sem vazios)."""
+    return frozenset(t for t in (normalizar(b) for b in termos or ()) if t)
+
+
+class MotorRestricoes:
+    """
+    Índice de uma tabela para casar termos banidos.
+
+    Atributos:
+        nomes[i]            → nome normalizado de itens[i]
+        por_palavra[palavra]→ índices dos itens com a palavra no nome
+        por_tag[tag]        → índices dos itens com a tag
+    """
+
+    def __init__(self, itens: Sequence) -> None:
+        self.n = len(itens)
+        self.nomes: List[str] = [normalizar(it.nome) for it in itens]
+        self.por_palavra: Dict[str, List[int]] = {}
+        self.por_tag: Dict[str, List[int]] = {}
+        for i, (nome, it) in enumerate(zip(self.nomes, itens)):
+            for palavra in set(nome.split()):
+                self.por_palavra.setdefault(palavra, []).append(i)
+            for tag in {normalizar(t).replace(" ", "_") for t in it.tags}:
+                if tag:
+                    self.por_tag.setdefault(tag, []).append(i)
+
+        self._lock = threading.Lock()
+        self._mascaras: Dict[FrozenSet[str], Tuple[bool, ...]] = {}
+        # entrada crua (tupla de banidos como veio em params) → máscara:
+        # evita normalizar os termos a cada avaliação
+        self._por_entrada: Dict[Tuple, Tuple[bool, ...]] = {}
+
+    # ------------------------------
+    # Casamento
+    # ------------------------------
+    def _casar(self, padroes: Set[str]) -> Set[int]:
+        """Índices cujo nome contém algum padrão ou que têm alguma tag igual a um padrão."""
+        achados: Set[int] = set()
+        palavra_unica = [p for p in padroes if " " not in p]
+        com_espaco = [p for p in padroes if " " in p]
+
+        if palavra_unica:
+            # mais longos primeiro: a alternância para no primeiro que casar
+            rx = re.compile("|".join(re.escape(p) for p in sorted(palavra_unica, key=len, reverse=True)))
+            for palavra, posicoes in self.por_palavra.items():
+                if rx.search(palavra):
+                    achados.update(posicoes)
+        if com_espaco:
+            rx = re.compile("|".join(re.escape(p) for p in com_espaco))
+            achados.update(i for i, nome in enumerate(self.nomes) if rx.search(nome))
+
+        for p in padroes:
+            achados.update(self.por_tag.get(p.replace(" ", "_"), ()))
+        return achados
+
+    def compilar(self, termos: FrozenSet[str]) -> Tuple[bool, ...]:
+        """Máscara de itens banidos por `termos` (já normalizados), sem cache."""
+        banidos: Set[int] = set()
+        for termo in termos:
+            padroes = {termo, *SINONIMOS.get(termo, ())}
+            achados = self._casar(padroes)
+            for tag in ISENCOES.get(termo, ()):
+                achados.difference_update(self.por_tag.get(tag, ()))
+            banidos |= achados
+        return tuple(i in banidos for i in range(self.n))
+
+    def mascara(self, banidos: Sequence) -> Optional[Tuple[bool, ...]]:
+        """
+        Máscara (tupla de bool por índice em `itens`) para a lista de
+        banidos, em cache. None quando não há termo a banir.
+        """
+        entrada = tuple(banidos)
+        m = self._por_entrada.get(entrada)
+        if m is not None:
+            return m
+        termos = normalizar_termos(entrada)
+        if not termos:
+            return None
+        with self._lock:
+            m = self._mascaras.get(termos)
+            if m is None:
+                if len(self._mascaras) >= _MAX_MASCARAS:
+                    self._mascaras.pop(next(iter(self._mascaras)))
+                m = self._mascaras[termos] = self.compilar(termos)
+            if len(self._por_entrada) >= _MAX_MASCARAS:
+                self._por_entrada.pop(next(iter(self._por_entrada)))
+            self._por_entrada[entrada] = m
+        return m
+
+
+# Motores por tabela: id(itens) → (itens, motor). A referência à lista
+# impede que o id seja reaproveitado por outra tabela enquanto a entrada
+# existir. Leitura sem lock (dict do CPython); a construção é serializada.
+_MOTORES: Dict[int, Tuple[Sequence, MotorRestricoes]] = {}
+_motores_lock = threading.Lock()
+
+
+def motor_da_tabela(itens: Sequence) -> MotorRestricoes:
+    """`MotorRestricoes` da lista de alimentos (construído uma vez por tabela)."""
+    entrada = _MOTORES.get(id(itens))
+    if entrada is not None and entrada[0] is itens:
+        return entrada[1]
+    with _motores_lock:
+        entrada = _MOTORES.get(id(itens))
+        if entrada is not None and entrada[0] is itens:
+            return entrada[1]
+        if len(_MOTORES) >= _MAX_TABELAS:
+            _MOTORES.pop(next(iter(_MOTORES)))
+        motor = MotorRestricoes(itens)
+        _MOTORES[id(itens)] = (itens, motor)
+    return motor
+
+
+def esquecer_tabela(itens: Sequence) -> None:
+    """Descarta o motor de uma tabela substituída (chamado na troca de versão)."""
+    with _motores_lock:
+        entrada = _MOTORES.get(id(itens))
+        if entrada is not None and entrada[0] is itens:
+            del _MOTORES[id(itens)]
+
+
+def mascara_restricoes(itens: Sequence, restricoes: Dict) -> Optional[Tuple[bool, ...]]:
+    """Máscara de banidos de `restricoes["banidos"]` sobre `itens` (None = nada banido)."""
+    banidos = (restricoes or {}).get("banidos")
+    if not banidos:
+        return None
+    return motor_da_tabela(itens).mascara(banidos)
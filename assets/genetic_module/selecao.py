@@ -0,0 +1,85 @@
+# assets/genetic_module/selecao.py
+"""
+Módulo: selecao
+---------------
+
+Seleção de pais do AG trabalhando só com RANKS (posições na ordenação
+por J), sorteados de uma vez para a geração inteira com NumPy.
+
+Antes, cada filho custava dois `torneio()`, cada um com `random.sample`
+sobre tuplas de 7 campos e um `sort` dos candidatos. Como a população já
+é ordenada por J a cada geração, o vencedor de um torneio é simplesmente
+o candidato de MENOR rank — basta sortear posições e tirar o mínimo.
+
+Métodos (`params["selecao"]`):
+
+    "torneio" (padrão) → torneio de tamanho `torneio_k` (padrão 3), sem
+                         reposição dentro do torneio — mesma distribuição
+                         (mesma pressão seletiva) do torneio anterior:
+                         P(rank r) = C(n-1-r, k-1) / C(n, k)
+    "sus"              → amostragem universal estocástica sobre pesos de
+                         ranking linear com pressão `pressao_sus` (1–2):
+                         w(r) = (s - 2(s-1)·r/(n-1)) / n
+"""
+
+from typing import Dict
+
+import numpy as np
+
+
+def torneio_por_rank(n: int, n_sel: int, k: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Ranks vencedores de `n_sel` torneios de tamanho `k` sobre `n`
+    indivíduos, sem repetição de candidato dentro de cada torneio.
+
+    Sorteia com reposição e ressorteia só as linhas com candidato
+    repetido (raras para k << n): a distribuição resultante é exatamente
+    a da amostragem sem reposição.
+    """
+    k = max(1, min(k, n))
+    cand = rng.integers(0, n, size=(n_sel, k))
+    if k > 1:
+        while True:
+            ordenado = np.sort(cand, axis=1)
+            repetidos = (ordenado[:, 1:] == ordenado[:, :-1]).any(axis=1)
+            n_rep = int(repetidos.sum())
+            if n_rep == 0:
+                break
+            cand[repetidos] = rng.integers(0, n, size=(n_rep, k))
+    return cand.min(axis=1)
+
+
+def sus_por_rank(n: int, n_sel: int, pressao: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Amostragem universal estocástica (um único giro com `n_sel` ponteiros
+    igualmente espaçados) sobre pesos de ranking linear. Devolve os ranks
+    embaralhados (para formar pares aleatórios).
+    """
+    s = min(2.0, max(1.0, float(pressao)))
+    r = np.arange(n)
+    if n > 1:
+        pesos = (s - 2.0 * (s - 1.0) * r / (n - 1)) / n
+    else:
+        pesos = np.ones(1)
+    acumulado = np.cumsum(pesos)
+    acumulado /= acumulado[-1]
+    ponteiros = (rng.random() + np.arange(n_sel)) / n_sel
+    ranks = np.minimum(np.searchsorted(acumulado, ponteiros, side="right"), n - 1)
+    return rng.permutation(ranks)
+
+
+def selecionar(ordem: np.ndarray, n_sel: int, params: Dict, rng: np.random.Generator) -> np.ndarray:
+    """
+    Índices (na população) dos `n_sel` pais da geração.
+
+    ordem: índices da população ordenados por J crescente (ordem[0] = melhor)
+    """
+    n = len(ordem)
+    metodo = params.get("selecao", "torneio")
+    if metodo == "torneio":
+        ranks = torneio_por_rank(n, n_sel, int(params.get("torneio_k", 3)), rng)
+    elif metodo == "sus":
+        ranks = sus_por_rank(n, n_sel, float(params.get("pressao_sus", 2.0)), rng)
+    else:
+        raise ValueError(f"Método de seleção desconhecido: {metodo!r} (use 'torneio' ou 'sus')")
+    return ordem[ranks]
@@ -0,0 +1,133 @@
+# assets/genetic_module/subtabela.py
+"""
+Módulo: subtabela
+-----------------
+
+Subtabela de candidatos por requisição: o AG passa a sortear só entre
+alimentos que podem de fato estar num bom plano para aquele usuário.
+
+Antes, população inicial e mutação sorteavam na tabela inteira e as
+restrições só apareciam como penalidade: com "lactose" banida, boa parte
+das avaliações era gasta em cardápios com queijo e iogurte (J + 500), e
+com orçamento apertado em cardápios com salmão e whey. Agora, uma vez por
+requisição, `derivar_subtabela` remove:
+
+  - itens banidos (máscara do motor de `restricoes`);
+  - itens inviáveis no orçamento: custo já na MENOR porção aceita por
+    `_safe_portion` acima da fatia de uma refeição
+    (orcamento_max / n_refeicoes) — sozinho, o item estoura a refeição.
+    Se uma categoria essencial (carb, prot) ficar com menos de
+    `subtabela_min_categoria` itens, os mais baratos dela voltam.
+
+    Cortar pela porção TÍPICA (100 g) foi testado e piorou o J em perfis
+    restritivos: o AG usa itens caros em porções pequenas para fechar a
+    proteína. Por isso o corte de custo é conservador.
+
+Se sobrarem menos de `subtabela_min_itens` itens, usa a tabela inteira
+(as penalidades continuam valendo).
+
+O resultado é um `IndiceAlimentos` sobre o subconjunto: os genes passam a
+ser posições nesse `itens_idx` menor, e todo o resto do AG (fitness,
+mutação, solver de porções) funciona sem mudança. Subíndices ficam em
+cache no índice da tabela inteira (morrem com a versão da tabela), por
+(banidos normalizados, orçamento, nº de refeições). A consulta é sem
+lock; descarte e inserção ficam sob `_subindices_lock` do índice, já que
+planos de usuários diferentes rodam em threads paralelas.
+
+`params["subtabela"] = False` desliga.
+"""
+
+from typing import Dict, List, Tuple
+
+from .indices import IndiceAlimentos
+from .restricoes import mascara_restricoes, normalizar_termos
+
+_MAX_SUBINDICES = 64
+
+
+def _custo_minimo(item) -> float:
+    from .genetic_module import _safe_portion
+
+    return item.preco_100g * _safe_portion(item, 0) / 100.0
+
+
+def derivar_subtabela(itens, indice: IndiceAlimentos, params: Dict) -> Tuple[IndiceAlimentos, Dict[str, int]]:
+    """
+    (subíndice, contagens) para a requisição. `indice` é o da tabela
+    inteira; devolve ele mesmo quando não há o que filtrar.
+
+    contagens: {"itens", "banidos", "caros"}
+    """
+    if params.get("subtabela", True) is False:
+        return indice, {"itens": len(indice.itens_idx), "banidos": 0, "caros": 0}
+
+    restricoes = params.get("restricoes", {}) or {}
+    orcamento = float(params.get("orcamento_max", float("inf")))
+    n_refeicoes = int(params.get("n_refeicoes", 5))
+    min_cat = int(params.get("subtabela_min_categoria", 3))
+    min_itens = int(params.get("subtabela_min_itens", 12))
+
+    chave = (
+        normalizar_termos(restricoes.get("banidos", [])),
+        orcamento,
+        n_refeicoes,
+        min_cat,
+        min_itens,
+    )
+    cache = indice._subindices
+    entrada = cache.get(chave)
+    if entrada is not None:
+        return entrada
+
+    n = len(indice.itens_idx)
+    banido = mascara_restricoes(itens, restricoes)
+    permitidos = [p for p in range(n) if banido is None or not banido[indice.itens_idx[p]]]
+    n_banidos = n - len(permitidos)
+
+    fatia = orcamento / max(1, n_refeicoes)
+    caros = {p for p in permitidos if _custo_minimo(itens[indice.itens_idx[p]]) > fatia}
+    # categorias essenciais não podem ficar sem opções: os mais baratos voltam
+    for eh_cat in (indice.eh_carb, indice.eh_prot):
+        baratos = [p for p in permitidos if eh_cat[p] and p not in caros]
+        if len(baratos) < min_cat:
+            caros_cat = sorted(
+                (p for p in permitidos if eh_cat[p] and p in caros),
+                key=lambda p: _custo_minimo(itens[indice.itens_idx[p]]),
+            )
+            caros.difference_update(caros_cat[: min_cat - len(baratos)])
+    posicoes: List[int] = [p for p in permitidos if p not in caros]
+
+    if len(posicoes) < min_itens or len(posicoes) == n:
+        entrada = (indice, {"itens": n, "banidos": 0, "caros": 0})
+    else:
+        sub = IndiceAlimentos(itens, [indice.itens_idx[p] for p in posicoes])
+        sub.versao = indice.versao
+        sub.compilada = indice.compilada
+        entrada = (sub, {"itens": len(posicoes), "banidos": n_banidos, "caros": len(caros)})
+
+    with indice._subindices_lock:
+        # outra thread pode ter derivado a mesma subtabela enquanto isso
+        existente = cache.get(chave)
+        if existente is not None:
+            return existente
+        if len(cache) >= _MAX_SUBINDICES:
+            cache.pop(next(iter(cache)))
+        cache[chave] = entrada
+    return entrada
+
+
+def remapear_genomas(genomas: List, de_idx: List[int], para_idx: List[int]) -> List:
+    """
+    Converte genomas de posições em `de_idx` para posições em `para_idx`.
+    Genes cujo alimento não está em `para_idx` são descartados; genomas
+    com alguma refeição vazia são descartados inteiros.
+    """
+    if de_idx is para_idx:
+        return genomas
+    posicao = {i: p for p, i in enumerate(para_idx)}
+    saida = []
+    for ind in genomas:
+        novo = [[(posicao[de_idx[pos]], g) for (pos, g) in ref if de_idx[pos] in posicao] for ref in ind]
+        if all(novo):
+            saida.append(novo)
+    return saida
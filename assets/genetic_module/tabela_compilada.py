@@ -0,0 +1,283 @@
+# assets/genetic_module/tabela_compilada.py
+"""
+Módulo: tabela_compilada
+------------------------
+
+Formato binário versionado para a tabela de alimentos, aberto via `mmap`.
+
+Motivação: ler o CSV a cada início (conversão de float e split de tags por
+linha) fica caro com tabelas grandes, e cada processo mantém a própria
+cópia. O "pacote" compilado guarda colunas NumPy contíguas e uma tabela de
+strings; abrir o arquivo é só mapear páginas — todos os workers
+(gunicorn, process pool) compartilham as mesmas páginas do page cache.
+
+Layout (little-endian, versão 1):
+
+    [0:8)    magic  b"NBTAB001"
+    [8:12)   u32    tamanho do cabeçalho JSON (H)
+    [12:12+H) cabeçalho JSON (utf-8):
+               {"versao", "n", "csv": {"sha256", "tamanho", "mtime_ns"},
+                "colunas": {nome: [offset, dtype, count]}}
+    ...      colunas alinhadas em 8 bytes:
+               kcal_100g, carb_100g, prot_100g, gord_100g, preco_100g  (<f8)
+               tags_ptr (<i4, n+1), tags_idx (<i4)
+               strings  (uint8: JSON utf-8 com ids, nomes e vocabulário de tags)
+
+Uso:
+
+    python -m assets.genetic_module.tabela_compilada assets/data/taco_min.csv
+
+gera `assets/data/taco_min.nbt`. `carregar_tabela_alimentos` passa a usar o
+pacote automaticamente enquanto ele estiver em dia com o CSV (mesmo tamanho
+e mtime, ou mesmo SHA-256).
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from functools import cached_property
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MAGIC = b"NBTAB001"
+VERSAO = 1
+EXTENSAO = ".nbt"
+
+_COLUNAS_FLOAT = ("kcal_100g", "carb_100g", "prot_100g", "gord_100g", "preco_100g")
+
+
+def caminho_pacote(caminho_csv: str) -> str:
+    """Caminho padrão do pacote compilado ao lado do CSV (`x.csv` → `x.nbt`)."""
+    return os.path.splitext(caminho_csv)[0] + EXTENSAO
+
+
+def _sha256_arquivo(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+# SHA-256 de CSVs já conferidos: (caminho absoluto, mtime_ns, tamanho) -> hash.
+# Evita reler o CSV inteiro a cada carga quando só o mtime diverge do
+# cabeçalho (ex.: checkout do git), como `BibliotecaPlanos.compativel_com`.
+_SHA_CONFERIDOS: Dict[tuple, str] = {}
+
+
+def _sha256_memorizado(caminho: str) -> str:
+    """`_sha256_arquivo`, reaproveitado enquanto mtime e tamanho não mudarem."""
+    st = os.stat(caminho)
+    chave = (os.path.abspath(caminho), st.st_mtime_ns, st.st_size)
+    sha = _SHA_CONFERIDOS.get(chave)
+    if sha is None:
+        if len(_SHA_CONFERIDOS) >= 64:
+            _SHA_CONFERIDOS.clear()
+        sha = _SHA_CONFERIDOS[chave] = _sha256_arquivo(caminho)
+    return sha
+
+
+def _alinhar(n: int, a: int = 8) -> int:
+    return (n + a - 1) // a * a
+
+
+# ============================================================
+#                        Compilação
+# ============================================================
+def compilar_tabela(caminho_csv: str, destino: Optional[str] = None) -> str:
+    """
+    Lê o CSV (com as mesmas regras de `carregar_tabela_alimentos`) e grava
+    o pacote binário. A escrita é atômica (arquivo temporário + rename),
+    então leitores nunca veem um pacote pela metade.
+
+    Retorna o caminho do pacote gerado.
+    """
+    from .genetic_module import _ler_csv_alimentos
+
+    destino = destino or caminho_pacote(caminho_csv)
+    st = os.stat(caminho_csv)
+    itens = _ler_csv_alimentos(caminho_csv)
+    n = len(itens)
+
+    vocab: Dict[str, int] = {}
+    tags_ptr = [0]
+    tags_idx: List[int] = []
+    for it in itens:
+        for t in it.tags:
+            tags_idx.append(vocab.setdefault(t, len(vocab)))
+        tags_ptr.append(len(tags_idx))
+
+    strings = json.dumps(
+        {
+            "id": [it.id for it in itens],
+            "nome": [it.nome for it in itens],
+            "tags": list(vocab),
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+    arrays = {c: np.array([getattr(it, c) for it in itens], dtype="<f8") for c in _COLUNAS_FLOAT}
+    arrays["tags_ptr"] = np.array(tags_ptr, dtype="<i4")
+    arrays["tags_idx"] = np.array(tags_idx, dtype="<i4")
+    arrays["strings"] = np.frombuffer(strings, dtype=np.uint8)
+
+    # O cabeçalho depende dos offsets e os offsets dependem do tamanho do
+    # cabeçalho: reserva um tamanho fixo folgado e completa com espaços.
+    def montar_cabecalho(colunas: Dict) -> bytes:
+        return json.dumps(
+            {
+                "versao": VERSAO,
+                "n": n,
+                "csv": {"sha256": _sha256_arquivo(caminho_csv), "tamanho": st.st_size, "mtime_ns": st.st_mtime_ns},
+                "colunas": colunas,
+            }
+        ).encode("utf-8")
+
+    rascunho = montar_cabecalho({k: [0, v.dtype.str, int(v.size)] for k, v in arrays.items()})
+    tam_cab = _alinhar(len(rascunho) + 64 * len(arrays))
+    offset = _alinhar(12 + tam_cab)
+    colunas = {}
+    for nome, arr in arrays.items():
+        colunas[nome] = [offset, arr.dtype.str, int(arr.size)]
+        offset = _alinhar(offset + arr.nbytes)
+    cabecalho = montar_cabecalho(colunas).ljust(tam_cab, b" ")
+
+    tmp = f"{destino}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", tam_cab))
+        f.write(cabecalho)
+        for nome, arr in arrays.items():
+            f.seek(colunas[nome][0])
+            f.write(arr.tobytes())
+        f.truncate(offset)
+    os.replace(tmp, destino)
+    return destino
+
+
+# ============================================================
+#                        Leitura (mmap)
+# ============================================================
+class TabelaCompilada:
+    """
+    Pacote compilado aberto em modo somente leitura.
+
+    As colunas (`kcal_100g`, `carb_100g`, ...) são arrays NumPy que apontam
+    direto para o `mmap` (zero cópia). A tabela de strings só é decodificada
+    no primeiro acesso a `ids` / `nomes` / `vocab_tags`, então abrir o
+    pacote custa apenas o cabeçalho. O objeto mantém o mapeamento aberto
+    enquanto existir.
+    """
+
+    def __init__(self, caminho: str) -> None:
+        self.caminho = caminho
+        with open(caminho, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:8] != MAGIC:
+            raise ValueError(f"Arquivo não é uma tabela compilada do NutriBot: {caminho}")
+        (tam_cab,) = struct.unpack_from("<I", self._mm, 8)
+        self.cabecalho = json.loads(bytes(self._mm[12 : 12 + tam_cab]))
+        if self.cabecalho.get("versao") != VERSAO:
+            raise ValueError(f"Versão de tabela compilada não suportada: {self.cabecalho.get('versao')}")
+
+        self.n: int = int(self.cabecalho["n"])
+        self.colunas: Dict[str, np.ndarray] = {}
+        for nome, (off, dtype, count) in self.cabecalho["colunas"].items():
+            self.colunas[nome] = np.frombuffer(self._mm, dtype=np.dtype(dtype), count=count, offset=off)
+
+    @cached_property
+    def _strings(self) -> Dict[str, List[str]]:
+        return json.loads(self.colunas["strings"].tobytes().decode("utf-8"))
+
+    @property
+    def ids(self) -> List[str]:
+        return self._strings["id"]
+
+    @property
+    def nomes(self) -> List[str]:
+        return self._strings["nome"]
+
+    @property
+    def vocab_tags(self) -> List[str]:
+        return self._strings["tags"]
+
+    def __getattr__(self, nome: str) -> np.ndarray:
+        colunas = self.__dict__.get("colunas", {})
+        if nome in colunas:
+            return colunas[nome]
+        raise AttributeError(nome)
+
+    def em_dia_com(self, caminho_csv: str) -> bool:
+        """
+        True se o pacote foi gerado a partir do conteúdo atual do CSV.
+        Compara tamanho + mtime (rápido); se o mtime divergir (ex.: checkout
+        do git), confirma pelo SHA-256 (memorizado por mtime + tamanho).
+        """
+        try:
+            st = os.stat(caminho_csv)
+        except OSError:
+            return False
+        meta = self.cabecalho["csv"]
+        if st.st_size != meta["tamanho"]:
+            return False
+        if st.st_mtime_ns == meta["mtime_ns"]:
+            return True
+        return _sha256_memorizado(caminho_csv) == meta["sha256"]
+
+    def para_itens(self) -> List:
+        """Materializa a lista de `FoodItem` (mesma ordem do CSV)."""
+        from .genetic_module import FoodItem
+
+        kcal = self.colunas["kcal_100g"].tolist()
+        carb = self.colunas["carb_100g"].tolist()
+        prot = self.colunas["prot_100g"].tolist()
+        gord = self.colunas["gord_100g"].tolist()
+        preco = self.colunas["preco_100g"].tolist()
+        ptr = self.colunas["tags_ptr"].tolist()
+        idx = self.colunas["tags_idx"].tolist()
+        vocab = self.vocab_tags
+
+        return [
+            FoodItem(
+                id=self.ids[i],
+                nome=self.nomes[i],
+                kcal_100g=kcal[i],
+                carb_100g=carb[i],
+                prot_100g=prot[i],
+                gord_100g=gord[i],
+                preco_100g=preco[i],
+                tags=tuple(vocab[t] for t in idx[ptr[i] : ptr[i + 1]]),
+            )
+            for i in range(self.n)
+        ]
+
+
+def abrir_se_em_dia(caminho_csv: str) -> Optional[TabelaCompilada]:
+    """
+    Abre o pacote compilado ao lado de `caminho_csv` se ele existir, for
+    válido e estiver em dia com o CSV. Caso contrário devolve None
+    (o chamador volta a ler o CSV).
+    """
+    pacote = caminho_pacote(caminho_csv)
+    if not os.path.exists(pacote):
+        return None
+    try:
+        tabela = TabelaCompilada(pacote)
+    except (OSError, ValueError, KeyError):
+        return None
+    return tabela if tabela.em_dia_com(caminho_csv) else None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Compila um CSV de alimentos para o formato binário (.nbt)")
+    ap.add_argument("csv", nargs="+", help="arquivo(s) CSV de alimentos")
+    args = ap.parse_args()
+    for caminho in args.csv:
+        destino = compilar_tabela(caminho)
+        print(f"{caminho} -> {destino} ({TabelaCompilada(destino).n} itens)")
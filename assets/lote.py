@@ -0,0 +1,370 @@
+# lote.py
+"""
+Módulo: lote
+------------
+
+Execução em lote de planos (replanejamento noturno, testes de capacidade).
+
+Lê perfis de usuário de um arquivo JSONL (um objeto por linha, no formato
+de `gerar_plano_para_usuario`) ou CSV (uma coluna por campo), roda cada
+um pelo `core_engine` em `workers` processos e grava um resultado por
+linha, em JSONL, no arquivo de saída (ou stdout):
+
+    {"id": ..., "linha": n, "ok": true,  "latencia_s": ..., "resultado": {...}}
+    {"id": ..., "linha": n, "ok": false, "latencia_s": ..., "erro": "..."}
+
+Memória limitada:
+  - os perfis são lidos sob demanda (nunca o arquivo inteiro);
+  - no máximo `workers × em_voo_por_worker` perfis ficam em andamento;
+  - cada resultado é serializado no worker e gravado assim que chega
+    (ordem de término, não de entrada — use "linha"/"id" para juntar).
+    `historico_otimizacao` e `perfil` ficam de fora sem `completo`.
+
+Retomada: a saída é o próprio checkpoint. Cada linha é gravada inteira e
+com flush; ao recomeçar com o mesmo arquivo de saída, os ids já presentes
+são pulados e a execução continua em modo append. Uma última linha
+cortada por uma queda é descartada (o arquivo é truncado no fim da
+última linha válida). Perfis que falharam também contam como feitos,
+exceto com `refazer_erros`.
+
+CSV: `objetivo, atividade, colesterol, peso` e opcionais `id,
+n_refeicoes, dias, orcamento_max, tabela_csv`; `restricoes` com termos
+separados por ";" vira {"banidos": [...]}; `ag` (se houver) é JSON.
+Células vazias ficam com o padrão. Sem "id", o id é o nº da linha.
+
+Uso:
+
+    python app.py --lote perfis.jsonl --saida planos.jsonl --workers 4
+    python -m assets.lote perfis.csv --saida planos.jsonl --workers 4
+
+No fim, um relatório (stderr) com vazão e percentis de latência.
+
+Interrupção (Ctrl-C ou SIGTERM): os workers ignoram o SIGINT e recebem um
+token de cancelamento compartilhado (`cancelamento`); o processo
+principal o dispara, os AGs em andamento param na geração seguinte e os
+perfis interrompidos NÃO são gravados — a retomada roda eles de novo.
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+try:
+    from .cancelamento import Cancelado, cancelamento_do_processo, inicializar_worker
+    from .core_engine import gerar_plano_para_usuario
+except ImportError:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # pasta assets
+    if BASE_DIR not in sys.path:
+        sys.path.append(BASE_DIR)
+
+    from cancelamento import Cancelado, cancelamento_do_processo, inicializar_worker
+    from core_engine import gerar_plano_para_usuario
+
+TABELA_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "taco_min.csv")
+
+# Campos do resultado que só entram com `completo` (grandes e pouco usados em lote)
+_CAMPOS_EXTENSOS = ("historico_otimizacao", "perfil")
+
+
+# ============================================================
+#                      Leitura dos perfis
+# ============================================================
+def _valor_csv(texto: str):
+    try:
+        return int(texto)
+    except ValueError:
+        pass
+    try:
+        return float(texto)
+    except ValueError:
+        return texto
+
+
+def _perfil_csv(linha: Dict[str, str]) -> Dict:
+    perfil: Dict = {}
+    for campo, texto in linha.items():
+        texto = (texto or "").strip()
+        if campo is None or not texto:
+            continue
+        campo = campo.strip()
+        if campo == "restricoes":
+            perfil["restricoes"] = {"banidos": [t.strip() for t in texto.split(";") if t.strip()]}
+        elif campo == "ag":
+            perfil["ag"] = json.loads(texto)
+        elif campo in ("id", "tabela_csv"):
+            perfil[campo] = texto
+        else:
+            perfil[campo] = _valor_csv(texto)
+    return perfil
+
+
+def ler_perfis(caminho: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    (nº da linha, perfil) para cada perfil do arquivo, sob demanda.
+    `.csv` é lido como CSV; qualquer outra extensão, como JSONL.
+    """
+    with open(caminho, encoding="utf-8", newline="") as f:
+        if caminho.lower().endswith(".csv"):
+            for n, linha in enumerate(csv.DictReader(f), 1):
+                yield n, _perfil_csv(linha)
+        else:
+            for n, linha in enumerate(f, 1):
+                if linha.strip():
+                    yield n, json.loads(linha)
+
+
+def _mesclar(base: Dict, perfil: Dict) -> Dict:
+    """Perfil sobre a base (o dicionário `ag` é mesclado, não substituído)."""
+    dados = {**base, **perfil}
+    if isinstance(base.get("ag"), dict) and isinstance(perfil.get("ag"), dict):
+        dados["ag"] = {**base["ag"], **perfil["ag"]}
+    dados.setdefault("tabela_csv", TABELA_PADRAO)
+    return dados
+
+
+# ============================================================
+#                         Checkpoint
+# ============================================================
+def retomar_saida(caminho: str, refazer_erros: bool = False) -> Set[str]:
+    """
+    Ids já gravados em `caminho` (vazio se não existir). Trunca o arquivo
+    no fim da última linha válida, descartando uma gravação interrompida.
+    """
+    feitos: Set[str] = set()
+    if not os.path.exists(caminho):
+        return feitos
+    valido = 0
+    with open(caminho, "rb") as f:
+        for linha in f:
+            if not linha.endswith(b"\n"):
+                break
+            try:
+                reg = json.loads(linha)
+            except ValueError:
+                break
+            valido += len(linha)
+            if reg.get("ok") or not refazer_erros:
+                feitos.add(str(reg["id"]))
+    if valido < os.path.getsize(caminho):
+        with open(caminho, "r+b") as f:
+            f.truncate(valido)
+    return feitos
+
+
+# ============================================================
+#                          Execução
+# ============================================================
+def _processar(tarefa: Tuple[str, int, Dict, bool]) -> Tuple[Optional[str], float, bool]:
+    """Worker: gera o plano e devolve (linha JSONL ou None se cancelado, latência, ok)."""
+    pid, n, dados, completo = tarefa
+    t0 = time.perf_counter()
+    try:
+        resultado = gerar_plano_para_usuario(dados, cancelamento=cancelamento_do_processo())
+    except Cancelado:
+        return None, time.perf_counter() - t0, False
+    except Exception as e:
+        lat = time.perf_counter() - t0
+        reg = {"id": pid, "linha": n, "ok": False, "latencia_s": round(lat, 4), "erro": f"{type(e).__name__}: {e}"}
+        return json.dumps(reg, ensure_ascii=False), lat, False
+    lat = time.perf_counter() - t0
+    if not completo:
+        resultado = {k: v for k, v in resultado.items() if k not in _CAMPOS_EXTENSOS}
+    reg = {"id": pid, "linha": n, "ok": True, "latencia_s": round(lat, 4), "resultado": resultado}
+    return json.dumps(reg, ensure_ascii=False, default=str), lat, True
+
+
+def _percentil(valores, q: float) -> Optional[float]:
+    if not len(valores):
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(q * (len(ordenados) - 1))))]
+
+
+def executar_lote(
+    entrada: str,
+    saida: str = "-",
+    workers: int = 1,
+    base: Optional[Dict] = None,
+    completo: bool = False,
+    refazer_erros: bool = False,
+    em_voo_por_worker: int = 2,
+    limite: Optional[int] = None,
+) -> Dict:
+    """
+    Roda todos os perfis de `entrada` e grava os resultados em `saida`
+    ("-" = stdout, sem retomada). `base` dá os campos que faltarem em cada
+    perfil. `workers` = 1 roda no próprio processo.
+
+    Retorna o relatório {"processados", "pulados", "erros", "cancelados",
+    "interrompido", "duracao_s", "vazao_perfis_s",
+    "latencia_s": {"p50", "p90", "p99", "max"}}.
+
+    KeyboardInterrupt durante o lote cancela os planos em andamento e
+    encerra com `interrompido` = True (nada é gravado pela metade).
+    """
+    base = base or {}
+    workers = max(1, int(workers))
+    feitos = retomar_saida(saida, refazer_erros) if saida != "-" else set()
+    destino = sys.stdout if saida == "-" else open(saida, "a", encoding="utf-8")
+
+    latencias = array("d")
+    processados = erros = pulados = cancelados = 0
+    interrompido = False
+
+    def tarefas():
+        nonlocal pulados
+        for n, perfil in ler_perfis(entrada):
+            pid = str(perfil.pop("id", n))
+            if pid in feitos:
+                pulados += 1
+                continue
+            yield pid, n, _mesclar(base, perfil), completo
+
+    def gravar(linha: Optional[str], lat: float, ok: bool) -> None:
+        nonlocal processados, erros, cancelados
+        if linha is None:
+            cancelados += 1
+            return
+        destino.write(linha + "\n")
+        destino.flush()
+        latencias.append(lat)
+        processados += 1
+        erros += not ok
+
+    fila = tarefas()
+    if limite is not None:
+        fila = (t for _, t in zip(range(limite), fila))
+
+    # com a saída no stdout, prints de outros módulos vão para o stderr
+    desvio = contextlib.redirect_stdout(sys.stderr) if destino is sys.stdout else contextlib.nullcontext()
+    t0 = time.perf_counter()
+    try:
+        with desvio:
+            if workers == 1:
+                try:
+                    for tarefa in fila:
+                        gravar(*_processar(tarefa))
+                except KeyboardInterrupt:
+                    interrompido = True
+                    cancelados += 1
+            else:
+                evento = multiprocessing.Event()
+                with ProcessPoolExecutor(
+                    max_workers=workers, initializer=inicializar_worker, initargs=(evento,)
+                ) as ex:
+                    em_voo = set()
+                    try:
+                        for tarefa in fila:
+                            em_voo.add(ex.submit(_processar, tarefa))
+                            if len(em_voo) >= workers * em_voo_por_worker:
+                                prontos, em_voo = wait(em_voo, return_when=FIRST_COMPLETED)
+                                for fut in prontos:
+                                    gravar(*fut.result())
+                    except KeyboardInterrupt:
+                        # os que não começaram nem rodam; os em andamento param pelo token
+                        interrompido = True
+                        evento.set()
+                        antes = len(em_voo)
+                        em_voo = {fut for fut in em_voo if not fut.cancel()}
+                        cancelados += antes - len(em_voo)
+                    for fut in wait(em_voo).done:
+                        gravar(*fut.result())
+    finally:
+        if destino is not sys.stdout:
+            destino.close()
+    duracao = time.perf_counter() - t0
+
+    return {
+        "processados": processados,
+        "pulados": pulados,
+        "erros": erros,
+        "cancelados": cancelados,
+        "interrompido": interrompido,
+        "workers": workers,
+        "duracao_s": round(duracao, 3),
+        "vazao_perfis_s": round(processados / duracao, 3) if duracao > 0 else None,
+        "latencia_s": {
+            nome: (round(v, 4) if v is not None else None)
+            for nome, v in (
+                ("p50", _percentil(latencias, 0.50)),
+                ("p90", _percentil(latencias, 0.90)),
+                ("p99", _percentil(latencias, 0.99)),
+                ("max", max(latencias) if latencias else None),
+            )
+        },
+    }
+
+
+def imprimir_relatorio(rel: Dict, arquivo=sys.stderr) -> None:
+    lat = rel["latencia_s"]
+    fmt = lambda v: "-" if v is None else f"{v:.3f} s"  # noqa: E731
+    print("\n===== LOTE =====", file=arquivo)
+    print(
+        f"processados: {rel['processados']}  (erros: {rel['erros']}, já feitos/pulados: {rel['pulados']})",
+        file=arquivo,
+    )
+    if rel["interrompido"]:
+        print(f"interrompido: {rel['cancelados']} perfil(s) cancelado(s), ficam para a retomada", file=arquivo)
+    print(f"duração: {rel['duracao_s']:.2f} s com {rel['workers']} worker(s)", file=arquivo)
+    if rel["vazao_perfis_s"] is not None:
+        print(f"vazão: {rel['vazao_perfis_s']:.2f} perfis/s", file=arquivo)
+    print(
+        f"latência: p50 {fmt(lat['p50'])}  p90 {fmt(lat['p90'])}  p99 {fmt(lat['p99'])}  máx {fmt(lat['max'])}",
+        file=arquivo,
+    )
+
+
+def adicionar_argumentos(ap: argparse.ArgumentParser) -> None:
+    """Opções do lote (compartilhadas com `app.py --lote`)."""
+    ap.add_argument("--saida", default="-", help="arquivo JSONL de saída e checkpoint (padrão: stdout)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processos em paralelo")
+    ap.add_argument("--completo", action="store_true", help="inclui histórico do AG e perfil no resultado")
+    ap.add_argument("--refazer-erros", action="store_true", help="na retomada, roda de novo os perfis que falharam")
+    ap.add_argument("--limite", type=int, help="processa no máximo N perfis nesta execução")
+    ap.add_argument("--ag", type=json.loads, help='parâmetros do AG para todos os perfis (JSON, ex.: \'{"ger": 80}\')')
+
+
+def main(argv=None, base: Optional[Dict] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m assets.lote", description="Planos em lote a partir de perfis JSONL/CSV")
+    ap.add_argument("entrada", help="perfis (.jsonl ou .csv)")
+    adicionar_argumentos(ap)
+    args = ap.parse_args(argv)
+    return rodar_args(args.entrada, args, base)
+
+
+def rodar_args(entrada: str, args: argparse.Namespace, base: Optional[Dict] = None) -> int:
+    signal.signal(signal.SIGTERM, _sigterm_como_interrupcao)
+    base = dict(base or {})
+    if args.ag:
+        base["ag"] = {**base.get("ag", {}), **args.ag}
+    rel = executar_lote(
+        entrada,
+        saida=args.saida,
+        workers=args.workers,
+        base=base,
+        completo=args.completo,
+        refazer_erros=args.refazer_erros,
+        limite=args.limite,
+    )
+    imprimir_relatorio(rel)
+    if rel["interrompido"]:
+        return 130
+    return 1 if rel["erros"] else 0
+
+
+def _sigterm_como_interrupcao(signum, frame) -> None:
+    # o agendador (cron/systemd) encerra com SIGTERM: mesmo caminho do Ctrl-C
+    raise KeyboardInterrupt
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# recarga_tabelas.py
+"""
+Módulo: recarga_tabelas
+-----------------------
+
+Recarga "a quente" das tabelas de alimentos, sem reiniciar o processo.
+
+Antes, atualizar preços ou itens do `taco_min.csv` exigia reiniciar o
+Flask — perdendo os `estados` das conversas em memória e esfriando todos
+os caches — ou deixava a primeira requisição depois da mudança pagando
+a leitura e a indexação da tabela.
+
+`VigiaTabelas` roda numa thread em segundo plano e, a cada `intervalo`
+segundos, confere (mtime, tamanho) das tabelas configuradas. Quando um
+arquivo muda e fica estável por uma verificação (evita ler um CSV pela
+metade enquanto ainda está sendo gravado):
+
+  1. recompila o pacote binário ao lado do CSV (`tabela_compilada`,
+     escrita atômica), que também serve aos outros processos;
+  2. lê e indexa a versão nova FORA do lock do cache (`recarregar_tabela`);
+  3. troca a entrada do cache numa única atribuição. A versão é o prefixo
+     do SHA-256 do CSV (`tabela_versao` no resultado do plano).
+
+Execuções do AG em andamento continuam com a lista/índice que já pegaram
+(um plano semanal usa a mesma versão em todos os dias). Os caches
+derivados da versão antiga são invalidados pelos ouvintes de
+`ao_trocar_tabela` (frentes de Pareto do core_engine, máscaras de
+restrições); a biblioteca de planos confere o SHA-256 da tabela e deixa
+de ser usada sozinha. Se a tabela nova for inválida, a antiga continua.
+
+Enquanto vigiadas, as tabelas não são mais conferidas (stat) a cada
+requisição: a troca acontece só pelo vigia.
+
+Métricas (em `telemetria.REGISTRO`):
+  - nutribot_tabela_recargas_total{tabela, resultado="trocada"|"erro"}
+  - nutribot_tabela_info{tabela, versao}  (gauge: 1 na versão em uso)
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .genetic_module.genetic_module import _TABELAS_VIGIADAS, recarregar_tabela
+    from .genetic_module.tabela_compilada import compilar_tabela
+    from .telemetria import REGISTRO
+except ImportError:
+    import sys
+
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # pasta assets
+    if BASE_DIR not in sys.path:
+        sys.path.append(BASE_DIR)
+
+    from genetic_module.genetic_module import _TABELAS_VIGIADAS, recarregar_tabela
+    from genetic_module.tabela_compilada import compilar_tabela
+    from telemetria import REGISTRO
+
+
+def _assinatura(caminho: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class VigiaTabelas:
+    """
+    Vigia de arquivos de tabela com recarga em segundo plano.
+
+    caminhos : CSVs de alimentos a vigiar
+    intervalo: segundos entre verificações
+    compilar : recompila o pacote `.nbt` antes de recarregar
+    """
+
+    def __init__(self, caminhos: Sequence[str], intervalo: float = 2.0, compilar: bool = True) -> None:
+        self.caminhos = [os.path.abspath(c) for c in caminhos]
+        self.intervalo = intervalo
+        self.compilar = compilar
+        self._instalada: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._vista: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._versao: Dict[str, Optional[str]] = {}
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------
+    # Ciclo de vida
+    # ------------------------------
+    def iniciar(self) -> "VigiaTabelas":
+        """Carrega as tabelas agora (cache quente) e inicia a thread de verificação."""
+        for caminho in self.caminhos:
+            self._recarregar(caminho, _assinatura(caminho))
+            _TABELAS_VIGIADAS.add(caminho)
+        if self._thread is None:
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._laco, name="vigia-tabelas", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        """Para a thread; as tabelas voltam a ser conferidas a cada requisição."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for caminho in self.caminhos:
+            _TABELAS_VIGIADAS.discard(caminho)
+
+    def _laco(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            self.verificar()
+
+    # ------------------------------
+    # Verificação e troca
+    # ------------------------------
+    def verificar(self, estabilizar: bool = True) -> List[Tuple[str, Optional[str], str]]:
+        """
+        Uma rodada de verificação. Retorna as trocas feitas:
+        [(caminho, versão antiga, versão nova)].
+
+        Com `estabilizar`, um arquivo alterado só é recarregado quando a
+        assinatura se repete entre duas verificações seguidas.
+        """
+        trocas = []
+        for caminho in self.caminhos:
+            atual = _assinatura(caminho)
+            vista, self._vista[caminho] = self._vista.get(caminho), atual
+            if atual is None or atual == self._instalada.get(caminho):
+                continue
+            if estabilizar and atual != vista:
+                continue  # ainda mudando: espera a próxima rodada
+            troca = self._recarregar(caminho, atual)
+            if troca is not None:
+                trocas.append(troca)
+        return trocas
+
+    def _recarregar(self, caminho: str, assinatura) -> Optional[Tuple[str, Optional[str], str]]:
+        nome = os.path.basename(caminho)
+        # marcada antes: uma tabela inválida não é relida a cada rodada, só quando mudar de novo
+        self._instalada[caminho] = assinatura
+        try:
+            if self.compilar:
+                compilar_tabela(caminho)
+            antiga, nova = recarregar_tabela(caminho)
+        except Exception as e:
+            REGISTRO.incrementar("nutribot_tabela_recargas_total", tabela=nome, resultado="erro")
+            print(f"[recarga] {nome}: mantendo a versão anterior ({e!r})")
+            return None
+
+        anterior = self._versao.get(caminho)
+        self._versao[caminho] = nova
+        if nova == anterior:
+            return None
+        if anterior is not None:
+            REGISTRO.definir("nutribot_tabela_info", 0, tabela=nome, versao=anterior)
+        REGISTRO.definir("nutribot_tabela_info", 1, tabela=nome, versao=nova)
+        if antiga is not None and antiga != nova:
+            REGISTRO.incrementar("nutribot_tabela_recargas_total", tabela=nome, resultado="trocada")
+            print(f"[recarga] {nome}: versão {antiga} -> {nova}")
+            return caminho, antiga, nova
+        return None
+
+    def versoes(self) -> Dict[str, Optional[str]]:
+        return {os.path.basename(c): self._versao.get(c) for c in self.caminhos}
+
+
+REGISTRO.declarar(
+    "nutribot_tabela_recargas_total", "counter", "Recargas de tabela de alimentos: trocada ou erro (versão mantida)."
+)
+REGISTRO.declarar("nutribot_tabela_info", "gauge", "Versão em uso de cada tabela de alimentos (1 = em uso).")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Vigia tabelas de alimentos e mostra cada troca de versão")
+    ap.add_argument("csv", nargs="+", help="arquivo(s) CSV de alimentos")
+    ap.add_argument("--intervalo", type=float, default=2.0)
+    args = ap.parse_args()
+    vigia = VigiaTabelas(args.csv, intervalo=args.intervalo).iniciar()
+    print("versões:", vigia.versoes())
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        vigia.parar()
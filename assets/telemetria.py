@@ -0,0 +1,218 @@
+# telemetria.py
+"""
+Módulo: telemetria
+------------------
+
+Instrumentação leve do pipeline Fuzzy → AG → formatação.
+
+Dois níveis:
+
+1. `Telemetria` — coletor de UMA execução de plano. Mede tempo de parede e
+   de CPU por etapa (fuzzy, carga_tabela, populacao_inicial, geracoes,
+   escala, formatacao) e acumula contadores (avaliações de fitness,
+   gerações, acertos de cache, parcela de penalidade por restrição).
+
+2. `REGISTRO` — agregado do processo inteiro (thread-safe), alimentado a
+   cada plano gerado e exportado em formato texto do Prometheus pela rota
+   `/metrics` da API.
+
+O custo é de algumas chamadas a `perf_counter`/`thread_time` por etapa;
+nada é medido por avaliação individual.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# ============================================================
+#               Coletor por execução
+# ============================================================
+class Telemetria:
+    """
+    Coleta tempos por etapa e contadores de uma única geração de plano.
+
+    Uso:
+        tele = Telemetria()
+        with tele.etapa("fuzzy"):
+            ...
+        tele.contar("avaliacoes_fitness", 120)
+        tele.como_dict()
+    """
+
+    def __init__(self) -> None:
+        # etapa -> {"wall_s": float, "cpu_s": float}
+        self.etapas: Dict[str, Dict[str, float]] = {}
+        self.contadores: Dict[str, float] = {}
+
+    @contextmanager
+    def etapa(self, nome: str) -> Iterator[None]:
+        """
+        Mede o bloco como a etapa `nome`. Chamadas repetidas com o mesmo
+        nome são somadas. O tempo de CPU é o da thread atual, para não
+        misturar o trabalho de planos gerados em paralelo.
+        """
+        w0 = time.perf_counter()
+        c0 = time.thread_time()
+        try:
+            yield
+        finally:
+            acc = self.etapas.setdefault(nome, {"wall_s": 0.0, "cpu_s": 0.0})
+            acc["wall_s"] += time.perf_counter() - w0
+            acc["cpu_s"] += time.thread_time() - c0
+
+    def contar(self, nome: str, n: float = 1) -> None:
+        """Soma `n` ao contador `nome`."""
+        self.contadores[nome] = self.contadores.get(nome, 0) + n
+
+    def penalidade_restricao_share(self) -> float:
+        """Fração do J acumulado (em todas as avaliações) vinda de restrições."""
+        total = self.contadores.get("soma_J", 0.0)
+        if total <= 0:
+            return 0.0
+        return self.contadores.get("soma_penalidade_restricao", 0.0) / total
+
+    def como_dict(self) -> Dict:
+        """Estrutura serializável anexada ao resultado (`resultado["telemetria"]`)."""
+        return {
+            "etapas": {k: dict(v) for k, v in self.etapas.items()},
+            "total_wall_s": sum(v["wall_s"] for v in self.etapas.values()),
+            "total_cpu_s": sum(v["cpu_s"] for v in self.etapas.values()),
+            "contadores": dict(self.contadores),
+            "penalidade_restricao_share": self.penalidade_restricao_share(),
+        }
+
+
+# ============================================================
+#            Registro agregado do processo (Prometheus)
+# ============================================================
+_Chave = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _escapar_label(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class RegistroMetricas:
+    """
+    Métricas agregadas do processo, protegidas por lock.
+
+    Suporta contadores (`incrementar`) e gauges (`definir`), com labels
+    opcionais. `exportar_prometheus` gera o formato texto 0.0.4.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._valores: Dict[_Chave, float] = {}
+        self._meta: Dict[str, Tuple[str, str]] = {}  # nome -> (tipo, ajuda)
+
+    def declarar(self, nome: str, tipo: str, ajuda: str) -> None:
+        """Registra tipo (`counter`/`gauge`) e texto de ajuda de uma métrica."""
+        with self._lock:
+            self._meta[nome] = (tipo, ajuda)
+
+    @staticmethod
+    def _chave(nome: str, labels: Dict[str, str]) -> _Chave:
+        return nome, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def incrementar(self, nome: str, valor: float = 1.0, **labels: str) -> None:
+        chave = self._chave(nome, labels)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+    def definir(self, nome: str, valor: float, **labels: str) -> None:
+        chave = self._chave(nome, labels)
+        with self._lock:
+            self._valores[chave] = float(valor)
+
+    def valor(self, nome: str, **labels: str) -> float:
+        with self._lock:
+            return self._valores.get(self._chave(nome, labels), 0.0)
+
+    def agregar(self, tele: Telemetria) -> None:
+        """Soma a telemetria de um plano aos totais do processo."""
+        with self._lock:
+            def inc(nome: str, v: float, **labels: str) -> None:
+                chave = self._chave(nome, labels)
+                self._valores[chave] = self._valores.get(chave, 0.0) + v
+
+            inc("nutribot_planos_total", 1)
+            for etapa, t in tele.etapas.items():
+                inc("nutribot_etapa_segundos_total", t["wall_s"], etapa=etapa, relogio="wall")
+                inc("nutribot_etapa_segundos_total", t["cpu_s"], etapa=etapa, relogio="cpu")
+
+            c = tele.contadores
+            inc("nutribot_avaliacoes_fitness_total", c.get("avaliacoes_fitness", 0))
+            inc("nutribot_geracoes_total", c.get("geracoes", 0))
+            inc("nutribot_avaliacoes_busca_local_total", c.get("avaliacoes_busca_local", 0))
+            inc("nutribot_cache_total", c.get("cache_tabela_hits", 0), cache="tabela", resultado="hit")
+            inc("nutribot_cache_total", c.get("cache_tabela_misses", 0), cache="tabela", resultado="miss")
+            inc("nutribot_cache_total", c.get("cache_frente_hits", 0), cache="frente", resultado="hit")
+            inc("nutribot_cache_total", c.get("cache_frente_misses", 0), cache="frente", resultado="miss")
+            inc("nutribot_cache_total", c.get("biblioteca_hits", 0), cache="biblioteca", resultado="hit")
+            inc("nutribot_cache_total", c.get("biblioteca_misses", 0), cache="biblioteca", resultado="miss")
+            inc("nutribot_cache_total", c.get("biblioteca_refinos", 0), cache="biblioteca", resultado="refino")
+            inc("nutribot_fitness_J_total", c.get("soma_J", 0.0))
+            inc("nutribot_penalidade_restricao_total", c.get("soma_penalidade_restricao", 0.0))
+
+            soma_J = self._valores.get(self._chave("nutribot_fitness_J_total", {}), 0.0)
+            soma_pen = self._valores.get(self._chave("nutribot_penalidade_restricao_total", {}), 0.0)
+            self._valores[self._chave("nutribot_penalidade_restricao_share", {})] = (
+                soma_pen / soma_J if soma_J > 0 else 0.0
+            )
+
+    def exportar_prometheus(self) -> str:
+        """Texto no formato de exposição do Prometheus (text/plain; version=0.0.4)."""
+        with self._lock:
+            valores = dict(self._valores)
+            meta = dict(self._meta)
+
+        por_nome: Dict[str, List[Tuple[Tuple[Tuple[str, str], ...], float]]] = {}
+        for (nome, labels), v in valores.items():
+            por_nome.setdefault(nome, []).append((labels, v))
+
+        linhas: List[str] = []
+        for nome in sorted(set(por_nome) | set(meta)):
+            tipo, ajuda = meta.get(nome, ("untyped", ""))
+            if ajuda:
+                linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for labels, v in sorted(por_nome.get(nome, [])):
+                if labels:
+                    lbl = ",".join(f'{k}="{_escapar_label(val)}"' for k, val in labels)
+                    linhas.append(f"{nome}{{{lbl}}} {v!r}")
+                else:
+                    linhas.append(f"{nome} {v!r}")
+        return "\n".join(linhas) + "\n"
+
+
+REGISTRO = RegistroMetricas()
+
+REGISTRO.declarar("nutribot_planos_total", "counter", "Planos gerados pelo core_engine.")
+REGISTRO.declarar(
+    "nutribot_etapa_segundos_total", "counter", "Tempo acumulado por etapa do pipeline (wall e CPU)."
+)
+REGISTRO.declarar("nutribot_avaliacoes_fitness_total", "counter", "Avaliações da função de fitness.")
+REGISTRO.declarar("nutribot_geracoes_total", "counter", "Gerações executadas pelo AG.")
+REGISTRO.declarar(
+    "nutribot_avaliacoes_busca_local_total", "counter", "Avaliações incrementais da busca local (etapa memética)."
+)
+REGISTRO.declarar("nutribot_cache_total", "counter", "Consultas a caches internos por resultado.")
+REGISTRO.declarar(
+    "nutribot_coalescencia_total",
+    "counter",
+    "Pedidos de plano por papel: lider (executou) ou seguidor (esperou um pedido idêntico em andamento).",
+)
+REGISTRO.declarar("nutribot_fitness_J_total", "counter", "Soma de J em todas as avaliações.")
+REGISTRO.declarar(
+    "nutribot_penalidade_restricao_total", "counter", "Soma das penalidades por alimentos banidos."
+)
+REGISTRO.declarar(
+    "nutribot_penalidade_restricao_share", "gauge", "Fração do J acumulado vinda de restrições alimentares."
+)
+
+
+def telemetria_opcional(tele: Optional[Telemetria]) -> Telemetria:
+    """Devolve `tele` ou um coletor descartável (evita `if tele:` espalhados)."""
+    return tele if tele is not None else Telemetria()
@@ -0,0 +1,31 @@
+# benchmarks/__init__.py
+"""
+Pacote: benchmarks
+------------------
+
+Suíte de benchmarks *offline* do NutriBotIA. Não depende de rede nem da
+OpenAI: tudo roda em cima do `core_engine`, do módulo genético e da API
+Flask via `test_client`.
+
+Suítes disponíveis:
+
+- micro : operadores isolados (`calcular_macros`, `carregar_tabela_alimentos`,
+          `_avalia_cardapio`, `_mutar`, `_crossover`, `_escala_para_kcal`)
+- macro : `gerar_cardapio` variando pop / ger / n_refeicoes / tamanho da tabela
+- escala: convergência (gerações até J alvo) em tabelas sintéticas de até 5k itens
+- memetico: avaliações até o J alvo com e sem busca local (etapa memética)
+- adaptativo: gerações até o J alvo com operadores fixos x adaptativos
+- estacionario: motor geracional x steady-state (J por avaliação, pico de memória)
+- biblioteca: latência (p50/p95) e J dos planos servidos pela biblioteca pré-calculada
+- concorrencia: planos idênticos em sequência e em threads (RNG por execução)
+- api   : cenário de carga na rota `/mensagem` (conversas completas)
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks                      # todas as suítes
+    python -m benchmarks --suite micro --rapido
+    python -m benchmarks --saida resultados.json
+
+A saída é um JSON com um registro por benchmark (tempo, avaliações/s,
+pico de RSS, J final), pensado para ser comparado entre commits.
+"""
@@ -0,0 +1,88 @@
+# benchmarks/__main__.py
+"""
+Ponto de entrada: `python -m benchmarks [--suite ...] [--saida arq.json]`.
+
+Emite um único documento JSON:
+
+    {
+      "commit": "abc1234",
+      "python": "3.11.7",
+      "plataforma": "linux",
+      "resultados": [ {registro}, ... ]
+    }
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from ._comum import commit_atual
+
+SUITES = ("micro", "macro", "escala", "memetico", "adaptativo", "estacionario", "biblioteca", "concorrencia", "api")
+
+
+def _importar_suite(nome: str):
+    if nome == "micro":
+        from . import micro as mod
+    elif nome == "macro":
+        from . import macro as mod
+    elif nome == "escala":
+        from . import escala as mod
+    elif nome == "memetico":
+        from . import memetico as mod
+    elif nome == "adaptativo":
+        from . import adaptativo as mod
+    elif nome == "estacionario":
+        from . import estacionario as mod
+    elif nome == "biblioteca":
+        from . import biblioteca as mod
+    elif nome == "concorrencia":
+        from . import concorrencia as mod
+    elif nome == "api":
+        from . import api as mod
+    else:
+        raise ValueError(f"Suíte desconhecida: {nome}")
+    return mod
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks offline do NutriBotIA")
+    ap.add_argument("--suite", action="append", choices=SUITES, help="suíte a executar (pode repetir; padrão: todas)")
+    ap.add_argument("--filtro", default="", help="executa só benchmarks cujo nome contenha este texto")
+    ap.add_argument("--rapido", action="store_true", help="lotes e varreduras reduzidos (smoke test)")
+    ap.add_argument("--saida", default="-", help="arquivo JSON de saída (padrão: stdout)")
+    args = ap.parse_args(argv)
+
+    resultados = []
+    t0 = time.perf_counter()
+    for nome in args.suite or SUITES:
+        mod = _importar_suite(nome)
+        print(f">>> suíte {nome}...", file=sys.stderr)
+        for reg in mod.rodar(rapido=args.rapido):
+            if args.filtro and args.filtro not in reg["nome"]:
+                continue
+            print(f"    {reg['nome']}: {reg['tempo_mediana_s']:.4f} s", file=sys.stderr)
+            resultados.append(reg)
+
+    doc = {
+        "commit": commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": sys.platform,
+        "rapido": args.rapido,
+        "duracao_total_s": time.perf_counter() - t0,
+        "resultados": resultados,
+    }
+
+    texto = json.dumps(doc, ensure_ascii=False, indent=2)
+    if args.saida == "-":
+        print(texto)
+    else:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
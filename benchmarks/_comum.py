@@ -0,0 +1,176 @@
+# benchmarks/_comum.py
+"""
+Utilitários compartilhados pelas suítes de benchmark:
+
+- medição de tempo (wall) com repetições e estatísticas simples
+- pico de memória residente (RSS) do processo
+- geração de tabelas de alimentos sintéticas (para varrer tamanho de tabela)
+- formato padronizado dos registros emitidos em JSON
+"""
+
+import csv
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+# Raiz do repositório e pasta `assets` (usada pela API, que importa
+# `chatbot.chatbot_engine` como módulo de topo).
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSETS = os.path.join(RAIZ, "assets")
+TABELA_PADRAO = os.path.join(ASSETS, "data", "taco_min.csv")
+
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+
+# ============================================================
+#                    Memória e ambiente
+# ============================================================
+def pico_rss_kb() -> Optional[int]:
+    """
+    Pico de memória residente do processo (high-water mark), em KiB.
+
+    Observação: o valor é monotônico ao longo da execução; para comparar
+    memória entre commits, rode cada suíte isoladamente (`--suite`).
+    Retorna None em plataformas sem o módulo `resource` (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS devolve bytes; Linux devolve KiB
+    if sys.platform == "darwin":
+        pico //= 1024
+    return int(pico)
+
+
+def commit_atual() -> Optional[str]:
+    """Hash curto do commit atual (ou None fora de um repositório git)."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+# ============================================================
+#                    Medição de tempo
+# ============================================================
+def medir(fn: Callable[[], object], repeticoes: int = 5, aquecimento: int = 1) -> Dict:
+    """
+    Executa `fn` `aquecimento` vezes sem medir e depois `repeticoes`
+    vezes medindo o tempo de parede de cada chamada.
+
+    Retorna estatísticas em segundos e o valor devolvido pela última chamada
+    (útil para extrair J final, número de avaliações etc.).
+    """
+    for _ in range(aquecimento):
+        fn()
+
+    tempos: List[float] = []
+    ret = None
+    for _ in range(max(1, repeticoes)):
+        t0 = time.perf_counter()
+        ret = fn()
+        tempos.append(time.perf_counter() - t0)
+
+    return {
+        "tempos_s": tempos,
+        "min_s": min(tempos),
+        "mediana_s": statistics.median(tempos),
+        "media_s": statistics.fmean(tempos),
+        "retorno": ret,
+    }
+
+
+def registro(
+    suite: str,
+    nome: str,
+    medicao: Dict,
+    parametros: Optional[Dict] = None,
+    chamadas_por_rep: int = 1,
+    avaliacoes_por_rep: Optional[int] = None,
+    J_final: Optional[float] = None,
+    extra: Optional[Dict] = None,
+) -> Dict:
+    """
+    Monta um registro padronizado de benchmark.
+
+    - chamadas_por_rep  : quantas chamadas da função alvo cabem em uma repetição
+                          (para calcular chamadas/s em micro-benchmarks)
+    - avaliacoes_por_rep: avaliações de fitness por repetição (macro)
+    """
+    mediana = medicao["mediana_s"]
+    reg = {
+        "suite": suite,
+        "nome": nome,
+        "parametros": parametros or {},
+        "repeticoes": len(medicao["tempos_s"]),
+        "tempo_min_s": medicao["min_s"],
+        "tempo_mediana_s": mediana,
+        "tempo_media_s": medicao["media_s"],
+        "chamadas_por_s": (chamadas_por_rep / mediana) if mediana > 0 else None,
+        "avaliacoes_por_s": (
+            avaliacoes_por_rep / mediana
+            if avaliacoes_por_rep is not None and mediana > 0
+            else None
+        ),
+        "J_final": J_final,
+        "pico_rss_kb": pico_rss_kb(),
+    }
+    if extra:
+        reg.update(extra)
+    return reg
+
+
+# ============================================================
+#                Tabelas de alimentos sintéticas
+# ============================================================
+def tabela_sintetica(n_itens: int, destino: str, seed: int = 123, base: str = TABELA_PADRAO) -> str:
+    """
+    Gera um CSV com `n_itens` alimentos a partir da tabela base, aplicando
+    pequenas perturbações (±15%) nos macros e no preço. Os nomes recebem
+    um sufixo numérico para manter ids e nomes únicos.
+
+    O CSV gerado segue o mesmo cabeçalho de `taco_min.csv`, de forma que
+    `carregar_tabela_alimentos` o lê sem nenhuma adaptação.
+    """
+    rnd = random.Random(seed)
+
+    with open(base, newline="", encoding="utf-8") as f:
+        linhas = list(csv.DictReader(f))
+    campos = list(linhas[0].keys())
+
+    def perturba(v: str) -> str:
+        try:
+            x = float(v)
+        except ValueError:
+            return v
+        return f"{max(0.0, x * rnd.uniform(0.85, 1.15)):.2f}"
+
+    os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+    with open(destino, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=campos)
+        w.writeheader()
+        for i in range(n_itens):
+            orig = linhas[i % len(linhas)]
+            nova = dict(orig)
+            nova["id"] = str(i + 1)
+            if i >= len(linhas):
+                nova["nome"] = f"{orig['nome']} #{i // len(linhas)}"
+                for c in ("kcal_100g", "prot_100g", "carb_100g", "gord_100g", "preco_100g"):
+                    nova[c] = perturba(orig[c])
+            w.writerow(nova)
+
+    return destino
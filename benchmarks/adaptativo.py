@@ -0,0 +1,86 @@
+# benchmarks/adaptativo.py
+"""
+Gerações até o alvo com operadores fixos x adaptativos.
+
+Configurações comparadas, mesmas sementes e mesma tabela (taco_min):
+
+  - fixo_um_ponto : taxas fixas + crossover de 1 ponto (padrão)
+  - fixo_uniforme : taxas fixas + crossover uniforme por refeição
+  - adaptativo    : taxas/passo que encolhem com a convergência e crédito
+                    por operador (`ag: {"adaptativo": True}`)
+
+O alvo é J_alvo = (1 + tolerância) × o J final médio da configuração
+padrão, medido no histórico (antes da escala/formatação). Para cada
+execução conta-se a primeira geração com best_J <= J_alvo.
+"""
+
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from ._comum import TABELA_PADRAO, pico_rss_kb
+from .micro import PARAMS_AG, _targets
+from assets.genetic_module import gerar_cardapio
+
+SUITE = "adaptativo"
+TOLERANCIA = 0.10
+
+CONFIGS = {
+    "fixo_um_ponto": {"crossover": "um_ponto"},
+    "fixo_uniforme": {"crossover": "uniforme"},
+    "adaptativo": {"adaptativo": True},
+}
+
+
+def _geracoes_ate(sol: Dict, alvo: float) -> Optional[int]:
+    for h in sol["historico"]:
+        if h["best_J"] <= alvo:
+            return h["ger"] + 1
+    return None
+
+
+def rodar(rapido: bool = False) -> List[Dict]:
+    targets = _targets()
+    ger = 40 if rapido else 150
+    sementes = [1, 2] if rapido else [1, 2, 3, 4, 5, 6]
+    base = {
+        **PARAMS_AG,
+        "tabela_csv": TABELA_PADRAO,
+        "pop": 60 if rapido else 100,
+        "ger": ger,
+        "historico_max": ger,
+    }
+
+    execucoes: Dict[str, List[Dict]] = {}
+    for nome, extra in CONFIGS.items():
+        execucoes[nome] = []
+        for seed in sementes:
+            t0 = time.perf_counter()
+            sol = gerar_cardapio(targets, {**base, **extra, "seed": seed})
+            execucoes[nome].append({"tempo_s": time.perf_counter() - t0, "sol": sol})
+
+    alvo = statistics.fmean(r["sol"]["historico"][-1]["best_J"] for r in execucoes["fixo_um_ponto"]) * (
+        1 + TOLERANCIA
+    )
+
+    resultados = []
+    for nome, runs in execucoes.items():
+        ate = [_geracoes_ate(r["sol"], alvo) for r in runs]
+        atingiu = [a for a in ate if a is not None]
+        registro = {
+            "suite": SUITE,
+            "nome": f"operadores[{nome}]",
+            "parametros": {**CONFIGS[nome], "pop": base["pop"], "ger": ger, "sementes": sementes},
+            "repeticoes": len(runs),
+            "tempo_mediana_s": statistics.median(r["tempo_s"] for r in runs),
+            "J_final": statistics.fmean(r["sol"]["fitness"]["J"] for r in runs),
+            "J_alvo": alvo,
+            "geracoes_ate_alvo_media": statistics.fmean(atingiu) if atingiu else None,
+            "fracao_atingiu_alvo": len(atingiu) / len(runs),
+            "pico_rss_kb": pico_rss_kb(),
+        }
+        traco = runs[0]["sol"]["historico"][-1].get("adaptacao")
+        if traco:
+            registro["adaptacao_final"] = traco
+        resultados.append(registro)
+    return resultados
@@ -0,0 +1,315 @@
+# benchmarks/api.py
+"""
+Cenário de carga na API Flask (`/mensagem`), sem rede: usa o `test_client`
+do Flask e executa conversas completas (objetivo → orçamento) para vários
+usuários em paralelo.
+
+Sem OPENAI_API_KEY o plano é formatado em modo bruto, então o cenário
+mede apenas diálogo + Fuzzy + AG.
+
+Cenário de estresse (`mensagem[estresse]`): centenas de conversas
+simultâneas, cada uma com perfil próprio (peso e nº de refeições),
+com planos leves (`PARAMS_AG_CHAT` reduzido). Confere que todas terminam
+e que não há vazamento entre usuários: cada resposta de diálogo é a
+esperada para a etapa, e o plano final traz o peso e o nº de refeições
+do PRÓPRIO usuário. Respostas "alta demanda" (fila de planos cheia) são
+reenviadas, como faria o cliente, e contadas.
+
+Cenário de lote (`mensagens[lote]`): conversas completas de vários
+usuários enviadas numa ÚNICA requisição a `/mensagens` (todas as
+mensagens de cada usuário, intercaladas). Confere a ordem por usuário
+(mesmas verificações do estresse) e compara com as mesmas conversas
+enviadas uma mensagem por requisição.
+
+Cenário de faixas (`mensagem[faixas]`): uma rajada de pedidos de plano
+(vários usuários enviando o orçamento ao mesmo tempo) enquanto outros
+usuários só conversam. Mede a latência do diálogo durante a rajada —
+com as faixas de execução separadas ela não deve acompanhar a do AG — e
+quantos planos foram recusados por alta demanda.
+"""
+
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from ._comum import ASSETS, registro
+
+SUITE = "api"
+
+CONVERSA = ["oi", "2", "77.7", "7", "190", "5", "lactose", "30"]
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    k = min(len(ordenados) - 1, max(0, int(round(p / 100.0 * (len(ordenados) - 1)))))
+    return ordenados[k]
+
+
+def _carregar_app():
+    # api_chat importa `chatbot.chatbot_engine` como módulo de topo
+    if ASSETS not in sys.path:
+        sys.path.insert(0, ASSETS)
+    os.environ.pop("OPENAI_API_KEY", None)
+    import api_chat
+
+    return api_chat
+
+
+def rodar(rapido: bool = False) -> List[Dict]:
+    api_chat = _carregar_app()
+    cliente = api_chat.app.test_client()
+
+    n_usuarios = 2 if rapido else 8
+    concorrencia = 2 if rapido else 4
+
+    lat_dialogo: List[float] = []
+    lat_plano: List[float] = []
+
+    def conversa(uid: str) -> None:
+        for i, texto in enumerate(CONVERSA):
+            t0 = time.perf_counter()
+            resp = cliente.post("/mensagem", json={"user_id": uid, "texto": texto})
+            dt = time.perf_counter() - t0
+            assert resp.status_code == 200, resp.status_code
+            # a última mensagem (orçamento) é a que dispara o AG
+            (lat_plano if i == len(CONVERSA) - 1 else lat_dialogo).append(dt)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as pool:
+        list(pool.map(conversa, [f"bench-{i}" for i in range(n_usuarios)]))
+    total = time.perf_counter() - t0
+
+    medicao = {"tempos_s": [total], "min_s": total, "mediana_s": total, "media_s": total}
+    n_msgs = n_usuarios * len(CONVERSA)
+    return [
+        _registro_conversa(medicao, n_usuarios, concorrencia, n_msgs, lat_dialogo, lat_plano),
+        _estresse(api_chat, rapido),
+        _lote(api_chat, rapido),
+        _faixas(api_chat, rapido),
+    ]
+
+
+def _registro_conversa(medicao, n_usuarios, concorrencia, n_msgs, lat_dialogo, lat_plano) -> Dict:
+    return registro(
+            SUITE,
+            "mensagem[conversa_completa]",
+            medicao,
+            {"usuarios": n_usuarios, "concorrencia": concorrencia, "mensagens": n_msgs},
+            chamadas_por_rep=n_msgs,
+            extra={
+                "latencia_dialogo_p50_s": statistics.median(lat_dialogo),
+                "latencia_dialogo_p95_s": _percentil(lat_dialogo, 95),
+                "latencia_plano_p50_s": statistics.median(lat_plano),
+                "latencia_plano_p95_s": _percentil(lat_plano, 95),
+            },
+        )
+
+
+def _conversa_do_usuario(i: int) -> List[str]:
+    """Conversa com perfil próprio: peso e nº de refeições dependem de `i`."""
+    peso = f"{50 + i * 0.1:.1f}"
+    n_refeicoes = str(3 + i % 5)
+    return ["oi", str(i % 3), peso, str(i % 11), "190", n_refeicoes, "nenhuma", "30"]
+
+
+def _estresse(api_chat, rapido: bool) -> Dict:
+    from chatbot import chatbot_engine
+
+    n_usuarios = 40 if rapido else 300
+    concorrencia = 16 if rapido else 64
+
+    # respostas esperadas das etapas de diálogo (independem do usuário):
+    # uma conversa de referência, sem concorrência
+    cliente = api_chat.app.test_client()
+    esperado = [
+        cliente.post("/mensagem", json={"user_id": "estresse-ref", "texto": t}).get_json()["resposta"]
+        for t in _conversa_do_usuario(0)[:-1]
+    ]
+
+    ag_original = dict(chatbot_engine.PARAMS_AG_CHAT)
+    chatbot_engine.PARAMS_AG_CHAT.update(pop=20, ger=5)
+    latencias: List[float] = []
+    falhas: List[str] = []
+    recusas: List[str] = []
+
+    def conversa(i: int) -> None:
+        uid = f"estresse-{i}"
+        msgs = _conversa_do_usuario(i)
+        for k, texto in enumerate(msgs):
+            t0 = time.perf_counter()
+            resp = cliente.post("/mensagem", json={"user_id": uid, "texto": texto})
+            r = resp.get_json()["resposta"] if resp.status_code == 200 else f"HTTP {resp.status_code}"
+            while r == api_chat.MSG_ALTA_DEMANDA:
+                recusas.append(uid)
+                time.sleep(0.05)
+                resp = cliente.post("/mensagem", json={"user_id": uid, "texto": texto})
+                r = resp.get_json()["resposta"] if resp.status_code == 200 else f"HTTP {resp.status_code}"
+            latencias.append(time.perf_counter() - t0)
+            if k < len(msgs) - 1:
+                if r != esperado[k]:
+                    falhas.append(f"{uid}: etapa {k}")
+            elif f"para {msgs[2]} kg" not in r or r.count("Refeição ") != int(msgs[5]):
+                falhas.append(f"{uid}: plano de outro usuário ou incompleto")
+
+    try:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concorrencia) as pool:
+            list(pool.map(conversa, range(n_usuarios)))
+        total = time.perf_counter() - t0
+    finally:
+        chatbot_engine.PARAMS_AG_CHAT.clear()
+        chatbot_engine.PARAMS_AG_CHAT.update(ag_original)
+
+    medicao = {"tempos_s": [total], "min_s": total, "mediana_s": total, "media_s": total}
+    n_msgs = n_usuarios * len(CONVERSA)
+    return registro(
+        SUITE,
+        "mensagem[estresse]",
+        medicao,
+        {"usuarios": n_usuarios, "concorrencia": concorrencia, "mensagens": n_msgs, "ag": {"pop": 20, "ger": 5}},
+        chamadas_por_rep=n_msgs,
+        extra={
+            "conversas_sem_vazamento": len(falhas) == 0,
+            "falhas": falhas[:20],
+            "latencia_p50_s": statistics.median(latencias),
+            "latencia_p95_s": _percentil(latencias, 95),
+            "recusas_alta_demanda": len(recusas),
+        },
+    )
+
+
+def _lote(api_chat, rapido: bool) -> Dict:
+    from chatbot import chatbot_engine
+
+    n_usuarios = 10 if rapido else 60
+    cliente = api_chat.app.test_client()
+    esperado = [
+        cliente.post("/mensagem", json={"user_id": "lote-ref", "texto": t}).get_json()["resposta"]
+        for t in _conversa_do_usuario(0)[:-1]
+    ]
+
+    def conversas(prefixo: str) -> List[Dict]:
+        # intercaladas: 1ª mensagem de todos, 2ª de todos, ...
+        msgs = []
+        for k in range(len(CONVERSA)):
+            for i in range(n_usuarios):
+                msgs.append({"user_id": f"{prefixo}-{i}", "texto": _conversa_do_usuario(i)[k], "message_id": f"{i}:{k}"})
+        return msgs
+
+    ag_original = dict(chatbot_engine.PARAMS_AG_CHAT)
+    chatbot_engine.PARAMS_AG_CHAT.update(pop=20, ger=5)
+    try:
+        individuais = conversas("individual")
+        t0 = time.perf_counter()
+        for m in individuais:
+            cliente.post("/mensagem", json=m)
+        t_individual = time.perf_counter() - t0
+
+        lote = conversas("lote")
+        t0 = time.perf_counter()
+        resp = cliente.post("/mensagens", json={"mensagens": lote})
+        t_lote = time.perf_counter() - t0
+    finally:
+        chatbot_engine.PARAMS_AG_CHAT.clear()
+        chatbot_engine.PARAMS_AG_CHAT.update(ag_original)
+
+    falhas: List[str] = []
+    for m, r in zip(lote, resp.get_json()["respostas"]):
+        i, k = map(int, m["message_id"].split(":"))
+        texto = r.get("resposta", r.get("erro"))
+        if r["message_id"] != m["message_id"]:
+            falhas.append(f"{m['message_id']}: fora de ordem")
+        elif k < len(CONVERSA) - 1 and texto != esperado[k]:
+            falhas.append(f"{m['user_id']}: etapa {k}")
+        elif k == len(CONVERSA) - 1 and texto != api_chat.MSG_ALTA_DEMANDA and (
+            f"para {_conversa_do_usuario(i)[2]} kg" not in texto
+        ):
+            falhas.append(f"{m['user_id']}: plano de outro usuário ou incompleto")
+
+    medicao = {"tempos_s": [t_lote], "min_s": t_lote, "mediana_s": t_lote, "media_s": t_lote}
+    return registro(
+        SUITE,
+        "mensagens[lote]",
+        medicao,
+        {"usuarios": n_usuarios, "mensagens": len(lote), "ag": {"pop": 20, "ger": 5}},
+        chamadas_por_rep=len(lote),
+        extra={
+            "ordem_por_usuario_ok": len(falhas) == 0,
+            "falhas": falhas[:20],
+            "tempo_individual_s": t_individual,
+            "requisicoes_individual": len(individuais),
+            "requisicoes_lote": 1,
+        },
+    )
+
+
+def _faixas(api_chat, rapido: bool) -> Dict:
+    from chatbot import chatbot_engine
+    from telemetria import REGISTRO
+
+    n_plano = 8 if rapido else 32
+    n_dialogo = 8 if rapido else 32
+    cliente = api_chat.app.test_client()
+
+    ag_original = dict(chatbot_engine.PARAMS_AG_CHAT)
+    chatbot_engine.PARAMS_AG_CHAT.update(pop=40, ger=20 if rapido else 60)
+    try:
+        # leva os usuários da rajada até a etapa do orçamento (sem concorrência)
+        for i in range(n_plano):
+            for texto in _conversa_do_usuario(i)[:-1]:
+                cliente.post("/mensagem", json={"user_id": f"faixas-plano-{i}", "texto": texto})
+
+        lat_dialogo: List[float] = []
+        resultados_plano: List[str] = []
+        espera_0 = REGISTRO.valor("nutribot_fila_espera_segundos_total", faixa="plano")
+        aceitas_0 = REGISTRO.valor("nutribot_fila_tarefas_total", faixa="plano", resultado="aceita")
+
+        def plano(i: int) -> None:
+            r = cliente.post("/mensagem", json={"user_id": f"faixas-plano-{i}", "texto": "30"}).get_json()
+            resultados_plano.append("recusado" if r["resposta"] == api_chat.MSG_ALTA_DEMANDA else "gerado")
+
+        def dialogo(i: int) -> None:
+            for texto in _conversa_do_usuario(i)[:-1]:
+                t0 = time.perf_counter()
+                cliente.post("/mensagem", json={"user_id": f"faixas-dialogo-{i}", "texto": texto})
+                lat_dialogo.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_plano + n_dialogo) as pool:
+            futuros = [pool.submit(plano, i) for i in range(n_plano)]
+            futuros += [pool.submit(dialogo, i) for i in range(n_dialogo)]
+            for f in futuros:
+                f.result()
+        total = time.perf_counter() - t0
+    finally:
+        chatbot_engine.PARAMS_AG_CHAT.clear()
+        chatbot_engine.PARAMS_AG_CHAT.update(ag_original)
+
+    aceitas = REGISTRO.valor("nutribot_fila_tarefas_total", faixa="plano", resultado="aceita") - aceitas_0
+    espera = REGISTRO.valor("nutribot_fila_espera_segundos_total", faixa="plano") - espera_0
+    medicao = {"tempos_s": [total], "min_s": total, "mediana_s": total, "media_s": total}
+    return registro(
+        SUITE,
+        "mensagem[faixas]",
+        medicao,
+        {
+            "usuarios_plano": n_plano,
+            "usuarios_dialogo": n_dialogo,
+            "workers_plano": api_chat.FAIXA_PLANO.workers,
+            "fila_plano": api_chat.FAIXA_PLANO.capacidade,
+            "ag": {"pop": 40, "ger": 20 if rapido else 60},
+        },
+        chamadas_por_rep=n_plano + n_dialogo * (len(CONVERSA) - 1),
+        extra={
+            "latencia_dialogo_p50_s": statistics.median(lat_dialogo),
+            "latencia_dialogo_p95_s": _percentil(lat_dialogo, 95),
+            "planos_gerados": resultados_plano.count("gerado"),
+            "planos_recusados_alta_demanda": resultados_plano.count("recusado"),
+            "espera_media_fila_plano_s": espera / aceitas if aceitas else 0.0,
+        },
+    )
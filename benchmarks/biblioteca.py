@@ -0,0 +1,97 @@
+# benchmarks/biblioteca.py
+"""
+Latência e qualidade dos planos servidos pela biblioteca pré-calculada.
+
+Constrói uma biblioteca pequena (grade reduzida, num diretório temporário)
+e consulta perfis aleatórios dentro da faixa da grade:
+
+  - latência de `servir_da_biblioteca` (p50 / p95 / máx, em ms) e fração
+    de consultas resolvidas em cada etapa (escala / solver / ag);
+  - J servido x J do AG completo para os mesmos perfis (amostra).
+
+As metas (Fuzzy) são calculadas antes da medição: a latência é só a do
+caminho da biblioteca.
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+from ._comum import TABELA_PADRAO, pico_rss_kb
+from .micro import PARAMS_AG
+from assets.biblioteca_planos import alvos_do_perfil, construir_biblioteca, servir_da_biblioteca
+from assets.genetic_module import gerar_cardapio
+
+SUITE = "biblioteca"
+
+
+def _percentil(valores: List[float], q: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(q * (len(ordenados) - 1))))]
+
+
+def rodar(rapido: bool = False) -> List[Dict]:
+    grade = {
+        "atividade": (2, 8) if rapido else (1, 4, 7, 10),
+        "colesterol": (190,),
+        "peso": (60, 80, 100) if rapido else (55, 65, 75, 85, 95, 105),
+        "n_refeicoes": (5,),
+        "restricoes": ((), ("lactose",)),
+    }
+    params_ag = {"pop": 60 if rapido else 120, "ger": 30 if rapido else 120}
+    n_consultas = 40 if rapido else 200
+    n_comparar = 3 if rapido else 10
+
+    rnd = random.Random(7)
+    consultas = []
+    while len(consultas) < n_consultas:
+        perfil = (rnd.randrange(3), rnd.randint(grade["atividade"][0], grade["atividade"][-1]),
+                  rnd.randint(180, 200), rnd.uniform(grade["peso"][0], grade["peso"][-1]))
+        try:
+            targets = alvos_do_perfil(*perfil)
+        except KeyError:
+            continue
+        params = {**PARAMS_AG, "tabela_csv": TABELA_PADRAO, "orcamento_max": 9999.0,
+                  "restricoes": {"banidos": list(rnd.choice(grade["restricoes"]))}, **params_ag}
+        consultas.append((targets, params))
+
+    with tempfile.TemporaryDirectory(prefix="nutribot_biblioteca_") as tmp:
+        destino = os.path.join(tmp, "planos.npz")
+        t0 = time.perf_counter()
+        resumo = construir_biblioteca(TABELA_PADRAO, destino, grade=grade, params_ag=params_ag)
+        t_construcao = time.perf_counter() - t0
+        config = {"caminho": destino}
+
+        servir_da_biblioteca(*consultas[0], config)  # abre a biblioteca (cache)
+        tempos, etapas, servidos = [], {}, []
+        for targets, params in consultas:
+            t0 = time.perf_counter()
+            sol = servir_da_biblioteca(targets, params, config)
+            tempos.append((time.perf_counter() - t0) * 1000)
+            etapa = sol["biblioteca"]["etapa"]
+            etapas[etapa] = etapas.get(etapa, 0) + 1
+            servidos.append(sol["fitness"]["J"])
+
+    J_ag = [gerar_cardapio(t, p)["fitness"]["J"] for t, p in consultas[:n_comparar]]
+
+    return [
+        {
+            "suite": SUITE,
+            "nome": "servir_da_biblioteca",
+            "parametros": {"grade": {k: list(v) for k, v in grade.items()}, **params_ag, "consultas": n_consultas},
+            "repeticoes": n_consultas,
+            "tempo_mediana_s": statistics.median(tempos) / 1000,
+            "latencia_p50_ms": _percentil(tempos, 0.50),
+            "latencia_p95_ms": _percentil(tempos, 0.95),
+            "latencia_max_ms": max(tempos),
+            "fracao_por_etapa": {k: v / n_consultas for k, v in sorted(etapas.items())},
+            "planos_na_biblioteca": resumo["planos"],
+            "tempo_construcao_s": t_construcao,
+            "J_servido_amostra": statistics.fmean(servidos[:n_comparar]),
+            "J_ag_completo_amostra": statistics.fmean(J_ag),
+            "pico_rss_kb": pico_rss_kb(),
+        }
+    ]
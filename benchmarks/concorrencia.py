@@ -0,0 +1,120 @@
+# benchmarks/concorrencia.py
+"""
+Reprodutibilidade e vazão de `gerar_cardapio` sob execução concorrente.
+
+Cada execução do AG usa o próprio `random.Random(seed)`. Esta suíte gera
+os mesmos planos (uma semente por plano, modos padrão / solver / pareto /
+busca local) primeiro em sequência e depois em threads, e confere que o
+resultado de cada semente é IDÊNTICO nos dois casos — com o antigo
+`random.seed` global, as threads embaralhavam as sequências umas das
+outras e os planos mudavam a cada rodada.
+
+Registra também o tempo sequencial x paralelo (com o GIL, o ganho é
+limitado; o ponto aqui é a correção).
+
+O registro "coalescencia" dispara rajadas de pedidos idênticos em
+`gerar_plano_para_usuario` (poucas entradas distintas, muitas cópias de
+cada) e confere quantas execuções reais aconteceram e se todos os
+pedidos iguais receberam o mesmo plano.
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from ._comum import TABELA_PADRAO, pico_rss_kb
+from .micro import PARAMS_AG, PERFIL, _targets
+from assets import core_engine
+from assets.genetic_module import gerar_cardapio
+
+SUITE = "concorrencia"
+
+VARIANTES = {
+    "padrao": {},
+    "solver": {"porcoes": "solver"},
+    "pareto": {"modo": "pareto"},
+    "busca_local": {"busca_local": {"quando": "geracao", "top_k": 2, "orcamento_avaliacoes": 100}},
+}
+
+
+def _assinatura(sol: Dict) -> str:
+    """Resumo comparável de um resultado (cardápio + fitness)."""
+    return json.dumps({"refeicoes": sol["refeicoes"], "fitness": sol["fitness"]}, sort_keys=True)
+
+
+def rodar(rapido: bool = False) -> List[Dict]:
+    targets = _targets()
+    n_planos = 8 if rapido else 16
+    workers = 4 if rapido else 8
+    base = {**PARAMS_AG, "tabela_csv": TABELA_PADRAO, "pop": 30 if rapido else 60, "ger": 15 if rapido else 40}
+
+    resultados = []
+    for nome, extra in VARIANTES.items():
+        planos = [{**base, **extra, "seed": 100 + i} for i in range(n_planos)]
+
+        t0 = time.perf_counter()
+        sequencial = [_assinatura(gerar_cardapio(targets, p)) for p in planos]
+        t_seq = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            paralelo = [_assinatura(s) for s in ex.map(lambda p: gerar_cardapio(targets, p), planos)]
+        t_par = time.perf_counter() - t0
+
+        divergentes = sum(a != b for a, b in zip(sequencial, paralelo))
+        resultados.append(
+            {
+                "suite": SUITE,
+                "nome": f"reprodutibilidade[{nome}]",
+                "parametros": {"planos": n_planos, "workers": workers, "pop": base["pop"], "ger": base["ger"], **extra},
+                "repeticoes": 1,
+                "tempo_mediana_s": t_par,
+                "tempo_sequencial_s": t_seq,
+                "tempo_paralelo_s": t_par,
+                "identicos": divergentes == 0,
+                "planos_divergentes": divergentes,
+                "pico_rss_kb": pico_rss_kb(),
+            }
+        )
+    resultados.append(_coalescencia(rapido))
+    return resultados
+
+
+def _coalescencia(rapido: bool) -> Dict:
+    distintos = 2 if rapido else 4
+    copias = 8 if rapido else 16
+    pedidos = [
+        {
+            **PERFIL,
+            **PARAMS_AG,
+            "tabela_csv": TABELA_PADRAO,
+            "colesterol": 180 + 5 * (i % distintos),
+            "ag": {"pop": 30 if rapido else 60, "ger": 15 if rapido else 40, "seed": 42},
+        }
+        for i in range(distintos * copias)
+    ]
+
+    antes = core_engine._COALESCEDOR.estatisticas()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(pedidos)) as ex:
+        planos = list(ex.map(core_engine.gerar_plano_para_usuario, pedidos))
+    tempo = time.perf_counter() - t0
+    depois = core_engine._COALESCEDOR.estatisticas()
+
+    por_entrada: Dict[int, set] = {}
+    for p, plano in zip(pedidos, planos):
+        por_entrada.setdefault(p["colesterol"], set()).add(json.dumps(plano["cardapio"], sort_keys=True))
+
+    return {
+        "suite": SUITE,
+        "nome": "coalescencia",
+        "parametros": {"entradas_distintas": distintos, "copias": copias, **pedidos[0]["ag"]},
+        "repeticoes": 1,
+        "tempo_mediana_s": tempo,
+        "pedidos": len(pedidos),
+        "execucoes": depois["lideres"] - antes["lideres"],
+        "coalescidos": depois["seguidores"] - antes["seguidores"],
+        "identicos": all(len(v) == 1 for v in por_entrada.values()),
+        "pico_rss_kb": pico_rss_kb(),
+    }
@@ -0,0 +1,77 @@
+# benchmarks/escala.py
+"""
+Convergência do AG em função do tamanho da tabela de alimentos.
+
+Para cada tamanho (110 → 5000 itens sintéticos) roda `gerar_cardapio`
+com várias sementes e histórico completo, registrando:
+
+  - J final médio
+  - tempo médio por geração
+  - gerações até atingir J <= J_alvo, onde J_alvo é (1 + tolerância) × o
+    melhor J médio do laço do AG (antes da escala final) na tabela base
+    (taco_min). Com seleção de candidatos indexada, esse número deve
+    ficar aproximadamente constante.
+"""
+
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from ._comum import TABELA_PADRAO, pico_rss_kb, tabela_sintetica
+from .micro import PARAMS_AG, _targets
+from assets.genetic_module import gerar_cardapio
+
+SUITE = "escala"
+TOLERANCIA = 0.25
+
+
+def _geracoes_ate(historico: List[Dict], alvo: float) -> Optional[int]:
+    for h in historico:
+        if h["best_J"] <= alvo:
+            return h["ger"] + 1
+    return None
+
+
+def rodar(rapido: bool = False) -> List[Dict]:
+    targets = _targets()
+    ger = 30 if rapido else 80
+    sementes = [1, 2] if rapido else [1, 2, 3, 4]
+    tamanhos = [110, 1000] if rapido else [110, 1000, 5000]
+    base = {**PARAMS_AG, "pop": 60 if rapido else 100, "ger": ger, "historico_max": ger}
+
+    execucoes: Dict[int, List[Dict]] = {}
+    with tempfile.TemporaryDirectory(prefix="nutribot_escala_") as tmp:
+        for n in tamanhos:
+            caminho = TABELA_PADRAO if n == 110 else tabela_sintetica(n, os.path.join(tmp, f"t{n}.csv"))
+            execucoes[n] = []
+            for seed in sementes:
+                t0 = time.perf_counter()
+                sol = gerar_cardapio(targets, {**base, "tabela_csv": caminho, "seed": seed})
+                execucoes[n].append({"tempo_s": time.perf_counter() - t0, "sol": sol})
+
+    J_ref = statistics.fmean(e["sol"]["historico"][-1]["best_J"] for e in execucoes[tamanhos[0]])
+    alvo = J_ref * (1 + TOLERANCIA)
+
+    resultados = []
+    for n, runs in execucoes.items():
+        tempos = [r["tempo_s"] for r in runs]
+        ate = [_geracoes_ate(r["sol"]["historico"], alvo) for r in runs]
+        atingiu = [g for g in ate if g is not None]
+        resultados.append(
+            {
+                "suite": SUITE,
+                "nome": f"convergencia[tabela={n}]",
+                "parametros": {"n_itens": n, "pop": base["pop"], "ger": ger, "sementes": sementes},
+                "repeticoes": len(runs),
+                "tempo_mediana_s": statistics.median(tempos),
+                "tempo_por_geracao_s": statistics.fmean(tempos) / ger,
+                "J_final": statistics.fmean(r["sol"]["fitness"]["J"] for r in runs),
+                "J_alvo": alvo,
+                "geracoes_ate_alvo_media": statistics.fmean(atingiu) if atingiu else None,
+                "fracao_atingiu_alvo": len(atingiu) / len(runs),
+                "pico_rss_kb": pico_rss_kb(),
+            }
+        )
+    return resultados
@@ -0,0 +1,90 @@
+# benchmarks/estacionario.py
+"""
+Motor geracional x steady-state, com o MESMO orçamento de avaliações.
+
+Para cada motor e semente mede-se:
+
+  - J final e J médio por avaliação (área sob a curva best_J do
+    histórico, dividida pelas avaliações: menor = converge antes);
+  - avaliações até o alvo J_alvo = (1 + tolerância) × J final médio do
+    motor geracional no histórico (antes da escala/formatação) (primeira "geração equivalente" com best_J <= alvo);
+  - pico de memória alocada pelo AG (tracemalloc, em KiB) — o RSS do
+    processo é um high-water mark e não separa os motores.
+"""
+
+import statistics
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from ._comum import TABELA_PADRAO, pico_rss_kb
+from .micro import PARAMS_AG, _targets
+from assets.genetic_module import gerar_cardapio
+
+SUITE = "estacionario"
+TOLERANCIA = 0.10
+MOTORES = ("geracional", "steady")
+
+
+def _avaliacoes_ate(sol: Dict, alvo: float, pop: int) -> Optional[int]:
+    for h in sol["historico"]:
+        if h["best_J"] <= alvo:
+            return (h["ger"] + 2) * pop
+    return None
+
+
+def _J_por_avaliacao(sol: Dict) -> float:
+    hist = sol["historico"]
+    return statistics.fmean(h["best_J"] for h in hist) if hist else float("nan")
+
+
+def rodar(rapido: bool = False) -> List[Dict]:
+    targets = _targets()
+    pop = 60 if rapido else 120
+    ger = 30 if rapido else 80
+    sementes = [1, 2] if rapido else [1, 2, 3, 4, 5, 6, 7, 8]
+    base = {
+        **PARAMS_AG,
+        "tabela_csv": TABELA_PADRAO,
+        "pop": pop,
+        "ger": ger,
+        "historico_max": ger + 1,
+        "avaliacoes_max": pop * ger + pop,
+    }
+
+    execucoes: Dict[str, List[Dict]] = {}
+    for motor in MOTORES:
+        execucoes[motor] = []
+        for seed in sementes:
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            sol = gerar_cardapio(targets, {**base, "engine": motor, "seed": seed})
+            tempo = time.perf_counter() - t0
+            _atual, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            execucoes[motor].append({"tempo_s": tempo, "pico_kib": pico / 1024, "sol": sol})
+
+    alvo = statistics.fmean(r["sol"]["historico"][-1]["best_J"] for r in execucoes["geracional"]) * (1 + TOLERANCIA)
+
+    resultados = []
+    for motor, runs in execucoes.items():
+        ate = [_avaliacoes_ate(r["sol"], alvo, pop) for r in runs]
+        atingiu = [a for a in ate if a is not None]
+        resultados.append(
+            {
+                "suite": SUITE,
+                "nome": f"motor[{motor}]",
+                "parametros": {"engine": motor, "pop": pop, "ger": ger, "avaliacoes_max": base["avaliacoes_max"],
+                               "sementes": sementes},
+                "repeticoes": len(runs),
+                "tempo_mediana_s": statistics.median(r["tempo_s"] for r in runs),
+                "J_final": statistics.fmean(r["sol"]["fitness"]["J"] for r in runs),
+                "J_medio_por_avaliacao": statistics.fmean(_J_por_avaliacao(r["sol"]) for r in runs),
+                "J_alvo": alvo,
+                "avaliacoes_ate_alvo_media": statistics.fmean(atingiu) if atingiu else None,
+                "fracao_atingiu_alvo": len(atingiu) / len(runs),
+                "pico_tracemalloc_kib": statistics.median(r["pico_kib"] for r in runs),
+                "pico_rss_kb": pico_rss_kb(),
+            }
+        )
+    return resultados
@@ -0,0 +1,115 @@
+# benchmarks/macro.py
+"""
+Macro-benchmarks: `gerar_cardapio` ponta a ponta.
+
+Varreduras (uma dimensão por vez, demais parâmetros no valor de referência):
+  - pop          : tamanho da população
+  - ger          : número de gerações
+  - n_refeicoes  : refeições por dia
+  - porcoes      : gramas evoluídas pelo AG x resolvidas pelo solver (modo híbrido)
+  - deduplicar   : com x sem troca de genomas repetidos (módulo `diversidade`)
+  - tabela       : tamanho da tabela de alimentos (sintética a partir da TACO)
+  - subtabela    : perfil restritivo (lactose + glúten, orçamento apertado)
+                   na tabela inteira x na subtabela de candidatos; J médio
+                   sobre várias sementes e fração do J gasta em penalidade
+                   de restrição (avaliações desperdiçadas em banidos)
+"""
+
+import os
+import tempfile
+from typing import Dict, List
+
+from ._comum import TABELA_PADRAO, medir, registro, tabela_sintetica
+from .micro import PARAMS_AG, _targets
+from assets.genetic_module import gerar_cardapio
+from assets.telemetria import Telemetria
+
+SUITE = "macro"
+
+REFERENCIA = {"pop": 80, "ger": 60, "n_refeicoes": 5, "seed": 42}
+
+
+def _avaliacoes(pop: int, ger: int) -> int:
+    """Avaliações de fitness feitas pelo laço geracional + avaliação final."""
+    return pop * ger + pop + 1
+
+
+def _caso(nome: str, targets: Dict, params: Dict, reps: int) -> Dict:
+    m = medir(lambda: gerar_cardapio(targets, params), repeticoes=reps, aquecimento=0)
+    sol = m["retorno"]
+    return registro(
+        SUITE,
+        nome,
+        m,
+        {k: v for k, v in params.items() if k in ("pop", "ger", "n_refeicoes", "seed", "n_itens", "porcoes", "deduplicar")},
+        avaliacoes_por_rep=_avaliacoes(params["pop"], params["ger"]),
+        J_final=sol["fitness"]["J"],
+    )
+
+
+def _subtabela(targets: Dict, base: Dict, sementes: int) -> List[Dict]:
+    restritivo = {**base, "restricoes": {"banidos": ["lactose", "glúten"]}, "orcamento_max": 15.0}
+    resultados = []
+    for sub in (False, True):
+        teles: List[Telemetria] = []
+        Js: List[float] = []
+
+        def rodar_sementes():
+            teles.clear()
+            Js.clear()
+            for seed in range(sementes):
+                tele = Telemetria()
+                sol = gerar_cardapio(targets, {**restritivo, "seed": seed, "subtabela": sub}, tele)
+                teles.append(tele)
+                Js.append(sol["fitness"]["J"])
+
+        m = medir(rodar_sementes, repeticoes=1, aquecimento=0)
+        resultados.append(
+            registro(
+                SUITE,
+                f"gerar_cardapio[subtabela={sub}]",
+                m,
+                {"pop": restritivo["pop"], "ger": restritivo["ger"], "sementes": sementes, "orcamento_max": 15.0},
+                chamadas_por_rep=sementes,
+                avaliacoes_por_rep=sementes * _avaliacoes(restritivo["pop"], restritivo["ger"]),
+                J_final=sum(Js) / len(Js),
+                extra={
+                    "itens_candidatos": teles[0].contadores.get("subtabela_itens"),
+                    "penalidade_restricao_share": sum(t.penalidade_restricao_share() for t in teles) / len(teles),
+                },
+            )
+        )
+    return resultados
+
+
+def rodar(rapido: bool = False) -> List[Dict]:
+    reps = 1 if rapido else 3
+    targets = _targets()
+    resultados: List[Dict] = []
+
+    base = {**PARAMS_AG, **REFERENCIA, "tabela_csv": TABELA_PADRAO}
+    if rapido:
+        base.update(pop=40, ger=20)
+
+    varreduras = {
+        "pop": [20, 40, 80] if rapido else [40, 120, 240],
+        "ger": [10, 20, 40] if rapido else [30, 100, 200],
+        "n_refeicoes": [3, 5, 7],
+        "porcoes": ["ag", "solver"],
+        "deduplicar": [False, True],
+    }
+
+    for chave, valores in varreduras.items():
+        for v in valores:
+            params = {**base, chave: v}
+            resultados.append(_caso(f"gerar_cardapio[{chave}={v}]", targets, params, reps))
+
+    tamanhos = [110, 1000] if rapido else [110, 1000, 5000]
+    with tempfile.TemporaryDirectory(prefix="nutribot_bench_") as tmp:
+        for n in tamanhos:
+            caminho = tabela_sintetica(n, os.path.join(tmp, f"tabela_{n}.csv"))
+            params = {**base, "tabela_csv": caminho, "n_itens": n}
+            resultados.append(_caso(f"gerar_cardapio[tabela={n}]", targets, params, reps))
+
+    resultados.extend(_subtabela(targets, base, 3 if rapido else 10))
+    return resultados
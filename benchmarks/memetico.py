@@ -0,0 +1,146 @@
+# benchmarks/memetico.py
+"""
+Avaliações até o alvo com e sem a busca local (etapa memética).
+
+Configurações comparadas, mesmas sementes e mesma tabela (taco_min):
+
+  - sem      : AG puro
+  - final    : busca local só no fim (`quando="final"`)
+  - geracao  : busca local na elite a cada geração (`quando="geracao"`)
+
+O alvo é J_alvo = (1 + tolerância) × o J final médio do AG puro. Para cada
+execução conta-se o total de avaliações (completas + incrementais da busca
+local) até o melhor J ficar <= J_alvo: pelo histórico, geração a geração;
+no modo "final", pelo J devolvido com o total de avaliações da execução.
+
+Consistência: `incremental[consistencia]` aplica trocas aleatórias pelo
+`AvaliadorIncremental` e compara o J incremental com o de
+`_avalia_cardapio` no mesmo genoma, com e sem `uso_anterior_g` (planos de
+vários dias). A maior diferença deve ficar no ruído de ponto flutuante.
+"""
+
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from ._comum import TABELA_PADRAO, pico_rss_kb
+from .micro import PARAMS_AG, _targets
+from assets.genetic_module import gerar_cardapio
+from assets.genetic_module import genetic_module as gm
+from assets.genetic_module.busca_local import AvaliadorIncremental
+from assets.telemetria import Telemetria
+
+SUITE = "memetico"
+TOLERANCIA = 0.10
+
+CONFIGS = {
+    "sem": None,
+    "final": {"quando": "final", "top_k": 3, "orcamento_avaliacoes": 400},
+    "geracao": {"quando": "geracao", "top_k": 2, "orcamento_avaliacoes": 150},
+}
+
+
+def _avaliacoes_ate(sol: Dict, total: float, alvo: float) -> Optional[float]:
+    for h in sol["historico"]:
+        if h["best_J"] <= alvo:
+            return h["avaliacoes"]
+    return total if sol["fitness"]["J"] <= alvo else None
+
+
+def _diferenca_incremental(params: Dict, n_cardapios: int, n_movimentos: int, seed: int = 3) -> float:
+    """Maior |J incremental − J completo| após cada troca aceita."""
+    itens = gm.carregar_tabela_alimentos(TABELA_PADRAO)
+    itens_idx = list(range(len(itens)))
+    targets = _targets()
+    rnd = random.Random(seed)
+    avaliador = AvaliadorIncremental(itens, itens_idx, targets, params)
+    pior = 0.0
+    for _ in range(n_cardapios):
+        # porções já limitadas, como em `busca_local.refinar`
+        cardapio = [
+            [(pos, gm._safe_portion(itens[pos], por)) for pos, por in ref]
+            for ref in gm._criar_individuo(params["n_refeicoes"], itens, itens_idx, rnd=rnd)
+        ]
+        avaliador.carregar(cardapio)
+        for _ in range(n_movimentos):
+            m = rnd.randrange(len(cardapio))
+            j = rnd.randrange(len(cardapio[m]))
+            outro = rnd.randrange(len(itens_idx))
+            novo = (outro, gm._safe_portion(itens[outro], cardapio[m][j][1]))
+            J, estado = avaliador.avaliar_movimento(m, cardapio[m][j], novo)
+            avaliador.aplicar(estado)
+            cardapio[m][j] = novo
+            pior = max(pior, abs(J - gm._avalia_cardapio(cardapio, itens_idx, itens, targets, params)[0]))
+    return pior
+
+
+def _consistencia(rapido: bool) -> Dict:
+    n_cardapios = 10 if rapido else 30
+    itens = gm.carregar_tabela_alimentos(TABELA_PADRAO)
+    # uso pesado nos dias anteriores em 1/3 da tabela (acima de `variedade_limite_dias_g`)
+    uso_anterior = {it.id: 300.0 for it in itens[::3]}
+    return {
+        "suite": SUITE,
+        "nome": "incremental[consistencia]",
+        "parametros": {"cardapios": n_cardapios, "movimentos": 20, "uso_anterior_g": "300 g em 1/3 dos itens"},
+        "repeticoes": 1,
+        "tempo_mediana_s": 0.0,
+        "max_dif_J": _diferenca_incremental(dict(PARAMS_AG), n_cardapios, 20),
+        "max_dif_J_uso_anterior": _diferenca_incremental(
+            {**PARAMS_AG, "uso_anterior_g": uso_anterior}, n_cardapios, 20
+        ),
+    }
+
+
+def rodar(rapido: bool = False) -> List[Dict]:
+    targets = _targets()
+    ger = 30 if rapido else 80
+    sementes = [1, 2] if rapido else [1, 2, 3, 4]
+    base = {
+        **PARAMS_AG,
+        "tabela_csv": TABELA_PADRAO,
+        "pop": 60 if rapido else 100,
+        "ger": ger,
+        "historico_max": ger,
+    }
+
+    execucoes: Dict[str, List[Dict]] = {}
+    for nome, cfg in CONFIGS.items():
+        execucoes[nome] = []
+        for seed in sementes:
+            tele = Telemetria()
+            t0 = time.perf_counter()
+            sol = gerar_cardapio(targets, {**base, "seed": seed, "busca_local": cfg}, telemetria=tele)
+            c = tele.contadores
+            execucoes[nome].append(
+                {
+                    "tempo_s": time.perf_counter() - t0,
+                    "sol": sol,
+                    "avaliacoes": c.get("avaliacoes_fitness", 0) + c.get("avaliacoes_busca_local", 0),
+                }
+            )
+
+    alvo = statistics.fmean(r["sol"]["fitness"]["J"] for r in execucoes["sem"]) * (1 + TOLERANCIA)
+
+    resultados = []
+    for nome, runs in execucoes.items():
+        ate = [_avaliacoes_ate(r["sol"], r["avaliacoes"], alvo) for r in runs]
+        atingiu = [a for a in ate if a is not None]
+        resultados.append(
+            {
+                "suite": SUITE,
+                "nome": f"busca_local[{nome}]",
+                "parametros": {"busca_local": CONFIGS[nome], "pop": base["pop"], "ger": ger, "sementes": sementes},
+                "repeticoes": len(runs),
+                "tempo_mediana_s": statistics.median(r["tempo_s"] for r in runs),
+                "avaliacoes_total_media": statistics.fmean(r["avaliacoes"] for r in runs),
+                "J_final": statistics.fmean(r["sol"]["fitness"]["J"] for r in runs),
+                "J_alvo": alvo,
+                "avaliacoes_ate_alvo_media": statistics.fmean(atingiu) if atingiu else None,
+                "fracao_atingiu_alvo": len(atingiu) / len(runs),
+                "pico_rss_kb": pico_rss_kb(),
+            }
+        )
+    resultados.append(_consistencia(rapido))
+    return resultados
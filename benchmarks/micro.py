@@ -0,0 +1,239 @@
+# benchmarks/micro.py
+"""
+Micro-benchmarks: operadores isolados do Fuzzy e do AG.
+
+Cada benchmark executa a função alvo em um laço de `lote` chamadas por
+repetição, de modo que o custo de medição fique desprezível.
+
+Fuzzy: `calcular_macros` limpa o cache de percentuais antes de cada
+chamada (custo da inferência); `calcular_macros[cache]` mede o acerto.
+
+Restrições: custo de compilar a máscara de banidos de uma tabela
+(`restricoes.MotorRestricoes.compilar`, índice + sinônimos) e da consulta
+em cache feita a cada avaliação de fitness.
+
+Seleção: compara o torneio antigo (`random.sample` + `sort` por filho)
+com a seleção por rank vetorizada (módulo `selecao`), por geração, e
+confere a pressão seletiva — a distribuição dos ranks escolhidos pelo
+torneio novo deve bater com a teórica C(n-1-r, k-1)/C(n, k).
+"""
+
+import os
+import random
+import shutil
+import tempfile
+from math import comb
+from typing import Dict, List
+
+import numpy as np
+
+from ._comum import TABELA_PADRAO, medir, registro
+from assets.fuzzy_module import calcular_macros
+from assets.fuzzy_module.calcular_macros import _percentuais_fuzzy
+from assets.fuzzy_module.calcular_vet import calculo_valor_energetico_total
+from assets.genetic_module import genetic_module as gm
+from assets.genetic_module.restricoes import MotorRestricoes, mascara_restricoes, normalizar_termos
+from assets.genetic_module.selecao import selecionar, torneio_por_rank
+from assets.genetic_module.tabela_compilada import compilar_tabela
+
+SUITE = "micro"
+
+# Perfil de referência (o mesmo do app.py)
+PERFIL = {"objetivo": 2, "atividade": 7, "colesterol": 190, "peso": 77.7}
+PARAMS_AG = {
+    "n_refeicoes": 5,
+    "restricoes": {"banidos": ["lactose"]},
+    "orcamento_max": 30.0,
+}
+
+
+def _targets() -> Dict[str, float]:
+    carb_g, prot_g, fat_g = calcular_macros(
+        PERFIL["objetivo"], PERFIL["atividade"], PERFIL["colesterol"], PERFIL["peso"]
+    )
+    return {
+        "kcal": calculo_valor_energetico_total(PERFIL["objetivo"], PERFIL["peso"]),
+        "carb_g": carb_g,
+        "prot_g": prot_g,
+        "fat_g": fat_g,
+    }
+
+
+def _copia(ind):
+    """Cópia rasa por refeição (os genes são tuplas imutáveis)."""
+    return [list(r) for r in ind]
+
+
+def rodar(rapido: bool = False) -> List[Dict]:
+    reps = 3 if rapido else 7
+    fator = 0.2 if rapido else 1.0
+    resultados: List[Dict] = []
+
+    def lote(n: int) -> int:
+        return max(1, int(n * fator))
+
+    # ------------------------------
+    # Fuzzy
+    # ------------------------------
+    n = lote(20)
+
+    def macros(limpar: bool) -> None:
+        for _ in range(n):
+            if limpar:
+                # mede a inferência, não o acerto no cache de percentuais
+                _percentuais_fuzzy.cache_clear()
+            calcular_macros(PERFIL["objetivo"], PERFIL["atividade"], PERFIL["colesterol"], PERFIL["peso"])
+
+    m = medir(lambda: macros(True), repeticoes=reps)
+    resultados.append(registro(SUITE, "calcular_macros", m, {"lote": n}, chamadas_por_rep=n))
+    m = medir(lambda: macros(False), repeticoes=reps)
+    resultados.append(registro(SUITE, "calcular_macros[cache]", m, {"lote": n}, chamadas_por_rep=n))
+
+    # ------------------------------
+    # Carga da tabela
+    # ------------------------------
+    n = lote(10)
+    m = medir(lambda: [gm._ler_csv_alimentos(TABELA_PADRAO) for _ in range(n)], repeticoes=reps)
+    resultados.append(
+        registro(SUITE, "carregar_tabela_alimentos[csv]", m, {"lote": n, "tabela": "taco_min"}, chamadas_por_rep=n)
+    )
+
+    with tempfile.TemporaryDirectory(prefix="nutribot_micro_") as tmp:
+        copia = shutil.copy(TABELA_PADRAO, os.path.join(tmp, "taco_min.csv"))
+        compilar_tabela(copia)
+        m = medir(lambda: [gm.carregar_tabela_alimentos(copia) for _ in range(n)], repeticoes=reps)
+    resultados.append(
+        registro(
+            SUITE, "carregar_tabela_alimentos[compilada]", m, {"lote": n, "tabela": "taco_min"}, chamadas_por_rep=n
+        )
+    )
+
+    # ------------------------------
+    # Operadores do AG (indivíduos fixos, semente fixa)
+    # ------------------------------
+    targets = _targets()
+    itens = gm.carregar_tabela_alimentos(TABELA_PADRAO)
+    itens_idx = list(range(len(itens)))
+    ctx = {"itens": itens, "itens_idx": itens_idx}
+    params = dict(PARAMS_AG)
+
+    rnd = random.Random(7)
+    individuos = [gm._criar_individuo(5, itens, itens_idx, rnd=rnd) for _ in range(64)]
+
+    n = lote(1000)
+
+    def avalia():
+        J = 0.0
+        for i in range(n):
+            J = gm._avalia_cardapio(individuos[i % 64], itens_idx, itens, targets, params)[0]
+        return J
+
+    m = medir(avalia, repeticoes=reps)
+    resultados.append(
+        registro(SUITE, "_avalia_cardapio", m, {"lote": n, "n_refeicoes": 5}, chamadas_por_rep=n, avaliacoes_por_rep=n)
+    )
+
+    def mutar():
+        rnd = random.Random(11)
+        for i in range(n):
+            gm._mutar(_copia(individuos[i % 64]), itens_idx=itens_idx, contexto=ctx, rnd=rnd)
+
+    m = medir(mutar, repeticoes=reps)
+    resultados.append(registro(SUITE, "_mutar", m, {"lote": n}, chamadas_por_rep=n))
+
+    n_cx = lote(10000)
+
+    def crossover():
+        rnd = random.Random(13)
+        for i in range(n_cx):
+            gm._crossover(individuos[i % 64], individuos[(i + 1) % 64], rnd)
+
+    m = medir(crossover, repeticoes=reps)
+    resultados.append(registro(SUITE, "_crossover", m, {"lote": n_cx}, chamadas_por_rep=n_cx))
+
+    def escala():
+        for i in range(n):
+            gm._escala_para_kcal(individuos[i % 64], itens_idx, itens, targets, fator_min=0.8, fator_max=1.8)
+
+    m = medir(escala, repeticoes=reps)
+    resultados.append(registro(SUITE, "_escala_para_kcal", m, {"lote": n}, chamadas_por_rep=n))
+
+    banidos = ["lactose", "glúten", "camarão"]
+    motor = MotorRestricoes(itens)
+    termos = normalizar_termos(banidos)
+    m = medir(lambda: [motor.compilar(termos) for _ in range(lote(100))], repeticoes=reps)
+    resultados.append(
+        registro(SUITE, "restricoes[compilar]", m, {"lote": lote(100), "banidos": banidos}, chamadas_por_rep=lote(100))
+    )
+    n_rs = lote(100000)
+    m = medir(lambda: [mascara_restricoes(itens, {"banidos": banidos}) for _ in range(n_rs)], repeticoes=reps)
+    resultados.append(registro(SUITE, "restricoes[cache]", m, {"lote": n_rs, "banidos": banidos}, chamadas_por_rep=n_rs))
+
+    resultados.extend(_selecao(reps, lote))
+    return resultados
+
+
+def _torneio_antigo(avals, rnd, k: int = 3):
+    """Torneio como era feito antes (referência de custo e de pressão)."""
+    cand = rnd.sample(avals, k)
+    cand.sort(key=lambda x: x[1])
+    return cand[0][0]
+
+
+def _selecao(reps: int, lote) -> List[Dict]:
+    resultados: List[Dict] = []
+    n_ger = lote(50)
+
+    for n in (120, 500, 2000):
+        rnd = random.Random(5)
+        J = [rnd.random() for _ in range(n)]
+        # avals no formato antigo: (indivíduo, J, kcal, carb, prot, gord, custo)
+        avals = sorted(((i, J[i], 0.0, 0.0, 0.0, 0.0, 0.0) for i in range(n)), key=lambda x: x[1])
+        J_arr = np.array(J)
+
+        def antigo():
+            r = random.Random(1)
+            for _ in range(n_ger):
+                [_torneio_antigo(avals, r) for _ in range(n)]
+
+        def por_rank(metodo: str):
+            rng = np.random.default_rng(1)
+            params = {"selecao": metodo}
+
+            def f():
+                for _ in range(n_ger):
+                    selecionar(np.argsort(J_arr, kind="stable"), n, params, rng)
+
+            return f
+
+        for nome, fn in (("torneio_antigo", antigo), ("torneio_rank", por_rank("torneio")), ("sus", por_rank("sus"))):
+            m = medir(fn, repeticoes=reps)
+            resultados.append(
+                registro(SUITE, f"selecao[{nome},pop={n}]", m, {"pop": n, "geracoes": n_ger}, chamadas_por_rep=n_ger)
+            )
+
+    # pressão seletiva: distribuição dos ranks vencedores (torneio k=3, n=120)
+    n, k, amostras = 120, 3, 200_000
+    teorica = np.array([comb(n - 1 - r, k - 1) for r in range(n)], dtype=float) / comb(n, k)
+    novo = np.bincount(torneio_por_rank(n, amostras, k, np.random.default_rng(3)), minlength=n) / amostras
+    rnd = random.Random(3)
+    ranks = list(range(n))
+    antigo = np.bincount([min(rnd.sample(ranks, k)) for _ in range(amostras)], minlength=n) / amostras
+    resultados.append(
+        {
+            "suite": SUITE,
+            "nome": "selecao[pressao,torneio_k=3,pop=120]",
+            "parametros": {"pop": n, "k": k, "amostras": amostras},
+            "repeticoes": 1,
+            "tempo_mediana_s": 0.0,
+            "rank_medio_teorico": float((teorica * np.arange(n)).sum()),
+            "rank_medio_antigo": float((antigo * np.arange(n)).sum()),
+            "rank_medio_novo": float((novo * np.arange(n)).sum()),
+            "p_melhor_teorica": float(teorica[0]),
+            "p_melhor_novo": float(novo[0]),
+            # distância de variação total entre as distribuições
+            "dvt_novo_vs_teorica": float(0.5 * np.abs(novo - teorica).sum()),
+            "dvt_antigo_vs_teorica": float(0.5 * np.abs(antigo - teorica).sum()),
+        }
+    )
+    return resultados